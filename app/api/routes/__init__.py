@@ -1,2 +1,2 @@
 """Opti-Scholar API Routes Package"""
-from app.api.routes import auth, documents, grading, verification, prediction, management, data
+from app.api.routes import auth, documents, grading, verification, prediction, management, data, jobs
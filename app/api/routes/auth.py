@@ -19,8 +19,9 @@ from app.api.schemas import (
     LoginRequest,
     TokenResponse,
 )
-from app.core.csv_db import csv_db
+from app.core.storage import get_storage
 
+storage = get_storage()
 router = APIRouter()
 
 
@@ -28,7 +29,7 @@ router = APIRouter()
 async def register_user(user_data: UserCreate):
     """Register a new user."""
     # Check if email exists
-    existing = await csv_db.get_user_by_email(user_data.email)
+    existing = await storage.get_user_by_email(user_data.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -46,7 +47,7 @@ async def register_user(user_data: UserCreate):
 @router.post("/login", response_model=TokenResponse)
 async def login(login_data: LoginRequest):
     """Authenticate user and return access token."""
-    user = await csv_db.get_user_by_email(login_data.email)
+    user = await storage.get_user_by_email(login_data.email)
     
     # In CSV we stored plain text or just assume success if password matches demo123 for simplicity in hackathon
     # or proper check if we stored hash. 
@@ -103,7 +104,7 @@ async def get_current_user():
 async def demo_login(login_data: LoginRequest):
     """Demo login - accepts any password for demo accounts (hackathon mode)."""
     # Find user by email
-    user = await csv_db.get_user_by_email(login_data.email)
+    user = await storage.get_user_by_email(login_data.email)
     
     if not user:
         raise HTTPException(
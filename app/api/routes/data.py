@@ -2,14 +2,22 @@
 Data API Routes - Fetch data from CSV storage for frontend
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
+import io
+import csv
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, AsyncIterator, Dict
 from app.api.schemas import (
     StatsResponse, StudentResponse, GradeResponse, RiskStudentResponse, 
     SchoolResponse, StudentUpdate
 )
-from app.core.csv_db import csv_db
+from app.core.http_cache import uncacheable
+from app.core.storage import get_storage, STUDENT_FIELDS
+from app.services.grading.submission import queue_submission
+from app.services.jobs import get_job_queue
 
+storage = get_storage()
 router = APIRouter(prefix="/data", tags=["Data"])
 
 # Endpoints
@@ -17,43 +25,99 @@ router = APIRouter(prefix="/data", tags=["Data"])
 async def get_dashboard_stats():
     """Get dashboard statistics."""
     try:
-        stats = await csv_db.get_stats()
+        stats = await storage.get_stats()
         return StatsResponse(**stats)
     except Exception as e:
         print(f"Error getting stats: {e}")
-        return StatsResponse(
+        return uncacheable(StatsResponse(
             total_students=0,
             total_submissions=0,
             auto_approved_rate=0.0,
             pending_review=0,
             avg_confidence=0.0
-        )
+        ))
 
 @router.get("/students", response_model=List[StudentResponse])
-async def get_students(limit: int = 50, offset: int = 0):
-    """Get all students."""
+async def get_students(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    school: Optional[str] = None,
+    department: Optional[str] = None,
+    semester: Optional[int] = None
+):
+    """
+    Get students, one page at a time.
+    
+    Pages are in a stable order (school, semester, enrollment). Pass the
+    ``X-Next-Cursor`` response header back as ``cursor`` to get the next page;
+    the header is absent on the last page.
+    """
     try:
-        students = await csv_db.get_all_students(limit=limit)
-        return [StudentResponse(**s) for s in students]
+        page = await storage.get_students_page(
+            limit=limit, offset=offset, cursor=cursor,
+            school=school, department=department, semester=semester
+        )
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        return [StudentResponse(**s) for s in page["students"]]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error getting students: {e}")
-        return []
+        return uncacheable([])
+
+@router.get("/students/export")
+async def export_students(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    school: Optional[str] = None,
+    department: Optional[str] = None,
+    semester: Optional[int] = None
+):
+    """Stream all matching students as NDJSON or CSV without building the full list in memory."""
+    students = storage.iter_students(school=school, department=department, semester=semester)
+    if format == "csv":
+        return StreamingResponse(
+            _csv_lines(students),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="students.csv"'}
+        )
+    return StreamingResponse(_ndjson_lines(students), media_type="application/x-ndjson")
+
+async def _ndjson_lines(rows: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """One JSON document per line."""
+    async for row in rows:
+        yield json.dumps(row) + "\n"
+
+async def _csv_lines(rows: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """Header line, then one CSV line per row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=STUDENT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
 
 @router.get("/schools", response_model=List[SchoolResponse])
 async def get_schools():
     """Get all schools with stats."""
     try:
-        schools = await csv_db.get_schools()
+        schools = await storage.get_schools()
         return [SchoolResponse(**s) for s in schools]
     except Exception as e:
         print(f"Error getting schools: {e}")
-        return []
+        return uncacheable([])
 
 @router.get("/schools/{code}")
 async def get_school_details(code: str):
     """Get students for a school grouped by semester."""
     try:
-        details = await csv_db.get_school_details(code)
+        details = await storage.get_school_details(code)
         if not details:
             raise HTTPException(status_code=404, detail="School not found")
         return details
@@ -66,7 +130,7 @@ async def get_school_details(code: str):
 async def update_student(student_id: str, student_update: StudentUpdate):
     """Update student details."""
     try:
-        success = await csv_db.update_student(student_id, student_update)
+        success = await storage.update_student(student_id, student_update)
         if not success:
             raise HTTPException(status_code=404, detail="Student not found")
         return {"success": True, "message": "Student updated successfully", "data": student_update}
@@ -79,10 +143,10 @@ async def update_student(student_id: str, student_update: StudentUpdate):
 async def get_admin_analytics():
     """Get detailed analytics for admin dashboard."""
     try:
-        return await csv_db.get_admin_analytics()
+        return await storage.get_admin_analytics()
     except Exception as e:
         print(f"Error getting analytics: {e}")
-        return {}
+        return uncacheable({})
 
 # Stubbed endpoints for other features not yet migrated fully to CSV logic
 @router.get("/grades/recent", response_model=List[GradeResponse])
@@ -93,20 +157,20 @@ async def get_recent_grades(limit: int = 10):
 async def get_risk_students(limit: int = 20):
     """Get at-risk students."""
     try:
-        risk_students = await csv_db.get_risk_students()
+        risk_students = await storage.get_risk_students()
         return [RiskStudentResponse(**s) for s in risk_students[:limit]]
     except Exception as e:
         print(f"Error getting risk students: {e}")
-        return []
+        return uncacheable([])
 
 @router.get("/risk-counts")
 async def get_risk_counts():
     """Get count of students by risk level."""
     try:
-        return await csv_db.get_risk_counts()
+        return await storage.get_risk_counts()
     except Exception as e:
         print(f"Error getting risk counts: {e}")
-        return {"critical": 0, "high": 0, "medium": 0, "low": 0}
+        return uncacheable({"critical": 0, "high": 0, "medium": 0, "low": 0})
 
 @router.get("/tickets")
 async def get_tickets(limit: int = 20):
@@ -120,19 +184,19 @@ async def get_resources():
 async def get_attendance_stats():
     """Get attendance statistics."""
     try:
-        return await csv_db.get_attendance_stats()
+        return await storage.get_attendance_stats()
     except Exception as e:
         print(f"Error getting attendance stats: {e}")
-        return {"average_attendance": 0, "total_students": 0}
+        return uncacheable({"average_attendance": 0, "total_students": 0})
 
 @router.get("/department/analytics")
 async def get_department_analytics():
     """Get comprehensive department analytics."""
     try:
-        return await csv_db.get_department_analytics()
+        return await storage.get_department_analytics()
     except Exception as e:
         print(f"Error getting department analytics: {e}")
-        return {}
+        return uncacheable({})
 
 @router.get("/courses")
 async def get_courses():
@@ -142,66 +206,76 @@ async def get_courses():
 async def get_teacher_courses(teacher_email: str):
     """Get courses for a specific teacher."""
     try:
-        courses = await csv_db.get_teacher_courses(teacher_email)
+        courses = await storage.get_teacher_courses(teacher_email)
         return courses
     except Exception as e:
         print(f"Error getting teacher courses: {e}")
-        return []
+        return uncacheable([])
 
 @router.get("/teacher/stats")
 async def get_teacher_stats(teacher_email: str):
     """Get statistics for a teacher."""
     try:
-        stats = await csv_db.get_teacher_stats(teacher_email)
+        stats = await storage.get_teacher_stats(teacher_email)
         return stats
     except Exception as e:
         print(f"Error getting teacher stats: {e}")
-        return {"total_students": 0, "total_courses": 0, "avg_attendance": 0, "at_risk_students": 0}
+        return uncacheable({"total_students": 0, "total_courses": 0, "avg_attendance": 0, "at_risk_students": 0})
 
 @router.get("/teacher/grading-stats")
 async def get_teacher_grading_stats(teacher_email: str):
     """Get grading statistics for teacher."""
     try:
-        stats = await csv_db.get_grading_stats(teacher_email)
+        stats = await storage.get_grading_stats(teacher_email)
         return stats
     except Exception as e:
         print(f"Error getting grading stats: {e}")
-        return {"total_submissions": 0, "pending_review": 0, "approved": 0, "ai_accuracy": 0}
+        return uncacheable({"total_submissions": 0, "pending_review": 0, "approved": 0, "ai_accuracy": 0})
 
 @router.get("/course/{course_code}/assignments")
 async def get_course_assignments(course_code: str):
     """Get assignments for a course."""
     try:
-        assignments = await csv_db.get_course_assignments(course_code)
+        assignments = await storage.get_course_assignments(course_code)
         return assignments
     except Exception as e:
         print(f"Error getting assignments: {e}")
-        return []
+        return uncacheable([])
 
 @router.get("/assignment/{assignment_id}/submissions")
 async def get_assignment_submissions(assignment_id: str):
     """Get submissions for an assignment."""
     try:
-        submissions = await csv_db.get_assignment_submissions(assignment_id)
+        submissions = await storage.get_assignment_submissions(assignment_id)
         return submissions
     except Exception as e:
         print(f"Error getting submissions: {e}")
-        return []
+        return uncacheable([])
 
-@router.post("/assignment/submit")
+@router.post("/assignment/submit", status_code=202)
 async def submit_assignment(data: dict):
-    """Submit an assignment for AI grading."""
+    """
+    Submit an assignment for AI grading.
+
+    Stores the submission and returns at once; a background job records the
+    AI score for teacher review. Poll ``status_url`` for the result.
+    """
     try:
-        result = await csv_db.submit_assignment(
-            data["assignment_id"],
-            data["student_id"],
-            data["student_name"],
-            data["student_reg"],
-            data["course_code"],
-            data["submission_text"],
-            data["file_name"]
-        )
-        return result
+        assignment = await storage.get_assignment(data["assignment_id"])
+        if not assignment:
+            raise HTTPException(status_code=404, detail="Assignment not found")
+        queued = await queue_submission(storage, get_job_queue(), {
+            "assignment_id": data["assignment_id"],
+            "student_id": data["student_id"],
+            "student_name": data["student_name"],
+            "student_reg": data["student_reg"],
+            "course_code": data["course_code"],
+            "submission_text": data["submission_text"],
+            "file_name": data["file_name"]
+        }, assignment["assignment_title"], float(assignment["max_score"]))
+        return queued
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -209,7 +283,7 @@ async def submit_assignment(data: dict):
 async def verify_submission(submission_id: str, data: dict):
     """Teacher verifies and approves AI grading."""
     try:
-        success = await csv_db.verify_submission(
+        success = await storage.verify_submission(
             submission_id,
             data["teacher_score"],
             data["teacher_feedback"],
@@ -227,17 +301,17 @@ async def verify_submission(submission_id: str, data: dict):
 async def get_course_attendance(course_code: str):
     """Get attendance records for a specific course."""
     try:
-        attendance = await csv_db.get_course_attendance(course_code)
+        attendance = await storage.get_course_attendance(course_code)
         return attendance
     except Exception as e:
         print(f"Error getting course attendance: {e}")
-        return []
+        return uncacheable([])
 
 @router.put("/attendance/{attendance_id}")
 async def update_attendance(attendance_id: str, attended: int):
     """Update attendance for a student."""
     try:
-        success = await csv_db.update_course_attendance(attendance_id, attended)
+        success = await storage.update_course_attendance(attendance_id, attended)
         if not success:
             raise HTTPException(status_code=404, detail="Attendance record not found")
         return {"success": True, "message": "Attendance updated successfully"}
@@ -254,37 +328,10 @@ async def get_exams():
 async def get_student_dashboard(student_id: str):
     """Get dashboard data for a student."""
     try:
-        # Get attendance
-        attendance_data = csv_db._read_csv(f"{csv_db.data_dir}/attendance_summary.csv")
-        student_attendance = next((a for a in attendance_data if a["student_id"] == student_id), None)
-        
-        # Get grades
-        grades_data = csv_db._read_csv(f"{csv_db.data_dir}/grades_summary.csv")
-        student_grades = [g for g in grades_data if g["student_id"] == student_id]
-        
-        # Calculate average grade
-        avg_grade = 0
-        if student_grades:
-            total = sum(float(g["current_grade"]) for g in student_grades)
-            avg_grade = round(total / len(student_grades), 1)
-        
-        # Get submissions
-        submissions_data = csv_db._read_csv(f"{csv_db.data_dir}/submissions.csv")
-        student_submissions = [s for s in submissions_data if s["student_id"] == student_id]
-        
-        return {
-            "attendance_rate": float(student_attendance["attendance_rate"]) * 100 if student_attendance else 0,
-            "total_classes": int(student_attendance["total_classes"]) if student_attendance else 0,
-            "attended": int(student_attendance["attended"]) if student_attendance else 0,
-            "absent_days": int(student_attendance["absent_days"]) if student_attendance else 0,
-            "avg_grade": avg_grade,
-            "total_courses": len(student_grades),
-            "total_submissions": len(student_submissions),
-            "pending_submissions": sum(1 for s in student_submissions if s["status"] == "pending_review")
-        }
+        return await storage.get_student_dashboard(student_id)
     except Exception as e:
         print(f"Error getting student dashboard: {e}")
-        return {
+        return uncacheable({
             "attendance_rate": 0,
             "total_classes": 0,
             "attended": 0,
@@ -293,105 +340,31 @@ async def get_student_dashboard(student_id: str):
             "total_courses": 0,
             "total_submissions": 0,
             "pending_submissions": 0
-        }
+        })
 
 @router.get("/student/{student_id}/grades")
 async def get_student_grades(student_id: str):
     """Get grades for a student."""
     try:
-        grades_data = csv_db._read_csv(f"{csv_db.data_dir}/grades_summary.csv")
-        student_grades = []
-        for g in grades_data:
-            if g["student_id"] == student_id:
-                student_grades.append({
-                    "semester": int(g.get("semester", 1)),
-                    "course_code": g["course_code"],
-                    "course_name": g["course_name"],
-                    "midterm_score": float(g["midterm_score"]),
-                    "assignment_avg": float(g["assignment_avg"]),
-                    "quiz_avg": float(g["quiz_avg"]),
-                    "current_grade": float(g["current_grade"]),
-                    "grade_letter": g["grade_letter"],
-                    "status": g["status"]
-                })
-        return student_grades
+        return await storage.get_student_grades(student_id)
     except Exception as e:
         print(f"Error getting student grades: {e}")
-        return []
+        return uncacheable([])
 
 @router.get("/student/{student_id}/courses")
 async def get_student_courses(student_id: str):
     """Get courses for a student grouped by semester."""
     try:
-        grades_data = csv_db._read_csv(f"{csv_db.data_dir}/grades_summary.csv")
-        course_attendance = csv_db._read_csv(f"{csv_db.data_dir}/course_attendance.csv")
-        
-        # Get unique courses for student
-        courses_by_semester = {}
-        for g in grades_data:
-            if g["student_id"] == student_id:
-                semester = int(g.get("semester", 1))
-                if semester not in courses_by_semester:
-                    courses_by_semester[semester] = []
-                
-                # Find attendance for this course
-                attendance = next((a for a in course_attendance 
-                                 if a["student_id"] == student_id and a["course_code"] == g["course_code"]), None)
-                
-                courses_by_semester[semester].append({
-                    "course_code": g["course_code"],
-                    "course_name": g["course_name"],
-                    "current_grade": float(g["current_grade"]),
-                    "grade_letter": g["grade_letter"],
-                    "status": g["status"],
-                    "attendance_rate": float(attendance["attendance_rate"]) * 100 if attendance else 0,
-                    "total_classes": int(attendance["total_classes"]) if attendance else 0,
-                    "attended": int(attendance["attended"]) if attendance else 0
-                })
-        
-        return courses_by_semester
+        return await storage.get_student_courses(student_id)
     except Exception as e:
         print(f"Error getting student courses: {e}")
-        return {}
+        return uncacheable({})
 
 @router.get("/student/{student_id}/assignments")
 async def get_student_assignments(student_id: str):
     """Get assignments and submissions for a student."""
     try:
-        # Get student's courses from grades
-        grades_data = csv_db._read_csv(f"{csv_db.data_dir}/grades_summary.csv")
-        student_courses = list(set(g["course_code"] for g in grades_data if g["student_id"] == student_id))
-        
-        # Get all assignments for student's courses
-        assignments_data = csv_db._read_csv(f"{csv_db.data_dir}/assignments.csv")
-        student_assignments = [a for a in assignments_data if a["course_code"] in student_courses]
-        
-        # Get student's submissions
-        submissions_data = csv_db._read_csv(f"{csv_db.data_dir}/submissions.csv")
-        student_submissions = {s["assignment_id"]: s for s in submissions_data if s["student_id"] == student_id}
-        
-        result = []
-        for assignment in student_assignments:
-            submission = student_submissions.get(assignment["id"])
-            result.append({
-                "id": assignment["id"],
-                "course_code": assignment["course_code"],
-                "course_name": assignment["course_name"],
-                "assignment_title": assignment["assignment_title"],
-                "description": assignment["description"],
-                "max_score": int(assignment["max_score"]),
-                "due_date": assignment["due_date"],
-                "submitted": submission is not None,
-                "submission_id": submission["id"] if submission else None,
-                "ai_score": int(submission["ai_score"]) if submission and submission["ai_score"] else None,
-                "ai_feedback": submission["ai_feedback"] if submission else None,
-                "teacher_verified": submission["teacher_verified"] == "true" if submission else False,
-                "teacher_score": int(submission["teacher_score"]) if submission and submission["teacher_score"] else None,
-                "teacher_feedback": submission["teacher_feedback"] if submission else None,
-                "status": submission["status"] if submission else "not_submitted"
-            })
-        
-        return result
+        return await storage.get_student_assignments(student_id)
     except Exception as e:
         print(f"Error getting student assignments: {e}")
-        return []
+        return uncacheable([])
@@ -15,11 +15,13 @@ from app.core.database import get_db
 from app.api.schemas import (
     DocumentUploadResponse,
     DocumentStatusResponse,
+    DocumentTextResponse,
     RubricParseRequest,
     RubricResponse,
 )
-from app.services.ingestion.id_extractor import IDExtractor
-from app.services.ingestion.rubric_parser import RubricParser
+from app.services.ingestion.document_store import get_document_store
+from app.services.ingestion.rubric_store import get_rubric_store
+from app.services.jobs import get_job_queue
 
 
 router = APIRouter()
@@ -64,12 +66,14 @@ async def upload_document(
     with open(file_path, "wb") as f:
         f.write(content)
     
-    # TODO: Queue processing task (for now, process synchronously)
-    # In production, use Celery or similar for async processing
+    # ID extraction runs as a background job keyed by the batch ID and
+    # writes its result to the document's record
+    await get_document_store().create(str(batch_id), str(file_path), exam_id)
+    job = await get_job_queue().enqueue("process_document", {"file_path": str(file_path)}, job_id=str(batch_id))
     
     return DocumentUploadResponse(
         batch_id=batch_id,
-        status="queued",
+        status=job["status"],
         estimated_time_seconds=30,
         created_at=datetime.utcnow()
     )
@@ -80,43 +84,81 @@ async def get_document_status(
     batch_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get the processing status of an uploaded document."""
-    # Check if file exists
-    upload_dir = Path(settings.upload_dir)
-    matching_files = list(upload_dir.glob(f"{batch_id}.*"))
+    """
+    Get the processing status of an uploaded document.
     
-    if not matching_files:
+    Served from the document's processing record, which the extraction
+    job writes once it finishes; polling never runs OCR.
+    """
+    store = get_document_store()
+    record = await store.get(str(batch_id))
+    if record is None:
+        record = await _backfill_record(str(batch_id))
+    if record is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Batch not found"
         )
     
-    file_path = matching_files[0]
-    
-    # Try to extract ID if not already done
-    try:
-        extractor = IDExtractor()
-        result = extractor.extract(str(file_path))
-        
-        return DocumentStatusResponse(
-            batch_id=batch_id,
-            status="complete",
-            student_id=result.get("student_id"),
-            id_confidence=result.get("confidence"),
-            extraction_method=result.get("method", "ocr"),
-            document_url=str(file_path),
-            processing_time_ms=result.get("processing_time_ms", 0)
-        )
-    except Exception as e:
-        return DocumentStatusResponse(
-            batch_id=batch_id,
-            status="processing",
-            student_id=None,
-            id_confidence=None,
-            extraction_method=None,
-            document_url=str(file_path),
-            processing_time_ms=None
+    return DocumentStatusResponse(
+        batch_id=batch_id,
+        status=record["status"],
+        student_id=record["student_id"],
+        id_confidence=record["confidence"],
+        extraction_method=record["method"],
+        document_url=record["file_path"],
+        processing_time_ms=record["processing_time_ms"],
+        error=record["error"],
+        timings=record["timings"],
+        pages=record["pages"],
+        id_page=record["id_page"]
+    )
+
+
+@router.get("/{batch_id}/text", response_model=DocumentTextResponse)
+async def get_document_text(batch_id: uuid.UUID):
+    """Get the OCR text of all pages of a processed document, for grading."""
+    store = get_document_store()
+    record = await store.get(str(batch_id))
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
         )
+    
+    return DocumentTextResponse(
+        batch_id=batch_id,
+        status=record["status"],
+        student_id=record["student_id"],
+        pages=record["pages"],
+        answer_text=await store.answer_text(str(batch_id)) if record["status"] == "complete" else None
+    )
+
+
+async def _backfill_record(batch_id: str):
+    """
+    Create the record of a document uploaded before records were kept.
+    
+    A finished processing job's outcome is copied into it; a document that
+    was never processed is handed to the job queue like a new upload.
+    """
+    matching_files = list(Path(settings.upload_dir).glob(f"{batch_id}.*"))
+    if not matching_files:
+        return None
+    file_path = str(matching_files[0])
+    
+    store = get_document_store()
+    await store.create(batch_id, file_path)
+    job = await get_job_queue().get(batch_id)
+    if job is None:
+        await get_job_queue().enqueue("process_document", {"file_path": file_path}, job_id=batch_id)
+    elif job["status"] == "completed":
+        await store.start(batch_id, file_path)
+        await store.complete(batch_id, job["result"] or {})
+    elif job["status"] == "dead":
+        await store.fail(batch_id, job["error"] or "Extraction failed")
+    # A job still in progress updates the record itself
+    return await store.get(batch_id)
 
 
 @router.post("/rubrics/parse", response_model=RubricResponse)
@@ -127,22 +169,38 @@ async def parse_rubric(
     """
     Parse a natural language rubric into structured JSON format.
     
-    Uses GPT-4o to convert teacher's rubric text into a machine-readable schema.
+    Uses Gemini to convert teacher's rubric text into a machine-readable schema
+    and stores it as the exam's rubric. A rubric text that was parsed before
+    is reused without another LLM call.
     """
-    parser = RubricParser()
-    
     try:
-        result = parser.parse(request.raw_rubric)
-        
-        return RubricResponse(
-            rubric_id=uuid.uuid4(),
-            total_points=result["total_points"],
-            criteria=result["criteria"],
-            deductions=result.get("deductions", []),
-            parsed_at=datetime.utcnow()
-        )
+        rubric, _ = await get_rubric_store().parse_and_store(request.raw_rubric, str(request.exam_id))
+        return _rubric_response(rubric)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse rubric: {str(e)}"
         )
+
+
+@router.get("/rubrics/{rubric_id}", response_model=RubricResponse)
+async def get_rubric(rubric_id: uuid.UUID):
+    """Get a stored rubric."""
+    rubric = await get_rubric_store().get(str(rubric_id))
+    if rubric is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rubric not found"
+        )
+    return _rubric_response(rubric)
+
+
+def _rubric_response(rubric) -> RubricResponse:
+    """API view of a compiled rubric."""
+    return RubricResponse(
+        rubric_id=rubric.id,
+        total_points=rubric.total_points,
+        criteria=rubric.schema["criteria"],
+        deductions=rubric.schema.get("deductions", []),
+        parsed_at=rubric.created_at
+    )
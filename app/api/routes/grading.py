@@ -3,12 +3,15 @@ Opti-Scholar: Grading Routes
 AI grading, confidence, and feedback endpoints
 """
 
+import json
 import uuid
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.storage import get_storage
 from app.api.schemas import (
     GradeRequest,
     GradeResponse,
@@ -16,28 +19,26 @@ from app.api.schemas import (
     ExplanationResponse,
     CriterionScore,
 )
-from app.services.grading.semantic_scorer import SemanticScorer
-from app.services.grading.confidence import ConfidenceQuantifier
+from app.services.grading.pipeline import get_grading_pipeline
 from app.services.grading.feedback import FeedbackGenerator
+from app.services.grading.submission import queue_submission
+from app.services.jobs import get_job_queue
 
 
+storage = get_storage()
 router = APIRouter()
 
 
-@router.post("/submit")
+@router.post("/submit", status_code=status.HTTP_202_ACCEPTED)
 async def submit_assignment(request: dict):
     """
     Submit a student assignment for AI grading using Gemini API.
     
-    Processes the submission text, generates AI score and feedback using Gemini,
-    and stores it for teacher review.
+    Stores the submission and returns immediately; a background job generates
+    the AI score and feedback with Gemini and records them for teacher review.
+    The job's result (``ai_score``, ``ai_feedback``) is at ``status_url``.
     """
     try:
-        import csv
-        import google.generativeai as genai
-        from pathlib import Path
-        from app.core.config import settings
-        
         # Extract request data
         student_id = request.get("student_id")
         student_name = request.get("student_name")
@@ -74,164 +75,24 @@ async def submit_assignment(request: dict):
                 detail=error_msg
             )
         
-        # Configure Gemini API
-        if not settings.gemini_api_key:
-            print("WARNING: Gemini API key not configured, using fallback grading")
-            # Use fallback grading
-            word_count = len(submission_text.split())
-            if word_count < 50:
-                ai_score = max_score * 0.4
-                ai_feedback = "Submission is too brief. Please provide more detailed explanations."
-                ai_reasoning = "Analysis shows insufficient depth. Word count below minimum threshold."
-            elif word_count < 150:
-                ai_score = max_score * 0.6
-                ai_feedback = "Good start, but could use more detail and examples."
-                ai_reasoning = "Demonstrates basic understanding but lacks depth."
-            elif word_count < 300:
-                ai_score = max_score * 0.8
-                ai_feedback = "Well-written submission with good coverage of the topic."
-                ai_reasoning = "Strong submission demonstrating solid understanding."
-            else:
-                ai_score = max_score * 0.9
-                ai_feedback = "Excellent comprehensive submission with thorough analysis."
-                ai_reasoning = "Exceptional work showing comprehensive understanding."
-        else:
-            try:
-                genai.configure(api_key=settings.gemini_api_key)
-                # Use gemini-2.5-flash which is the latest stable model
-                model = genai.GenerativeModel('gemini-2.5-flash')
-                
-                # Create grading prompt for Gemini
-                grading_prompt = f"""You are an expert academic grader. Grade the following student submission for the assignment "{assignment_title}" in course {course_code}.
-
-Assignment Title: {assignment_title}
-Maximum Score: {max_score}
-Course: {course_code}
-
-Student Submission:
-{submission_text}
-
-Please provide:
-1. A numerical score out of {max_score} (just the number)
-2. Brief feedback (2-3 sentences) highlighting strengths
-3. Detailed reasoning (3-4 sentences) explaining the grade
-
-Format your response EXACTLY as:
-SCORE: [number]
-FEEDBACK: [brief feedback]
-REASONING: [detailed reasoning]
-
-Grading Criteria:
-- Content accuracy and depth (40%)
-- Structure and organization (20%)
-- Technical terminology usage (20%)
-- Examples and explanations (20%)
-
-Be fair but thorough. Consider the academic level and course requirements."""
-
-                # Call Gemini API
-                response = model.generate_content(grading_prompt)
-                ai_response = response.text
-                
-                # Parse the response
-                lines = ai_response.strip().split('\n')
-                ai_score = max_score * 0.7  # Default fallback
-                ai_feedback = "Good submission. Shows understanding of the topic."
-                ai_reasoning = "The submission demonstrates adequate knowledge with room for improvement."
-                
-                for line in lines:
-                    if line.startswith('SCORE:'):
-                        try:
-                            score_text = line.replace('SCORE:', '').strip()
-                            ai_score = float(score_text)
-                        except:
-                            pass
-                    elif line.startswith('FEEDBACK:'):
-                        ai_feedback = line.replace('FEEDBACK:', '').strip()
-                    elif line.startswith('REASONING:'):
-                        ai_reasoning = line.replace('REASONING:', '').strip()
-                
-                # Ensure score is within bounds
-                ai_score = max(0, min(ai_score, max_score))
-                
-            except Exception as e:
-                print(f"Gemini API error: {e}")
-                # Fallback to simple heuristic grading
-                word_count = len(submission_text.split())
-                if word_count < 50:
-                    ai_score = max_score * 0.4
-                    ai_feedback = "Submission is too brief. Please provide more detailed explanations."
-                    ai_reasoning = "Analysis shows insufficient depth. Word count below minimum threshold."
-                elif word_count < 150:
-                    ai_score = max_score * 0.6
-                    ai_feedback = "Good start, but could use more detail and examples."
-                    ai_reasoning = "Demonstrates basic understanding but lacks depth."
-                elif word_count < 300:
-                    ai_score = max_score * 0.8
-                    ai_feedback = "Well-written submission with good coverage of the topic."
-                    ai_reasoning = "Strong submission demonstrating solid understanding."
-                else:
-                    ai_score = max_score * 0.9
-                    ai_feedback = "Excellent comprehensive submission with thorough analysis."
-                    ai_reasoning = "Exceptional work showing comprehensive understanding."
-        
-        # Round to 1 decimal place
-        ai_score = round(ai_score, 1)
-        
-        # Store submission in CSV
-        submissions_file = Path("data_store/submissions.csv")
-        
-        # Read existing submissions
-        submissions = []
-        if submissions_file.exists():
-            with open(submissions_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                submissions = list(reader)
-        
-        # Generate submission ID
-        submission_id = f"s{len(submissions) + 1}"
-        
         # Get student registration number from student_id
         student_reg = student_id.replace('s-', '').replace('-', '')
         
-        # Add new submission
-        new_submission = {
-            "id": submission_id,
+        # Store the submission right away; it is graded in the background
+        queued = await queue_submission(storage, get_job_queue(), {
             "assignment_id": assignment_id,
             "student_id": student_id,
             "student_name": student_name,
             "student_reg": student_reg,
             "course_code": course_code,
-            "submission_text": submission_text[:200],  # Store first 200 chars
-            "file_name": f"{assignment_title.lower().replace(' ', '_')}.txt",
-            "submitted_at": datetime.utcnow().strftime("%Y-%m-%d"),
-            "ai_score": int(ai_score),
-            "ai_feedback": ai_feedback,
-            "ai_reasoning": ai_reasoning,
-            "teacher_verified": "false",
-            "teacher_score": "0",
-            "teacher_feedback": "",
-            "status": "pending_review"
-        }
-        
-        submissions.append(new_submission)
-        
-        # Write back to CSV
-        with open(submissions_file, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = ["id", "assignment_id", "student_id", "student_name", "student_reg",
-                         "course_code", "submission_text", "file_name", "submitted_at", 
-                         "ai_score", "ai_feedback", "ai_reasoning", "teacher_verified",
-                         "teacher_score", "teacher_feedback", "status"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(submissions)
+            "submission_text": submission_text,
+            "file_name": f"{assignment_title.lower().replace(' ', '_')}.txt"
+        }, assignment_title, max_score)
         
         return {
             "success": True,
-            "submission_id": submission_id,
-            "ai_score": int(ai_score),
-            "ai_feedback": ai_feedback,
-            "message": "Assignment submitted successfully and graded by Gemini AI. Awaiting teacher review."
+            **queued,
+            "message": "Assignment submitted successfully. AI grading is in progress; poll status_url for the score."
         }
         
     except HTTPException:
@@ -246,6 +107,30 @@ Be fair but thorough. Consider the academic level and course requirements."""
         )
 
 
+@router.post("/assignments/{assignment_id}/grade-batch", status_code=status.HTTP_202_ACCEPTED)
+async def grade_assignment_batch(assignment_id: str, regrade: bool = False):
+    """
+    Grade every pending submission of an assignment in one background job.
+    
+    Pending means not yet verified by a teacher and without an AI grade:
+    stored but ungraded, or awaiting review with no AI feedback. Submissions
+    whose own grading job is still in progress are left to it. Several
+    answers are packed into each Gemini prompt and chunks run concurrently
+    under the gateway's rate limit; without Gemini the offline heuristic
+    scorer is used. Poll ``/api/v1/jobs/{job_id}`` for progress. With
+    ``regrade=true`` AI-graded submissions awaiting teacher review are
+    graded again.
+    """
+    assignment = await storage.get_assignment(assignment_id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Assignment {assignment_id} not found"
+        )
+    
+    return await get_job_queue().enqueue("grade_batch", {"assignment_id": assignment_id, "regrade": regrade})
+
+
 @router.post("/evaluate", response_model=GradeResponse)
 async def evaluate_answer(
     request: GradeRequest,
@@ -254,31 +139,20 @@ async def evaluate_answer(
     """
     Submit an answer for AI grading.
     
-    Uses GPT-4o for context-aware semantic scoring with partial credit support.
+    Scores the answer locally first and escalates to Gemini (and then to a
+    consistency check) only when confidence is too low; see ``GradingPipeline``.
     Returns detailed breakdown with confidence quantification.
     """
-    scorer = SemanticScorer()
-    confidence_quantifier = ConfidenceQuantifier()
+    pipeline = get_grading_pipeline()
     
     try:
-        # Get grading result
-        grading_result = await scorer.grade(
+        # Get grading result, with confidence and status from the deciding tier
+        grading_result = await pipeline.grade(
             answer_text=request.answer_text,
             rubric_id=str(request.rubric_id),
             context=request.context
         )
         
-        # Calculate confidence
-        confidence = confidence_quantifier.quantify(grading_result)
-        
-        # Determine status based on confidence
-        if confidence >= 0.85:
-            status_val = "auto_approved"
-        elif confidence >= 0.7:
-            status_val = "soft_flagged"
-        else:
-            status_val = "hard_flagged"
-        
         # Convert to response format
         criteria_scores = [
             CriterionScore(
@@ -294,13 +168,19 @@ async def evaluate_answer(
             grade_id=uuid.uuid4(),
             score=grading_result["total_score"],
             max_score=grading_result["max_score"],
-            confidence=confidence,
-            status=status_val,
+            confidence=grading_result["confidence"],
+            status=grading_result["status"],
             criteria_scores=criteria_scores,
             deductions_applied=grading_result.get("deductions", []),
-            graded_at=datetime.utcnow()
+            graded_at=datetime.utcnow(),
+            tier=grading_result["tier"]
         )
         
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -308,6 +188,12 @@ async def evaluate_answer(
         )
 
 
+@router.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Calls and latency per grading tier, and how many grades ended in each status."""
+    return get_grading_pipeline().stats()
+
+
 @router.get("/{grade_id}/feedback", response_model=FeedbackResponse)
 async def get_feedback(
     grade_id: uuid.UUID,
@@ -346,6 +232,38 @@ async def get_feedback(
         )
 
 
+@router.get("/{grade_id}/feedback/stream")
+async def stream_feedback(grade_id: uuid.UUID):
+    """
+    Stream personalized feedback as server-sent events.
+    
+    Sends the summary text as it is written (``summary`` events with a
+    ``delta``), then each ``strength``, ``improvement`` and ``next_step``
+    as soon as the model finishes it, the ``tone``, and a final ``done``
+    event with the same fields as ``GET /{grade_id}/feedback``. A stream the
+    model broke off ends with an ``error`` event holding the partial feedback.
+    """
+    generator = FeedbackGenerator()
+    
+    async def events():
+        # TODO: Fetch actual grade from database (as in get_feedback)
+        async for event, data in generator.stream(
+            grade_id=str(grade_id),
+            score=7.0,
+            max_score=10.0,
+            criteria_breakdown={}
+        ):
+            if event == "done":
+                data = {"grade_id": str(grade_id), **data}
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{grade_id}/explanation", response_model=ExplanationResponse)
 async def get_explanation(
     grade_id: uuid.UUID,
@@ -0,0 +1,50 @@
+"""
+Opti-Scholar: Job Routes
+Status of background jobs (grading, document processing)
+"""
+
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.services.jobs import get_job_queue
+
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get the status of a background job.
+    
+    ``status`` is one of queued, running, retrying, completed or dead (failed
+    after all retries); ``progress`` and ``result`` are job specific.
+    """
+    job = await get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return job
+
+
+@router.get("/jobs")
+async def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """List recent jobs, e.g. ``?status=dead`` for the dead-letter queue."""
+    return await get_job_queue().list_jobs(status=status_filter, limit=limit)
+
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """Re-run a dead-lettered job with a fresh set of attempts."""
+    queue = get_job_queue()
+    if not await queue.requeue(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is not dead-lettered"
+        )
+    return await queue.get(job_id)
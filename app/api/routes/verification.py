@@ -116,8 +116,8 @@ async def check_consistency(
     """
     Run cross-model consistency check.
     
-    Grades the answer through multiple LLMs (GPT-4o and Claude).
-    Flags if the models disagree by more than 10%.
+    Grades the answer with several concurrent samples (temperatures/models).
+    Flags if the samples disagree by more than the acceptable difference.
     """
     checker = ConsistencyChecker()
     
@@ -132,7 +132,10 @@ async def check_consistency(
             model_results=result["model_results"],
             difference=result["difference"],
             max_acceptable_difference=result.get("max_acceptable_difference", 1.0),
-            conflict_resolution=result.get("conflict_resolution")
+            conflict_resolution=result.get("conflict_resolution"),
+            mean=result.get("mean"),
+            spread=result.get("spread"),
+            sample_count=result.get("sample_count")
         )
         
     except Exception as e:
@@ -4,7 +4,7 @@ Pydantic models for request/response validation
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field
 
@@ -125,6 +125,18 @@ class DocumentStatusResponse(BaseModel):
     extraction_method: Optional[str] = None
     document_url: Optional[str] = None
     processing_time_ms: Optional[int] = None
+    error: Optional[str] = None
+    timings: Optional[Dict[str, Optional[float]]] = None
+    pages: Optional[int] = None
+    id_page: Optional[int] = None
+
+
+class DocumentTextResponse(BaseModel):
+    batch_id: UUID
+    status: str
+    student_id: Optional[str] = None
+    pages: Optional[int] = None
+    answer_text: Optional[str] = None
 
 
 # ============================================
@@ -184,6 +196,7 @@ class GradeResponse(BaseModel):
     criteria_scores: List[CriterionScore]
     deductions_applied: List[RubricDeduction]
     graded_at: datetime
+    tier: Optional[str] = None
 
 
 class FeedbackResponse(BaseModel):
@@ -281,6 +294,9 @@ class ConsistencyResponse(BaseModel):
     difference: float
     max_acceptable_difference: float
     conflict_resolution: Optional[str] = None
+    mean: Optional[float] = None
+    spread: Optional[float] = None
+    sample_count: Optional[int] = None
 
 
 # ============================================
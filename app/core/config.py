@@ -4,7 +4,7 @@ Centralized settings management using Pydantic Settings
 """
 
 from functools import lru_cache
-from typing import Optional
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -25,10 +25,57 @@ class Settings(BaseSettings):
     # Database (SQLite for demo, PostgreSQL for production)
     database_url: str = "sqlite+aiosqlite:///./opti_scholar.db"
     
+    # Storage backend for the data API: "csv" (data_store files) or "sqlite"
+    storage_backend: str = "csv"
+    storage_database_url: str = "sqlite+aiosqlite:///./data_store.db"
+    storage_io_threads: int = 4  # Thread pool for CSV backend file I/O
+    response_cache_entries: int = 256  # Server-side cache of data endpoint responses
+    
     # Gemini AI
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.5-flash"
     
+    # LLM gateway (shared by all services): "gemini", "fake" (offline tests) or "none"
+    llm_backend: str = "gemini"
+    llm_max_concurrency: int = 8
+    llm_timeout_seconds: float = 30.0
+    llm_max_retries: int = 3
+    llm_requests_per_minute: float = 60.0
+    
+    # Content-addressed cache of LLM grading results
+    grading_cache_enabled: bool = True
+    grading_cache_path: str = "./grading_cache.db"
+    grading_cache_max_entries: int = 10000
+    grading_cache_ttl_hours: float = 720.0
+    
+    # Batch grading: answers packed into one prompt, up to a prompt size budget
+    batch_answers_per_prompt: int = 5
+    batch_prompt_max_chars: int = 12000
+    
+    # Input token budget of one grading/feedback prompt (long answers are shortened to fit)
+    prompt_max_tokens: int = 8000
+    
+    # Local offline scorer: coverage of rubric terms that earns full credit, and the
+    # answer length below which scores are scaled down
+    local_scorer_full_credit: float = 0.6
+    local_scorer_min_words: int = 50
+    
+    # Feedback reuse: grades in the same score band with the same criteria
+    # pass/fail profile (and course) share generated feedback
+    feedback_cache_enabled: bool = True
+    feedback_cache_path: str = "./feedback_cache.db"
+    feedback_cache_max_entries: int = 5000
+    feedback_cache_ttl_hours: float = 168.0
+    feedback_cache_band_percent: float = 10.0
+    feedback_cache_variants: int = 2
+    
+    # Background job queue (grading, document processing)
+    job_queue_path: str = "./jobs.db"
+    job_workers: int = 4
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 2.0
+    job_lease_seconds: float = 300.0
+    
     # Security
     secret_key: str = "dev-secret-key-change-in-production"
     algorithm: str = "HS256"
@@ -38,12 +85,40 @@ class Settings(BaseSettings):
     upload_dir: str = "./uploads"
     max_file_size_mb: int = 10
     
+    # Processing records of uploaded documents (status, extracted ID, timings)
+    document_store_path: str = "./documents.db"
+    
+    # Compiled rubrics kept in memory for grading
+    rubric_cache_entries: int = 256
+    
+    # data_store journals: fold into the CSV after this many appended records
+    journal_compact_threshold: int = 500
+    
     # Tesseract
     tesseract_cmd: str = "tesseract"
     
+    # OCR worker processes (0 = one per CPU core), documents admitted at once
+    # (0 = 4 per worker) and seconds allowed per document
+    ocr_workers: int = 0
+    ocr_max_pending: int = 0
+    ocr_timeout_seconds: float = 60.0
+    
+    # Multi-page documents: page rendering resolution, ID match confidence that
+    # ends the ID search, and whether every page is OCRed for the answer text
+    ocr_dpi: int = 200
+    ocr_id_confidence: float = 0.9
+    ocr_full_text: bool = True
+    
+    # Consistency check: one concurrent sample per temperature, models assigned in turn
+    consistency_temperatures: List[float] = [0.1, 0.3, 0.5]
+    consistency_models: List[str] = []
+    consistency_min_samples: int = 2
+    
     # Confidence Thresholds
     confidence_auto_approve: float = 0.85
     confidence_hard_flag: float = 0.7
+    # Local (keyword) grades at or above this confidence skip the LLM; between the two thresholds above
+    confidence_local_accept: float = 0.8
     
     # Anomaly Detection
     zscore_threshold: float = 2.5
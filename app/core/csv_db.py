@@ -1,54 +1,107 @@
 import os
-import csv
-from typing import List, Dict, Optional, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Optional, Any, Callable, Tuple
 from app.core.config import settings
 from app.api.schemas import SchoolResponse, StudentUpdate
-import google.generativeai as genai
+from app.core.table_cache import TableCache, CachedTable
+from app.core.write_coordinator import WriteCoordinator, atomic_write_csv
+from app.core.storage import StorageBackend, SUBMISSION_FIELDS, encode_cursor, decode_cursor
 
 DATA_DIR = "data_store"
 
-class CsvService:
-    def __init__(self, data_dir: str = DATA_DIR):
+# Hash indexes built once per table version: {filename pattern: (column, ...)}
+TABLE_INDEXES = {
+    "schools.csv": ("code",),
+    "users.csv": ("email",),
+    "sem_*.csv": ("id", "department"),
+    "teacher_courses.csv": ("teacher_email",),
+    "assignments.csv": ("id", "course_code"),
+    "submissions.csv": ("id", "student_id", "assignment_id", "course_code"),
+    "course_attendance.csv": ("id", "course_code", "student_id"),
+    "attendance_summary.csv": ("student_id", "school_code"),
+    "grades_summary.csv": ("student_id", "course_code"),
+    "risk_assessments.csv": ("student_id", "school_code"),
+}
+
+# Tables written through an append-only journal instead of full rewrites
+JOURNALED_TABLES = ("submissions.csv",)
+
+class CsvService(StorageBackend):
+    """Storage backend over the data_store CSV files."""
+    
+    def __init__(self, data_dir: str = DATA_DIR, io_threads: Optional[int] = None):
+        super().__init__()
         self.data_dir = data_dir
-        # Initialize Gemini AI
-        if settings.gemini_api_key and settings.gemini_api_key != "your-gemini-api-key-here":
-            genai.configure(api_key=settings.gemini_api_key)
-            self.ai_model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.ai_model = None
-
-    def _read_csv(self, path: str) -> List[Dict[str, str]]:
-        if not os.path.exists(path):
-            return []
-        with open(path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            return list(reader)
+        # Parsed tables are kept in memory and revalidated by file mtime/size
+        self.cache = TableCache(indexes=TABLE_INDEXES, journaled=JOURNALED_TABLES)
+        # Per-table write locks (in-process and cross-process) and ID allocation
+        self.writes = WriteCoordinator(data_dir)
+        # File reads, stats and writes run here so they never block the event loop
+        self.io_pool = ThreadPoolExecutor(
+            max_workers=io_threads or settings.storage_io_threads,
+            thread_name_prefix="csv-io"
+        )
+
+    async def _run(self, func: Callable, *args, **kwargs):
+        """Run a blocking file operation on the I/O thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, partial(func, *args, **kwargs))
+
+    async def _read_csv(self, path: str, mutable: bool = False) -> List[Dict[str, str]]:
+        """
+        Read a CSV table through the table cache.
+        
+        The returned rows are shared with the cache; pass ``mutable=True`` to get
+        private copies that can be modified before writing them back.
+        """
+        rows = await self._run(self.cache.rows, path)
+        if mutable:
+            return [dict(r) for r in rows]
+        return rows
+
+    async def _table(self, name: str) -> CachedTable:
+        """Cached table for a file under the data directory, e.g. ``"submissions.csv"``."""
+        return await self._run(self.cache.get, f"{self.data_dir}/{name}")
+
+    async def _lookup(self, name: str, column: str, value: str) -> List[Dict[str, str]]:
+        """Rows of ``name`` whose ``column`` equals ``value``, via the table's hash index."""
+        return (await self._table(name)).lookup(column, value)
+
+    async def _lookup_one(self, name: str, column: str, value: str) -> Optional[Dict[str, str]]:
+        """First row of ``name`` whose ``column`` equals ``value``, or None."""
+        return (await self._table(name)).first(column, value)
+
+    async def _list_dir(self, path: str) -> List[str]:
+        """List a directory (sorted), cached until its mtime changes."""
+        return await self._run(self.cache.listdir, path)
 
     def _write_csv(self, path: str, fieldnames: List[str], rows: List[Dict[str, Any]]):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+        """
+        Atomically replace a table (temp file + rename). Callers hold its write
+        lock and run this on the I/O pool.
+        """
+        atomic_write_csv(path, fieldnames, rows)
+        self.cache.invalidate(path)
+
+    async def data_version(self) -> Optional[Tuple[str, float]]:
+        """
+        Version token from the signatures of the tables and journals read so far.
+        
+        File signatures rather than in-memory table versions are used so
+        worker processes that have read the same tables derive the same
+        token for the same data (see ``TableCache.signature``).
+        """
+        return await self._run(self.cache.signature)
+
+    def _table_key(self, path: str) -> str:
+        """Lock name of a table: its path relative to the data directory."""
+        return os.path.relpath(path, self.data_dir).replace(os.sep, "/")
 
     async def get_stats(self) -> Dict[str, Any]:
         """Aggregate stats from all schools."""
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
-        total_students = 0
-        total_courses = 0
-        
-        for school in schools:
-            # Count courses
-            courses = self._read_csv(f"{self.data_dir}/{school['code']}/courses.csv")
-            total_courses += len(courses)
-            
-            # Count students across all semesters
-            school_students_dir = f"{self.data_dir}/{school['code']}/students"
-            if os.path.exists(school_students_dir):
-                for f in os.listdir(school_students_dir):
-                    if f.endswith(".csv"):
-                        students = self._read_csv(f"{school_students_dir}/{f}")
-                        total_students += len(students)
+        total_students = sum((await self._run(self._student_counts)).values())
 
         return {
             "total_students": total_students,
@@ -59,12 +112,12 @@ class CsvService:
         }
 
     async def get_schools(self) -> List[Dict]:
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
+        schools = await self._read_csv(f"{self.data_dir}/schools.csv")
         result = []
         for s in schools:
             # Enrich with counts
-            courses = self._read_csv(f"{self.data_dir}/{s['code']}/courses.csv")
-            depts = self._read_csv(f"{self.data_dir}/{s['code']}/departments.csv")
+            courses = await self._read_csv(f"{self.data_dir}/{s['code']}/courses.csv")
+            depts = await self._read_csv(f"{self.data_dir}/{s['code']}/departments.csv")
             
             school_data = {
                 "id": s["id"],
@@ -78,37 +131,35 @@ class CsvService:
         return result
 
     async def get_school_details(self, code: str) -> Optional[Dict]:
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
-        school_info = next((s for s in schools if s["code"] == code), None)
+        school_info = await self._lookup_one("schools.csv", "code", code)
         if not school_info:
             return None
 
         # Director info
-        info = self._read_csv(f"{self.data_dir}/{code}/info.csv")
+        info = await self._read_csv(f"{self.data_dir}/{code}/info.csv")
         info_dict = {row["key"]: row["value"] for row in info}
         
         # Group students
         students_by_semester = {}
         students_dir = f"{self.data_dir}/{code}/students"
-        if os.path.exists(students_dir):
-            for fname in os.listdir(students_dir):
-                if fname.startswith("sem_") and fname.endswith(".csv"):
-                    sem_num = fname.replace("sem_", "").replace(".csv", "")
-                    sem_key = f"Semester {sem_num}"
-                    
-                    rows = self._read_csv(f"{students_dir}/{fname}")
-                    # Format for frontend
-                    formatted_rows = []
-                    for r in rows:
-                        formatted_rows.append({
-                            "id": r["id"],
-                            "name": r["name"],
-                            "reg": r["registration_number"],
-                            "course": r["department"], # Simplified
-                            "email": r["email"],
-                            "phone": r.get("phone", "")
-                        })
-                    students_by_semester[sem_key] = formatted_rows
+        for fname in await self._list_dir(students_dir):
+            if fname.startswith("sem_") and fname.endswith(".csv"):
+                sem_num = fname.replace("sem_", "").replace(".csv", "")
+                sem_key = f"Semester {sem_num}"
+                
+                rows = await self._read_csv(f"{students_dir}/{fname}")
+                # Format for frontend
+                formatted_rows = []
+                for r in rows:
+                    formatted_rows.append({
+                        "id": r["id"],
+                        "name": r["name"],
+                        "reg": r["registration_number"],
+                        "course": r["department"], # Simplified
+                        "email": r["email"],
+                        "phone": r.get("phone", "")
+                    })
+                students_by_semester[sem_key] = formatted_rows
 
         return {
             "name": school_info["name"],
@@ -118,41 +169,99 @@ class CsvService:
             "students_by_semester": students_by_semester
         }
 
-    async def get_all_students(self, limit: int = 100) -> List[Dict]:
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
-        all_students = []
+    async def get_students_page(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        school: Optional[str] = None,
+        department: Optional[str] = None,
+        semester: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """One page of students in (school, semester, file row) order; see ``StorageBackend``."""
+        after = decode_cursor(cursor) if cursor else None
+        students, last = await self._run(self._student_page, limit, offset, after, school, department, semester)
+        return {
+            "students": students,
+            "next_cursor": encode_cursor(*last) if last else None
+        }
+
+    def _student_page(
+        self,
+        limit: int,
+        offset: int,
+        after: Optional[Dict[str, Any]],
+        school: Optional[str],
+        department: Optional[str],
+        semester: Optional[int]
+    ) -> Tuple[List[Dict], Optional[Tuple[str, int, int]]]:
+        """
+        Collect a page of students (runs on the I/O pool).
+        
+        Filters skip whole semester files, and the department filter probes the
+        file's hash index, so the offset is consumed a file at a time instead of
+        a row at a time.
+        
+        Returns:
+            Tuple of (students, (school, semester, position) of the last one if the page is full)
+        """
+        school_order = {s["code"]: i for i, s in enumerate(self.cache.rows(f"{self.data_dir}/schools.csv"))}
+        if after is not None:
+            if after["school"] not in school_order:
+                raise ValueError(f"Invalid cursor: unknown school {after['school']}")
+            after_key = (school_order[after["school"]], after["semester"])
+        
+        students = []
+        for code, sem, table in self._student_tables():
+            if (school and code != school) or (semester is not None and sem != semester):
+                continue
+            
+            rows = table.lookup("department", department) if department else table.rows
+            if after is not None:
+                key = (school_order[code], sem)
+                if key < after_key:
+                    continue
+                if key == after_key:
+                    rows = [r for r in rows if table.position(r) > after["position"]]
+            
+            if offset >= len(rows):
+                offset -= len(rows)
+                continue
+            
+            taken = rows[offset:offset + limit - len(students)]
+            offset = 0
+            students.extend(self._student_item(r, sem) for r in taken)
+            if len(students) >= limit:
+                return students, (code, sem, table.position(taken[-1]))
         
-        for s in schools:
-            students_dir = f"{self.data_dir}/{s['code']}/students"
-            if os.path.exists(students_dir):
-                for fname in os.listdir(students_dir):
-                    sem_num = fname.replace("sem_", "").replace(".csv", "")
-                    rows = self._read_csv(f"{students_dir}/{fname}")
-                    for r in rows:
-                        all_students.append({
-                            "id": r["id"],
-                            "registration_number": r["registration_number"],
-                            "name": r["name"],
-                            "email": r["email"],
-                            "department": r["department"],
-                            "current_semester": int(sem_num)
-                        })
-                        if len(all_students) >= limit:
-                            return all_students
-        return all_students
+        return students, None
+
+    @staticmethod
+    def _student_item(row: Dict[str, str], semester: int) -> Dict:
+        """Student row formatted for the API."""
+        return {
+            "id": row["id"],
+            "registration_number": row["registration_number"],
+            "name": row["name"],
+            "email": row["email"],
+            "department": row["department"],
+            "current_semester": semester
+        }
 
     async def update_student(self, student_id: str, updates: StudentUpdate) -> bool:
         # We need to find the student across all files. This is inefficient but fine for minimal CSV DB.
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
+        schools = await self._read_csv(f"{self.data_dir}/schools.csv")
         
         for s in schools:
             students_dir = f"{self.data_dir}/{s['code']}/students"
-            if os.path.exists(students_dir):
-                for fname in os.listdir(students_dir):
-                    path = f"{students_dir}/{fname}"
-                    rows = self._read_csv(path)
-                    
-                    updated = False
+            for fname in await self._list_dir(students_dir):
+                path = f"{students_dir}/{fname}"
+                if not (await self._run(self.cache.get, path)).first("id", student_id):
+                    continue
+                
+                async with self.writes.lock(self._table_key(path)):
+                    # Re-read under the lock so concurrent edits are not lost
+                    rows = await self._read_csv(path, mutable=True)
                     for i, row in enumerate(rows):
                         if row["id"] == student_id:
                             # Apply updates
@@ -163,34 +272,46 @@ class CsvService:
                                 # Move to new semester file? For now just update field if we supported it in CSV
                                 pass 
                             rows[i] = row
-                            updated = True
                             break
                     
-                    if updated:
-                        # Write back
-                        fieldnames = ["id", "registration_number", "name", "email", "department", "phone"]
-                        self._write_csv(path, fieldnames, rows)
-                        return True
+                    # Write back
+                    fieldnames = ["id", "registration_number", "name", "email", "department", "phone"]
+                    await self._run(self._write_csv, path, fieldnames, rows)
+                return True
         return False
         
+    # ============================================
+    # Materialized aggregates
+    # ============================================
+    # Analytics are built from per-table aggregates memoized on each cached
+    # table version (CachedTable.derive), so a change to one file only
+    # recomputes that file's share and the endpoints merge a handful of
+    # precomputed partials instead of scanning every student row.
+
+    def _student_tables(self) -> List[Tuple[str, int, CachedTable]]:
+        """(school code, semester, table) for every student file, in school and semester order (runs on the I/O pool)."""
+        result = []
+        for school in self.cache.rows(f"{self.data_dir}/schools.csv"):
+            students_dir = f"{self.data_dir}/{school['code']}/students"
+            files = []
+            for fname in self.cache.listdir(students_dir):
+                if fname.startswith("sem_") and fname.endswith(".csv"):
+                    files.append((int(fname[len("sem_"):-len(".csv")]), fname))
+            for sem, fname in sorted(files):
+                result.append((school["code"], sem, self.cache.get(f"{students_dir}/{fname}")))
+        return result
+
+    def _student_counts(self) -> Dict[str, int]:
+        """Number of students per school code, in schools.csv order (runs on the I/O pool)."""
+        counts = {s["code"]: 0 for s in self.cache.rows(f"{self.data_dir}/schools.csv")}
+        for code, _, table in self._student_tables():
+            counts[code] += len(table.rows)
+        return counts
+
     async def get_admin_analytics(self):
-        # Calculate real stats
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
-        dept_dist = {}
-        enrollment_trend = [100, 110, 105, 120, 130, 140, 0] # Last one dynamic
-        total_students = 0
-        
-        for s in schools:
-            count = 0
-            students_dir = f"{self.data_dir}/{s['code']}/students"
-            if os.path.exists(students_dir):
-                for fname in os.listdir(students_dir):
-                    rows = self._read_csv(f"{students_dir}/{fname}")
-                    count += len(rows)
-            dept_dist[s['code']] = count
-            total_students += count
-            
-        enrollment_trend[-1] = total_students
+        dept_dist = await self._run(self._student_counts)
+        total_students = sum(dept_dist.values())
+        enrollment_trend = [100, 110, 105, 120, 130, 140, total_students] # Last one dynamic
         
         return {
             "enrollment_trend": enrollment_trend,
@@ -201,68 +322,65 @@ class CsvService:
         }
 
     async def get_user_by_email(self, email: str) -> Optional[Dict]:
-        users = self._read_csv(f"{self.data_dir}/users.csv")
-        for u in users:
-            if u["email"] == email:
-                return u
-        return None
+        return await self._lookup_one("users.csv", "email", email)
 
     async def get_teacher_courses(self, teacher_email: str) -> List[Dict]:
         """Get courses taught by a specific teacher."""
-        teacher_courses = self._read_csv(f"{self.data_dir}/teacher_courses.csv")
         courses = []
-        for tc in teacher_courses:
-            if tc["teacher_email"] == teacher_email:
-                courses.append({
-                    "course_id": tc["course_id"],
-                    "course_code": tc["course_code"],
-                    "course_name": tc["course_name"],
-                    "school_code": tc["school_code"],
-                    "semester": int(tc["semester"]),
-                    "total_students": int(tc["total_students"]),
-                    "credits": int(tc["credits"])
-                })
+        for tc in await self._lookup("teacher_courses.csv", "teacher_email", teacher_email):
+            courses.append({
+                "course_id": tc["course_id"],
+                "course_code": tc["course_code"],
+                "course_name": tc["course_name"],
+                "school_code": tc["school_code"],
+                "semester": int(tc["semester"]),
+                "total_students": int(tc["total_students"]),
+                "credits": int(tc["credits"])
+            })
         return courses
 
     async def get_course_attendance(self, course_code: str) -> List[Dict]:
         """Get attendance records for a specific course."""
-        attendance_data = self._read_csv(f"{self.data_dir}/course_attendance.csv")
         records = []
-        for record in attendance_data:
-            if record["course_code"] == course_code:
-                records.append({
-                    "id": record["id"],
-                    "student_id": record["student_id"],
-                    "student_name": record["student_name"],
-                    "student_reg": record["student_reg"],
-                    "total_classes": int(record["total_classes"]),
-                    "attended": int(record["attended"]),
-                    "attendance_rate": float(record["attendance_rate"]),
-                    "last_updated": record["last_updated"]
-                })
+        for record in await self._lookup("course_attendance.csv", "course_code", course_code):
+            records.append({
+                "id": record["id"],
+                "student_id": record["student_id"],
+                "student_name": record["student_name"],
+                "student_reg": record["student_reg"],
+                "total_classes": int(record["total_classes"]),
+                "attended": int(record["attended"]),
+                "attendance_rate": float(record["attendance_rate"]),
+                "last_updated": record["last_updated"]
+            })
         return records
 
     async def update_course_attendance(self, attendance_id: str, attended: int) -> bool:
         """Update attendance for a student in a course."""
         path = f"{self.data_dir}/course_attendance.csv"
-        rows = self._read_csv(path)
-        
-        updated = False
-        for i, row in enumerate(rows):
-            if row["id"] == attendance_id:
-                row["attended"] = str(attended)
-                total = int(row["total_classes"])
-                row["attendance_rate"] = str(round(attended / total, 2))
-                row["last_updated"] = "2024-01-25"
-                rows[i] = row
-                updated = True
-                break
+        if not await self._lookup_one("course_attendance.csv", "id", attendance_id):
+            return False
         
-        if updated:
-            fieldnames = ["id", "course_code", "course_name", "student_id", "student_name", 
-                         "student_reg", "total_classes", "attended", "attendance_rate", "last_updated"]
-            self._write_csv(path, fieldnames, rows)
-            return True
+        async with self.writes.lock("course_attendance.csv"):
+            # Re-read under the lock so concurrent edits are not lost
+            rows = await self._read_csv(path, mutable=True)
+            
+            updated = False
+            for i, row in enumerate(rows):
+                if row["id"] == attendance_id:
+                    row["attended"] = str(attended)
+                    total = int(row["total_classes"])
+                    row["attendance_rate"] = str(round(attended / total, 2))
+                    row["last_updated"] = "2024-01-25"
+                    rows[i] = row
+                    updated = True
+                    break
+            
+            if updated:
+                fieldnames = ["id", "course_code", "course_name", "student_id", "student_name", 
+                             "student_reg", "total_classes", "attended", "attendance_rate", "last_updated"]
+                await self._run(self._write_csv, path, fieldnames, rows)
+                return True
         return False
 
     async def get_teacher_stats(self, teacher_email: str) -> Dict:
@@ -283,12 +401,12 @@ class CsvService:
             avg_attendance = round(sum(a["attendance_rate"] for a in all_attendance) / len(all_attendance) * 100, 1)
         
         # Count at-risk students in teacher's courses
-        risk_data = self._read_csv(f"{self.data_dir}/risk_assessments.csv")
         at_risk_count = 0
-        student_ids = [a["student_id"] for a in all_attendance]
-        for risk in risk_data:
-            if risk["student_id"] in student_ids and risk["risk_level"] in ["high", "critical"]:
-                at_risk_count += 1
+        student_ids = {a["student_id"] for a in all_attendance}
+        for student_id in student_ids:
+            for risk in await self._lookup("risk_assessments.csv", "student_id", student_id):
+                if risk["risk_level"] in ["high", "critical"]:
+                    at_risk_count += 1
         
         return {
             "total_students": total_students,
@@ -299,198 +417,138 @@ class CsvService:
 
     async def get_course_assignments(self, course_code: str) -> List[Dict]:
         """Get assignments for a specific course."""
-        assignments = self._read_csv(f"{self.data_dir}/assignments.csv")
         result = []
-        for a in assignments:
-            if a["course_code"] == course_code:
-                # Count submissions
-                submissions = self._read_csv(f"{self.data_dir}/submissions.csv")
-                submission_count = sum(1 for s in submissions if s["assignment_id"] == a["id"])
-                pending_count = sum(1 for s in submissions if s["assignment_id"] == a["id"] and s["status"] == "pending_review")
-                
-                result.append({
-                    "id": a["id"],
-                    "assignment_title": a["assignment_title"],
-                    "description": a["description"],
-                    "max_score": int(a["max_score"]),
-                    "due_date": a["due_date"],
-                    "submission_count": submission_count,
-                    "pending_review": pending_count
-                })
+        for a in await self._lookup("assignments.csv", "course_code", course_code):
+            # Count submissions
+            submissions = await self._lookup("submissions.csv", "assignment_id", a["id"])
+            submission_count = len(submissions)
+            pending_count = sum(1 for s in submissions if s["status"] == "pending_review")
+            
+            result.append({
+                "id": a["id"],
+                "assignment_title": a["assignment_title"],
+                "description": a["description"],
+                "max_score": int(a["max_score"]),
+                "due_date": a["due_date"],
+                "submission_count": submission_count,
+                "pending_review": pending_count
+            })
         return result
 
     async def get_assignment_submissions(self, assignment_id: str) -> List[Dict]:
         """Get all submissions for an assignment."""
-        submissions = self._read_csv(f"{self.data_dir}/submissions.csv")
         result = []
-        for s in submissions:
-            if s["assignment_id"] == assignment_id:
-                result.append({
-                    "id": s["id"],
-                    "student_id": s["student_id"],
-                    "student_name": s["student_name"],
-                    "student_reg": s["student_reg"],
-                    "submission_text": s["submission_text"],
-                    "file_name": s["file_name"],
-                    "submitted_at": s["submitted_at"],
-                    "ai_score": int(s["ai_score"]) if s["ai_score"] else 0,
-                    "ai_feedback": s["ai_feedback"],
-                    "ai_reasoning": s["ai_reasoning"],
-                    "teacher_verified": s["teacher_verified"] == "true",
-                    "teacher_score": int(s["teacher_score"]) if s["teacher_score"] else 0,
-                    "teacher_feedback": s["teacher_feedback"],
-                    "status": s["status"]
-                })
+        for s in await self._lookup("submissions.csv", "assignment_id", assignment_id):
+            result.append({
+                "id": s["id"],
+                "student_id": s["student_id"],
+                "student_name": s["student_name"],
+                "student_reg": s["student_reg"],
+                "submission_text": s["submission_text"],
+                "file_name": s["file_name"],
+                "submitted_at": s["submitted_at"],
+                "ai_score": int(s["ai_score"]) if s["ai_score"] else 0,
+                "ai_feedback": s["ai_feedback"],
+                "ai_reasoning": s["ai_reasoning"],
+                "teacher_verified": s["teacher_verified"] == "true",
+                "teacher_score": int(s["teacher_score"]) if s["teacher_score"] else 0,
+                "teacher_feedback": s["teacher_feedback"],
+                "status": s["status"]
+            })
         return result
 
-    async def grade_submission_with_ai(self, submission_text: str, assignment_description: str, max_score: int) -> Dict:
-        """Use Gemini AI to grade a submission."""
-        if not self.ai_model:
-            # Fallback to mock grading if API key not configured
-            return {
-                "score": 75,
-                "feedback": "AI grading not configured. Please add Gemini API key.",
-                "reasoning": "This is a mock grade. Configure Gemini API for real AI grading."
-            }
-        
-        try:
-            prompt = f"""You are an expert academic grader. Grade the following student submission.
-
-Assignment Description: {assignment_description}
-Maximum Score: {max_score}
-
-Student Submission:
-{submission_text}
-
-Provide your grading in the following format:
-SCORE: [number out of {max_score}]
-FEEDBACK: [brief feedback for the student, 1-2 sentences]
-REASONING: [detailed reasoning for the grade, explaining strengths and weaknesses, 2-3 sentences]
+    async def get_assignment(self, assignment_id: str) -> Optional[Dict]:
+        """Get a raw assignment row by ID."""
+        return await self._lookup_one("assignments.csv", "id", assignment_id)
 
-Be fair, constructive, and specific in your evaluation."""
-
-            response = self.ai_model.generate_content(prompt)
-            result_text = response.text
-            
-            # Parse the response
-            score = 0
-            feedback = ""
-            reasoning = ""
+    async def verify_submission(self, submission_id: str, teacher_score: int, 
+                                teacher_feedback: str, approved: bool) -> bool:
+        """Teacher verifies and approves/modifies AI grading."""
+        async with self.writes.lock("submissions.csv"):
+            if not await self._lookup_one("submissions.csv", "id", submission_id):
+                return False
             
-            lines = result_text.split('\n')
-            for line in lines:
-                if line.startswith('SCORE:'):
-                    score_text = line.replace('SCORE:', '').strip()
-                    # Extract number from text
-                    import re
-                    numbers = re.findall(r'\d+', score_text)
-                    if numbers:
-                        score = min(int(numbers[0]), max_score)
-                elif line.startswith('FEEDBACK:'):
-                    feedback = line.replace('FEEDBACK:', '').strip()
-                elif line.startswith('REASONING:'):
-                    reasoning = line.replace('REASONING:', '').strip()
+            # Status change is recorded as a delta, not a rewrite of submissions.csv
+            await self._run(self._update_submission, submission_id, {
+                "teacher_verified": "true",
+                "teacher_score": str(teacher_score),
+                "teacher_feedback": teacher_feedback,
+                "status": "approved" if approved else "needs_revision"
+            })
+        return True
+
+    async def update_submissions(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Apply field updates to many submissions with a single journal append.
+        
+        Args:
+            updates: Submission ID -> fields to set; unknown IDs are skipped
             
-            # If parsing failed, use the whole response as reasoning
-            if not feedback and not reasoning:
-                reasoning = result_text
-                score = int(max_score * 0.75)  # Default to 75%
-                feedback = "Please review the detailed reasoning below."
+        Returns:
+            Number of submissions updated
+        """
+        async with self.writes.lock("submissions.csv"):
+            table = await self._table("submissions.csv")
+            known = {sid: fields for sid, fields in updates.items() if table.first("id", sid)}
+            if known:
+                await self._run(self._update_submissions, known)
+        return len(known)
+
+    async def add_submission(self, submission: Dict[str, Any]) -> str:
+        """
+        Store a new submission with a single append to the submissions journal.
+        
+        Args:
+            submission: Submission fields (``id`` is assigned here)
             
-            return {
-                "score": score,
-                "feedback": feedback,
-                "reasoning": reasoning
-            }
-        except Exception as e:
-            print(f"AI grading error: {e}")
-            return {
-                "score": 0,
-                "feedback": "AI grading failed. Please grade manually.",
-                "reasoning": f"Error: {str(e)}"
-            }
+        Returns:
+            The new submission ID
+        """
+        path = f"{self.data_dir}/submissions.csv"
+        row = {field: submission.get(field, "") for field in SUBMISSION_FIELDS}
+        
+        async with self.writes.lock("submissions.csv"):
+            return await self._run(self._insert_submission, path, row)
 
-    async def submit_assignment(self, assignment_id: str, student_id: str, student_name: str, 
-                               student_reg: str, course_code: str, submission_text: str, 
-                               file_name: str) -> Dict:
-        """Submit an assignment and get AI grading."""
-        # Get assignment details
-        assignments = self._read_csv(f"{self.data_dir}/assignments.csv")
-        assignment = next((a for a in assignments if a["id"] == assignment_id), None)
-        
-        if not assignment:
-            return {"error": "Assignment not found"}
-        
-        # Grade with AI
-        ai_result = await self.grade_submission_with_ai(
-            submission_text, 
-            assignment["description"], 
-            int(assignment["max_score"])
+    def _insert_submission(self, path: str, row: Dict[str, Any]) -> str:
+        """Allocate an ID and journal a new submission (caller holds the table lock; runs on the I/O pool)."""
+        submission_id = self.writes.next_id(
+            "submissions.csv", "s", lambda: (r["id"] for r in self.cache.rows(path))
         )
-        
-        # Create submission record
-        submissions = self._read_csv(f"{self.data_dir}/submissions.csv")
-        submission_id = f"s{len(submissions) + 1}"
-        
-        new_submission = {
-            "id": submission_id,
-            "assignment_id": assignment_id,
-            "student_id": student_id,
-            "student_name": student_name,
-            "student_reg": student_reg,
-            "course_code": course_code,
-            "submission_text": submission_text,
-            "file_name": file_name,
-            "submitted_at": "2024-01-26",
-            "ai_score": str(ai_result["score"]),
-            "ai_feedback": ai_result["feedback"],
-            "ai_reasoning": ai_result["reasoning"],
-            "teacher_verified": "false",
-            "teacher_score": "0",
-            "teacher_feedback": "",
-            "status": "pending_review"
-        }
-        
-        submissions.append(new_submission)
-        
-        fieldnames = ["id", "assignment_id", "student_id", "student_name", "student_reg", 
-                     "course_code", "submission_text", "file_name", "submitted_at", 
-                     "ai_score", "ai_feedback", "ai_reasoning", "teacher_verified", 
-                     "teacher_score", "teacher_feedback", "status"]
-        self._write_csv(f"{self.data_dir}/submissions.csv", fieldnames, submissions)
-        
-        return {
-            "submission_id": submission_id,
-            "ai_score": ai_result["score"],
-            "ai_feedback": ai_result["feedback"],
-            "status": "pending_review"
-        }
+        row["id"] = submission_id
+        self.cache.journal(path).insert(row)
+        self._maybe_compact(path, SUBMISSION_FIELDS)
+        return submission_id
 
-    async def verify_submission(self, submission_id: str, teacher_score: int, 
-                                teacher_feedback: str, approved: bool) -> bool:
-        """Teacher verifies and approves/modifies AI grading."""
+    def _update_submission(self, submission_id: str, fields: Dict[str, Any]):
+        """Append a delta record for an existing submission (caller holds the table lock; runs on the I/O pool)."""
         path = f"{self.data_dir}/submissions.csv"
-        submissions = self._read_csv(path)
-        
-        updated = False
-        for i, sub in enumerate(submissions):
-            if sub["id"] == submission_id:
-                sub["teacher_verified"] = "true"
-                sub["teacher_score"] = str(teacher_score)
-                sub["teacher_feedback"] = teacher_feedback
-                sub["status"] = "approved" if approved else "needs_revision"
-                submissions[i] = sub
-                updated = True
-                break
-        
-        if updated:
-            fieldnames = ["id", "assignment_id", "student_id", "student_name", "student_reg", 
-                         "course_code", "submission_text", "file_name", "submitted_at", 
-                         "ai_score", "ai_feedback", "ai_reasoning", "teacher_verified", 
-                         "teacher_score", "teacher_feedback", "status"]
-            self._write_csv(path, fieldnames, submissions)
-            return True
-        return False
+        self.cache.journal(path).update(submission_id, fields)
+        self._maybe_compact(path, SUBMISSION_FIELDS)
+
+    def _update_submissions(self, updates: Dict[str, Dict[str, Any]]):
+        """Append delta records for several submissions in one write (caller holds the table lock; runs on the I/O pool)."""
+        path = f"{self.data_dir}/submissions.csv"
+        self.cache.journal(path).update_many(updates)
+        self._maybe_compact(path, SUBMISSION_FIELDS)
+
+    def _maybe_compact(self, path: str, fieldnames: List[str]):
+        """Fold the journal into the base CSV once it holds enough records (caller holds the lock)."""
+        if self.cache.get(path).journal_records >= settings.journal_compact_threshold:
+            self.compact_table(path, fieldnames)
+
+    def compact_table(self, path: str, fieldnames: List[str]):
+        """
+        Rewrite a journaled table as a plain CSV and truncate its journal.
+        Callers hold the table's write lock.
+        
+        Replay is idempotent, so a reader that sees the new CSV together with
+        the old journal still gets the same rows.
+        """
+        rows = self.cache.get(path).rows
+        self._write_csv(path, fieldnames, rows)
+        self.cache.journal(path).truncate()
+        self.cache.invalidate(path)
 
     async def get_grading_stats(self, teacher_email: str) -> Dict:
         """Get grading statistics for teacher dashboard."""
@@ -499,8 +557,9 @@ Be fair, constructive, and specific in your evaluation."""
         course_codes = [c["course_code"] for c in courses]
         
         # Get all submissions for teacher's courses
-        submissions = self._read_csv(f"{self.data_dir}/submissions.csv")
-        teacher_submissions = [s for s in submissions if s["course_code"] in course_codes]
+        teacher_submissions = []
+        for code in course_codes:
+            teacher_submissions.extend(await self._lookup("submissions.csv", "course_code", code))
         
         total_submissions = len(teacher_submissions)
         pending_review = sum(1 for s in teacher_submissions if s["status"] == "pending_review")
@@ -525,7 +584,7 @@ Be fair, constructive, and specific in your evaluation."""
 
     async def get_risk_students(self) -> List[Dict]:
         """Get all at-risk students from risk assessments."""
-        risk_data = self._read_csv(f"{self.data_dir}/risk_assessments.csv")
+        risk_data = await self._read_csv(f"{self.data_dir}/risk_assessments.csv")
         result = []
         for r in risk_data:
             result.append({
@@ -547,52 +606,57 @@ Be fair, constructive, and specific in your evaluation."""
 
     async def get_risk_counts(self) -> Dict:
         """Get count of students by risk level."""
-        risk_data = self._read_csv(f"{self.data_dir}/risk_assessments.csv")
+        risk_table = await self._table("risk_assessments.csv")
+        return dict(await self._run(risk_table.derive, "risk_counts", self._count_risk_levels))
+
+    @staticmethod
+    def _count_risk_levels(table: CachedTable) -> Dict[str, int]:
+        """Risk level counts of one risk_assessments.csv version."""
         counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
-        
-        for r in risk_data:
+        for r in table.rows:
             level = r["risk_level"].lower()
             if level in counts:
                 counts[level] += 1
-        
         return counts
 
     async def get_attendance_stats(self) -> Dict:
         """Get attendance statistics."""
-        attendance_data = self._read_csv(f"{self.data_dir}/attendance_summary.csv")
+        attendance_table = await self._table("attendance_summary.csv")
+        summary = await self._run(attendance_table.derive, "attendance_stats", self._summarize_attendance)
         
         # Get actual total students from all schools
-        schools = self._read_csv(f"{self.data_dir}/schools.csv")
-        actual_total_students = 0
-        for school in schools:
-            students_dir = f"{self.data_dir}/{school['code']}/students"
-            if os.path.exists(students_dir):
-                for fname in os.listdir(students_dir):
-                    if fname.endswith('.csv'):
-                        students = self._read_csv(f"{students_dir}/{fname}")
-                        actual_total_students += len(students)
-        
-        # Calculate attendance stats from attendance_summary.csv
-        students_with_attendance = len(attendance_data)
-        total_attendance = sum(float(r["attendance_rate"]) for r in attendance_data)
-        avg_attendance = (total_attendance / students_with_attendance * 100) if students_with_attendance > 0 else 0
-        
-        # Count by attendance ranges
-        excellent = sum(1 for r in attendance_data if float(r["attendance_rate"]) >= 0.90)
-        good = sum(1 for r in attendance_data if 0.75 <= float(r["attendance_rate"]) < 0.90)
-        poor = sum(1 for r in attendance_data if float(r["attendance_rate"]) < 0.75)
+        actual_total_students = sum((await self._run(self._student_counts)).values())
         
         return {
-            "average_attendance": round(avg_attendance, 1),
+            "average_attendance": summary["average_attendance"],
             "total_students": actual_total_students,  # Use actual total from all schools
-            "students_with_attendance": students_with_attendance,  # Students with attendance records
-            "excellent_attendance": excellent,
-            "good_attendance": good,
-            "poor_attendance": poor,
-            "by_school": self._get_attendance_by_school(attendance_data)
+            "students_with_attendance": summary["students_with_attendance"],  # Students with attendance records
+            "excellent_attendance": summary["excellent_attendance"],
+            "good_attendance": summary["good_attendance"],
+            "poor_attendance": summary["poor_attendance"],
+            "by_school": {code: dict(stats) for code, stats in summary["by_school"].items()}
         }
 
-    def _get_attendance_by_school(self, attendance_data: List[Dict]) -> Dict:
+    @classmethod
+    def _summarize_attendance(cls, table: CachedTable) -> Dict:
+        """Attendance aggregates of one attendance_summary.csv version."""
+        attendance_data = table.rows
+        rates = [float(r["attendance_rate"]) for r in attendance_data]
+        
+        students_with_attendance = len(rates)
+        avg_attendance = (sum(rates) / students_with_attendance * 100) if students_with_attendance > 0 else 0
+        
+        return {
+            "average_attendance": round(avg_attendance, 1),
+            "students_with_attendance": students_with_attendance,
+            "excellent_attendance": sum(1 for rate in rates if rate >= 0.90),
+            "good_attendance": sum(1 for rate in rates if 0.75 <= rate < 0.90),
+            "poor_attendance": sum(1 for rate in rates if rate < 0.75),
+            "by_school": cls._get_attendance_by_school(attendance_data)
+        }
+
+    @staticmethod
+    def _get_attendance_by_school(attendance_data: List[Dict]) -> Dict:
         """Group attendance by school."""
         by_school = {}
         for r in attendance_data:
@@ -610,21 +674,65 @@ Be fair, constructive, and specific in your evaluation."""
         
         return by_school
 
-    async def get_department_analytics(self) -> Dict:
-        """Get comprehensive department analytics."""
-        # Get all students
-        all_students = await self.get_all_students(limit=1000)
+    async def get_department_analytics(self, limit: int = 1000) -> Dict:
+        """
+        Get comprehensive department analytics.
         
-        # Get risk assessments
-        risk_data = self._read_csv(f"{self.data_dir}/risk_assessments.csv")
+        Covers the first ``limit`` students (in ``get_students_page`` order).
+        Each student file keeps its per-department partial, rebuilt only when
+        the file or the risk/attendance tables change.
+        """
+        student_tables = await self._run(self._student_tables)
+        risk_table = await self._table("risk_assessments.csv")
+        attendance_table = await self._table("attendance_summary.csv")
+        depends_on = (risk_table.version, attendance_table.version)
         
-        # Get attendance data
-        attendance_data = self._read_csv(f"{self.data_dir}/attendance_summary.csv")
+        dept_stats = {}
+        remaining = limit
+        for _, _, table in student_tables:
+            if remaining <= 0:
+                break
+            # Aggregation runs on the I/O pool, not the event loop
+            if len(table.rows) <= remaining:
+                partial = await self._run(
+                    table.derive,
+                    "department_analytics",
+                    lambda t: self._department_partial(t.rows, risk_table, attendance_table),
+                    depends_on
+                )
+            else:
+                # Only part of this file is within the limit: not worth keeping
+                partial = await self._run(
+                    self._department_partial, table.rows[:remaining], risk_table, attendance_table
+                )
+            remaining -= len(table.rows)
+            
+            # Merge in file order so departments keep first-seen order
+            for dept, stats in partial.items():
+                merged = dept_stats.setdefault(dept, dict.fromkeys(stats, 0))
+                for key, value in stats.items():
+                    merged[key] += value
+        
+        # Calculate averages
+        for dept in dept_stats:
+            if dept_stats[dept]["total_students"] > 0:
+                dept_stats[dept]["avg_attendance"] = round(
+                    (dept_stats[dept]["attendance_sum"] / dept_stats[dept]["total_students"]) * 100, 1
+                )
+            del dept_stats[dept]["attendance_sum"]
         
-        # Group by department
+        return dept_stats
+
+    @staticmethod
+    def _department_partial(
+        students: List[Dict[str, str]],
+        risk_table: CachedTable,
+        attendance_table: CachedTable
+    ) -> Dict[str, Dict[str, float]]:
+        """Per-department counts and attendance sum for a list of student rows."""
         dept_stats = {}
         
-        for student in all_students:
+        for student in students:
             dept = student["department"]
             if dept not in dept_stats:
                 dept_stats[dept] = {
@@ -640,9 +748,8 @@ Be fair, constructive, and specific in your evaluation."""
             dept_stats[dept]["total_students"] += 1
             
             # Check if student is at risk
-            student_risks = [r for r in risk_data if r["student_id"] == student["id"]]
-            if student_risks:
-                risk = student_risks[0]
+            risk = risk_table.first("student_id", student["id"])
+            if risk:
                 dept_stats[dept]["at_risk"] += 1
                 risk_level = risk["risk_level"].lower()
                 if risk_level == "critical":
@@ -653,19 +760,117 @@ Be fair, constructive, and specific in your evaluation."""
                     dept_stats[dept]["medium_risk"] += 1
             
             # Add attendance
-            student_attendance = [a for a in attendance_data if a["student_id"] == student["id"]]
+            student_attendance = attendance_table.first("student_id", student["id"])
             if student_attendance:
-                dept_stats[dept]["attendance_sum"] += float(student_attendance[0]["attendance_rate"])
-        
-        # Calculate averages
-        for dept in dept_stats:
-            if dept_stats[dept]["total_students"] > 0:
-                dept_stats[dept]["avg_attendance"] = round(
-                    (dept_stats[dept]["attendance_sum"] / dept_stats[dept]["total_students"]) * 100, 1
-                )
-            del dept_stats[dept]["attendance_sum"]
+                dept_stats[dept]["attendance_sum"] += float(student_attendance["attendance_rate"])
         
         return dept_stats
 
+    async def get_student_dashboard(self, student_id: str) -> Dict:
+        """Get dashboard summary for a student."""
+        student_attendance = await self._lookup_one("attendance_summary.csv", "student_id", student_id)
+        student_grades = await self._lookup("grades_summary.csv", "student_id", student_id)
+        student_submissions = await self._lookup("submissions.csv", "student_id", student_id)
+        
+        # Calculate average grade
+        avg_grade = 0
+        if student_grades:
+            total = sum(float(g["current_grade"]) for g in student_grades)
+            avg_grade = round(total / len(student_grades), 1)
+        
+        return {
+            "attendance_rate": float(student_attendance["attendance_rate"]) * 100 if student_attendance else 0,
+            "total_classes": int(student_attendance["total_classes"]) if student_attendance else 0,
+            "attended": int(student_attendance["attended"]) if student_attendance else 0,
+            "absent_days": int(student_attendance["absent_days"]) if student_attendance else 0,
+            "avg_grade": avg_grade,
+            "total_courses": len(student_grades),
+            "total_submissions": len(student_submissions),
+            "pending_submissions": sum(1 for s in student_submissions if s["status"] == "pending_review")
+        }
+
+    async def get_student_grades(self, student_id: str) -> List[Dict]:
+        """Get grades for a student."""
+        student_grades = []
+        for g in await self._lookup("grades_summary.csv", "student_id", student_id):
+            student_grades.append({
+                "semester": int(g.get("semester", 1)),
+                "course_code": g["course_code"],
+                "course_name": g["course_name"],
+                "midterm_score": float(g["midterm_score"]),
+                "assignment_avg": float(g["assignment_avg"]),
+                "quiz_avg": float(g["quiz_avg"]),
+                "current_grade": float(g["current_grade"]),
+                "grade_letter": g["grade_letter"],
+                "status": g["status"]
+            })
+        return student_grades
+
+    async def get_student_courses(self, student_id: str) -> Dict[int, List[Dict]]:
+        """Get courses for a student grouped by semester, joined with course attendance."""
+        # Index this student's attendance rows by course code
+        attendance_by_course = {}
+        for a in await self._lookup("course_attendance.csv", "student_id", student_id):
+            attendance_by_course.setdefault(a["course_code"], a)
+        
+        courses_by_semester = {}
+        for g in await self._lookup("grades_summary.csv", "student_id", student_id):
+            semester = int(g.get("semester", 1))
+            if semester not in courses_by_semester:
+                courses_by_semester[semester] = []
+            
+            attendance = attendance_by_course.get(g["course_code"])
+            courses_by_semester[semester].append({
+                "course_code": g["course_code"],
+                "course_name": g["course_name"],
+                "current_grade": float(g["current_grade"]),
+                "grade_letter": g["grade_letter"],
+                "status": g["status"],
+                "attendance_rate": float(attendance["attendance_rate"]) * 100 if attendance else 0,
+                "total_classes": int(attendance["total_classes"]) if attendance else 0,
+                "attended": int(attendance["attended"]) if attendance else 0
+            })
+        
+        return courses_by_semester
+
+    async def get_student_assignments(self, student_id: str) -> List[Dict]:
+        """Get assignments for a student's courses along with their submissions."""
+        # Student's courses come from their grade rows
+        student_courses = {g["course_code"] for g in await self._lookup("grades_summary.csv", "student_id", student_id)}
+        
+        student_submissions = {
+            s["assignment_id"]: s for s in await self._lookup("submissions.csv", "student_id", student_id)
+        }
+        
+        # Probe assignments per course, then restore file order
+        assignments_table = await self._table("assignments.csv")
+        student_assignments = []
+        for course_code in student_courses:
+            student_assignments.extend(assignments_table.lookup("course_code", course_code))
+        student_assignments.sort(key=assignments_table.position)
+        
+        result = []
+        for assignment in student_assignments:
+            submission = student_submissions.get(assignment["id"])
+            result.append({
+                "id": assignment["id"],
+                "course_code": assignment["course_code"],
+                "course_name": assignment["course_name"],
+                "assignment_title": assignment["assignment_title"],
+                "description": assignment["description"],
+                "max_score": int(assignment["max_score"]),
+                "due_date": assignment["due_date"],
+                "submitted": submission is not None,
+                "submission_id": submission["id"] if submission else None,
+                "ai_score": int(submission["ai_score"]) if submission and submission["ai_score"] else None,
+                "ai_feedback": submission["ai_feedback"] if submission else None,
+                "teacher_verified": submission["teacher_verified"] == "true" if submission else False,
+                "teacher_score": int(submission["teacher_score"]) if submission and submission["teacher_score"] else None,
+                "teacher_feedback": submission["teacher_feedback"] if submission else None,
+                "status": submission["status"] if submission else "not_submitted"
+            })
+        
+        return result
+
 # Singleton instance
 csv_db = CsvService()
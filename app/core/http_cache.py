@@ -0,0 +1,162 @@
+"""
+Opti-Scholar: HTTP Response Cache
+ETag/Last-Modified validation and server-side caching for read-only data endpoints
+"""
+
+import hashlib
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple, Iterable, List
+
+from fastapi.encoders import jsonable_encoder
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.core.storage import get_storage
+
+
+# Headers that are recomputed for every response rather than replayed from the cache
+_VOLATILE_HEADERS = {"content-length", "etag", "last-modified", "cache-control", "date", "server"}
+
+
+def uncacheable(content: Any) -> JSONResponse:
+    """
+    JSON response that ``DataCacheMiddleware`` passes through without caching it.
+    
+    For placeholder content an endpoint serves after an error: it must not
+    be replayed (or validated with a 304) until the data changes.
+    """
+    return JSONResponse(jsonable_encoder(content), headers={"Cache-Control": "no-store"})
+
+
+class DataCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Conditional GETs and a response cache for the data router.
+    
+    The ETag of a response is derived from the storage backend's
+    ``data_version()`` plus the route and query parameters, so it changes
+    exactly when one of the underlying tables does. Repeats are served from
+    an LRU of serialized bodies without running the endpoint again. Only
+    successful responses are cached: anything but a 200, or a response
+    marked ``no-store`` (see ``uncacheable``), is passed through as is.
+    
+    Clients that send a matching ``If-None-Match`` (or a current
+    ``If-Modified-Since``) get an empty 304, but only for a response known
+    to be a cacheable 200 at the current version: one already in the LRU,
+    or else the endpoint runs first. A path that does not exist, or
+    an endpoint that failed, is never answered with a 304.
+    """
+
+    def __init__(
+        self,
+        app,
+        prefix: str = "/api/v1/data",
+        exclude: Iterable[str] = (),
+        max_entries: int = 256
+    ):
+        """
+        Initialize middleware.
+        
+        Args:
+            app: ASGI application
+            prefix: Only GET requests under this path are cached
+            exclude: Paths that are never cached (e.g. streaming exports)
+            max_entries: Size of the server-side response LRU
+        """
+        super().__init__(app)
+        self.prefix = prefix
+        self.exclude = set(exclude)
+        self.max_entries = max_entries
+        # key -> (etag, body, media type, replayed headers)
+        self._entries: "OrderedDict[str, Tuple[str, bytes, Optional[str], List[Tuple[str, str]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if request.method != "GET" or not path.startswith(self.prefix) or path in self.exclude:
+            return await call_next(request)
+
+        version = await get_storage().data_version()
+        if version is None:
+            return await call_next(request)
+        token, last_modified = version
+
+        key = self._cache_key(request)
+        etag = '"' + hashlib.sha1(f"{token}|{key}".encode()).hexdigest() + '"'
+        validators = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+        not_modified = self._not_modified(request, etag, last_modified)
+
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == etag:
+            self._entries.move_to_end(key)
+            if not_modified:
+                self.not_modified += 1
+                return Response(status_code=304, headers=validators)
+            self.hits += 1
+            _, body, media_type, headers = cached
+            return self._build(body, media_type, headers, validators)
+
+        self.misses += 1
+        response = await call_next(request)
+        if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _VOLATILE_HEADERS]
+        media_type = response.headers.get("content-type")
+        self._entries[key] = (etag, body, media_type, headers)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if not_modified:
+            self.not_modified += 1
+            return Response(status_code=304, headers=validators)
+        return self._build(body, media_type, headers, validators)
+
+    @staticmethod
+    def _cache_key(request: Request) -> str:
+        """Route plus query parameters in a canonical order."""
+        params = sorted(request.query_params.multi_items())
+        return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+        """Whether the client's cached copy is still current."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            candidates = [tag.strip() for tag in if_none_match.split(",")]
+            # Weak comparison, as required for If-None-Match
+            return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            # HTTP dates have one-second resolution
+            return int(last_modified) <= since
+        return False
+
+    @staticmethod
+    def _build(
+        body: bytes,
+        media_type: Optional[str],
+        headers: List[Tuple[str, str]],
+        validators: Dict[str, str]
+    ) -> Response:
+        """Response with the cached body, its original headers and fresh validators."""
+        response = Response(content=body, status_code=200, media_type=media_type)
+        for name, value in headers:
+            if name.lower() != "content-type":
+                response.headers.append(name, value)
+        response.headers.update(validators)
+        return response
@@ -0,0 +1,153 @@
+"""
+Opti-Scholar: Table Journal
+Append-only delta log for data_store tables, replayed on top of the base CSV
+"""
+
+import os
+import json
+from typing import List, Dict, Tuple, Any
+
+from app.core.write_coordinator import atomic_write_text
+
+
+class TableJournal:
+    """
+    Append-only JSON-lines log of row inserts and updates for one CSV table.
+
+    Each write appends complete lines in a single ``write`` call, so the cost of
+    a submit or status change does not depend on the size of the table. Readers
+    replay the log on top of the base CSV (see ``apply_records``); a compaction
+    folds the log back into the CSV and truncates it.
+
+    Record formats:
+        {"op": "insert", "row": {...}}
+        {"op": "update", "id": "<row id>", "fields": {...}}
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize journal.
+
+        Args:
+            path: Location of the journal file, e.g. ``data_store/submissions.journal``
+        """
+        self.path = path
+
+    @staticmethod
+    def path_for(table_path: str) -> str:
+        """Journal path that belongs to a table, ``x/submissions.csv -> x/submissions.journal``."""
+        return os.path.splitext(table_path)[0] + ".journal"
+
+    def append(self, records: List[Dict[str, Any]]):
+        """Append one or more records with a single write."""
+        if not records:
+            return
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+
+    def insert(self, row: Dict[str, Any]):
+        """Append an insert record; values are stored as strings like the CSV."""
+        self.append([{"op": "insert", "row": _as_strings(row)}])
+
+    def update(self, row_id: str, fields: Dict[str, Any]):
+        """Append an update (delta) record for one row."""
+        self.append([{"op": "update", "id": row_id, "fields": _as_strings(fields)}])
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]):
+        """Append update records for several rows (``{row id: fields}``) with a single write."""
+        self.append([
+            {"op": "update", "id": row_id, "fields": _as_strings(fields)}
+            for row_id, fields in updates.items()
+        ])
+
+    def read_from(self, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read records appended after ``offset``.
+
+        Only complete lines are consumed, so a record that is still being
+        written (or was torn by a crash) is picked up on the next read.
+
+        Returns:
+            Tuple of (records, new_offset)
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Skip a corrupt line rather than losing the whole table
+                continue
+        return records, offset + end
+
+    def truncate(self):
+        """
+        Empty the journal after its records were folded into the base table.
+        
+        The empty file replaces the old one by rename, so readers see a new
+        inode and replay from the start instead of seeking past the end.
+        """
+        if os.path.exists(self.path):
+            atomic_write_text(self.path, "")
+
+
+def apply_records(
+    rows: List[Dict[str, str]],
+    positions: Dict[str, int],
+    records: List[Dict[str, Any]],
+    key: str = "id"
+) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    Replay journal records on top of table rows (copy-on-write).
+
+    Inserts act as upserts and updates only set fields, so replaying a record
+    twice (e.g. while another process is compacting) yields the same table.
+
+    Args:
+        rows: Current rows, not modified
+        positions: Row key -> index into ``rows``, not modified
+        records: Journal records to apply in order
+        key: Primary key column
+
+    Returns:
+        Tuple of (new_rows, new_positions)
+    """
+    if not records:
+        return rows, positions
+
+    rows = list(rows)
+    positions = dict(positions)
+
+    for record in records:
+        op = record.get("op")
+        if op == "insert":
+            row = record.get("row", {})
+            idx = positions.get(row.get(key))
+            if idx is None:
+                positions[row.get(key)] = len(rows)
+                rows.append(row)
+            else:
+                rows[idx] = row
+        elif op == "update":
+            idx = positions.get(record.get("id"))
+            if idx is not None:
+                rows[idx] = {**rows[idx], **record.get("fields", {})}
+
+    return rows, positions
+
+
+def _as_strings(values: Dict[str, Any]) -> Dict[str, str]:
+    """Normalize values the way the csv module would read them back."""
+    return {k: "" if v is None else str(v) for k, v in values.items()}
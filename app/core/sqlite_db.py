@@ -0,0 +1,853 @@
+"""
+Opti-Scholar: SQLite Storage Backend
+Data API over indexed SQL tables (aiosqlite), with a one-shot importer from data_store
+"""
+
+from typing import List, Dict, Optional, Any, Tuple
+from sqlalchemy import select, func, update, insert, case, tuple_, literal, cast, String
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.api.schemas import StudentUpdate
+from app.core.table_cache import file_signature
+from app.core.storage import StorageBackend, SUBMISSION_FIELDS, encode_cursor, decode_cursor
+from app.models.store import (
+    StoreBase, StoreSchool, StoreSchoolInfo, StoreDepartment, StoreCourse, StoreStudent,
+    StoreUser, StoreTeacherCourse, StoreAssignment, StoreSubmission,
+    StoreCourseAttendance, StoreAttendanceSummary, StoreGradeSummary, StoreRiskAssessment
+)
+
+
+def _row(obj, columns: List[str]) -> Dict[str, str]:
+    """ORM row as a CSV-style dict (all values as strings)."""
+    return {c: "" if getattr(obj, c) is None else str(getattr(obj, c)) for c in columns}
+
+
+def _submission_seq(submission_id: str) -> Optional[int]:
+    """Numeric part of a submission ID, ``s42 -> 42``."""
+    if submission_id.startswith("s") and submission_id[1:].isdigit():
+        return int(submission_id[1:])
+    return None
+
+
+class SqliteService(StorageBackend):
+    """
+    Storage backend over SQLite tables mirroring the data_store CSV files.
+
+    Lookups go through B-tree indexes instead of scanning files, and writes
+    are single-row transactions, so the cost of a request no longer grows
+    with the size of the tables. Results match ``CsvService`` row for row.
+    """
+
+    def __init__(self, database_url: str):
+        """
+        Initialize backend.
+
+        Args:
+            database_url: SQLAlchemy async URL, e.g. ``sqlite+aiosqlite:///./data_store.db``
+        """
+        super().__init__()
+        self.engine = create_async_engine(database_url, future=True)
+        self.session_maker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self._initialized = False
+
+    async def init_db(self):
+        """Create the store tables and indexes if they do not exist."""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(StoreBase.metadata.create_all)
+        self._initialized = True
+
+    async def _session(self) -> AsyncSession:
+        """New session, creating the schema on first use."""
+        if not self._initialized:
+            await self.init_db()
+        return self.session_maker()
+
+    async def data_version(self) -> Optional[Tuple[str, float]]:
+        """Version token from the database file (and its WAL) signatures; None for in-memory databases."""
+        database = self.engine.url.database
+        if not database or database == ":memory:":
+            return None
+        signatures = [file_signature(database), file_signature(database + "-wal")]
+        if signatures[0] is None:
+            return None
+        last_modified = max(sig[1] for sig in signatures if sig is not None)
+        return repr(signatures), last_modified / 1e9
+
+    async def _student_counts(self, session: AsyncSession) -> Dict[str, int]:
+        """Number of students per school code."""
+        result = await session.execute(
+            select(StoreStudent.school_code, func.count()).group_by(StoreStudent.school_code)
+        )
+        return dict(result.all())
+
+    # ============================================
+    # Schools & Students
+    # ============================================
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Aggregate stats from all schools."""
+        async with await self._session() as session:
+            total_students = await session.scalar(select(func.count()).select_from(StoreStudent))
+
+        return {
+            "total_students": total_students,
+            "total_submissions": int(total_students * 4.5), # Mock derived metric
+            "auto_approved_rate": 68.5,
+            "pending_review": 15,
+            "avg_confidence": 0.92
+        }
+
+    async def get_schools(self) -> List[Dict]:
+        async with await self._session() as session:
+            schools = (await session.scalars(select(StoreSchool).order_by(StoreSchool.position))).all()
+            dept_counts = dict((await session.execute(
+                select(StoreDepartment.school_code, func.count()).group_by(StoreDepartment.school_code)
+            )).all())
+            course_counts = dict((await session.execute(
+                select(StoreCourse.school_code, func.count()).group_by(StoreCourse.school_code)
+            )).all())
+
+        return [{
+            "id": s.id,
+            "name": s.name,
+            "code": s.code,
+            "description": s.description or "",
+            "department_count": dept_counts.get(s.code, 0),
+            "course_count": course_counts.get(s.code, 0)
+        } for s in schools]
+
+    async def get_school_details(self, code: str) -> Optional[Dict]:
+        async with await self._session() as session:
+            school_info = await session.get(StoreSchool, code)
+            if not school_info:
+                return None
+
+            info = (await session.scalars(
+                select(StoreSchoolInfo).where(StoreSchoolInfo.school_code == code)
+            )).all()
+            students = (await session.scalars(
+                select(StoreStudent)
+                .where(StoreStudent.school_code == code)
+                .order_by(StoreStudent.semester, StoreStudent.position)
+            )).all()
+
+        info_dict = {row.key: row.value for row in info}
+        students_by_semester = {}
+        for r in students:
+            students_by_semester.setdefault(f"Semester {r.semester}", []).append({
+                "id": r.id,
+                "name": r.name,
+                "reg": r.registration_number,
+                "course": r.department, # Simplified
+                "email": r.email,
+                "phone": r.phone or ""
+            })
+
+        return {
+            "name": school_info.name,
+            "code": school_info.code,
+            "director": info_dict.get("Director", "N/A"),
+            "description": school_info.description or "",
+            "students_by_semester": students_by_semester
+        }
+
+    async def get_students_page(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        school: Optional[str] = None,
+        department: Optional[str] = None,
+        semester: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """One page of students in (school, semester, file row) order; see ``StorageBackend``."""
+        order = (StoreStudent.school_position, StoreStudent.semester, StoreStudent.position)
+        query = select(StoreStudent).order_by(*order).offset(offset).limit(limit)
+        if school:
+            query = query.where(StoreStudent.school_code == school)
+        if department:
+            query = query.where(StoreStudent.department == department)
+        if semester is not None:
+            query = query.where(StoreStudent.semester == semester)
+
+        async with await self._session() as session:
+            if cursor:
+                after = decode_cursor(cursor)
+                after_school = await session.get(StoreSchool, after["school"])
+                if not after_school:
+                    raise ValueError(f"Invalid cursor: unknown school {after['school']}")
+                query = query.where(
+                    tuple_(*order) > tuple_(after_school.position, after["semester"], after["position"])
+                )
+            students = (await session.scalars(query)).all()
+
+        next_cursor = None
+        if students and len(students) >= limit:
+            last = students[-1]
+            next_cursor = encode_cursor(last.school_code, last.semester, last.position)
+
+        return {
+            "students": [{
+                "id": r.id,
+                "registration_number": r.registration_number,
+                "name": r.name,
+                "email": r.email,
+                "department": r.department,
+                "current_semester": r.semester
+            } for r in students],
+            "next_cursor": next_cursor
+        }
+
+    async def update_student(self, student_id: str, updates: StudentUpdate) -> bool:
+        async with await self._session() as session:
+            student = await session.get(StoreStudent, student_id)
+            if not student:
+                return False
+            if updates.name: student.name = updates.name
+            if updates.department: student.department = updates.department
+            if updates.phone: student.phone = updates.phone
+            await session.commit()
+        return True
+
+    async def get_admin_analytics(self):
+        async with await self._session() as session:
+            schools = (await session.scalars(select(StoreSchool).order_by(StoreSchool.position))).all()
+            counts = await self._student_counts(session)
+
+        dept_dist = {s.code: counts.get(s.code, 0) for s in schools}
+        total_students = sum(dept_dist.values())
+
+        return {
+            "enrollment_trend": [100, 110, 105, 120, 130, 140, total_students],
+            "pass_rate_trend": [85, 87, 86, 88, 89, 90, 91],
+            "department_distribution": dept_dist,
+            "system_health": "Healthy",
+            "active_users_now": 42
+        }
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict]:
+        async with await self._session() as session:
+            user = await session.scalar(select(StoreUser).where(StoreUser.email == email))
+        if not user:
+            return None
+        return _row(user, ["id", "email", "password", "role", "full_name", "student_id"])
+
+    # ============================================
+    # Teaching, Assignments & Submissions
+    # ============================================
+
+    async def get_teacher_courses(self, teacher_email: str) -> List[Dict]:
+        """Get courses taught by a specific teacher."""
+        async with await self._session() as session:
+            rows = (await session.scalars(
+                select(StoreTeacherCourse)
+                .where(StoreTeacherCourse.teacher_email == teacher_email)
+                .order_by(StoreTeacherCourse.pk)
+            )).all()
+
+        return [{
+            "course_id": tc.course_id,
+            "course_code": tc.course_code,
+            "course_name": tc.course_name,
+            "school_code": tc.school_code,
+            "semester": tc.semester,
+            "total_students": tc.total_students,
+            "credits": tc.credits
+        } for tc in rows]
+
+    async def get_course_attendance(self, course_code: str) -> List[Dict]:
+        """Get attendance records for a specific course."""
+        async with await self._session() as session:
+            rows = (await session.scalars(
+                select(StoreCourseAttendance)
+                .where(StoreCourseAttendance.course_code == course_code)
+                .order_by(StoreCourseAttendance.position)
+            )).all()
+
+        return [{
+            "id": r.id,
+            "student_id": r.student_id,
+            "student_name": r.student_name,
+            "student_reg": r.student_reg,
+            "total_classes": r.total_classes,
+            "attended": r.attended,
+            "attendance_rate": r.attendance_rate,
+            "last_updated": r.last_updated
+        } for r in rows]
+
+    async def update_course_attendance(self, attendance_id: str, attended: int) -> bool:
+        """Update attendance for a student in a course."""
+        async with await self._session() as session:
+            record = await session.get(StoreCourseAttendance, attendance_id)
+            if not record:
+                return False
+            record.attended = attended
+            record.attendance_rate = round(attended / record.total_classes, 2)
+            record.last_updated = "2024-01-25"
+            await session.commit()
+        return True
+
+    async def get_teacher_stats(self, teacher_email: str) -> Dict:
+        """Get statistics for a teacher's courses."""
+        courses = await self.get_teacher_courses(teacher_email)
+        course_codes = [c["course_code"] for c in courses]
+
+        async with await self._session() as session:
+            attendance = (await session.execute(
+                select(StoreCourseAttendance.student_id)
+                .where(StoreCourseAttendance.course_code.in_(course_codes))
+            )).all()
+
+            # A course listed twice for the teacher counts its records twice, as in the CSV backend
+            repeats = {code: course_codes.count(code) for code in course_codes}
+            per_course = (await session.execute(
+                select(StoreCourseAttendance.course_code, func.count(), func.sum(StoreCourseAttendance.attendance_rate))
+                .where(StoreCourseAttendance.course_code.in_(course_codes))
+                .group_by(StoreCourseAttendance.course_code)
+            )).all()
+            counted = sum(n * repeats[code] for code, n, _ in per_course)
+            rate_sum = sum((total or 0) * repeats[code] for code, _, total in per_course)
+
+            student_ids = {row.student_id for row in attendance}
+            at_risk_count = 0
+            if student_ids:
+                at_risk_count = await session.scalar(
+                    select(func.count()).select_from(StoreRiskAssessment)
+                    .where(StoreRiskAssessment.student_id.in_(student_ids))
+                    .where(StoreRiskAssessment.risk_level.in_(["high", "critical"]))
+                )
+
+        avg_attendance = 0
+        if counted:
+            avg_attendance = round(rate_sum / counted * 100, 1)
+
+        return {
+            "total_students": sum(c["total_students"] for c in courses),
+            "total_courses": len(courses),
+            "avg_attendance": avg_attendance,
+            "at_risk_students": at_risk_count
+        }
+
+    async def get_course_assignments(self, course_code: str) -> List[Dict]:
+        """Get assignments for a specific course."""
+        async with await self._session() as session:
+            assignments = (await session.scalars(
+                select(StoreAssignment)
+                .where(StoreAssignment.course_code == course_code)
+                .order_by(StoreAssignment.position)
+            )).all()
+            counts = {}
+            if assignments:
+                counts = {row[0]: row[1:] for row in (await session.execute(
+                    select(
+                        StoreSubmission.assignment_id,
+                        func.count(),
+                        func.sum(case((StoreSubmission.status == "pending_review", 1), else_=0))
+                    )
+                    .where(StoreSubmission.assignment_id.in_([a.id for a in assignments]))
+                    .group_by(StoreSubmission.assignment_id)
+                )).all()}
+
+        result = []
+        for a in assignments:
+            submission_count, pending_count = counts.get(a.id, (0, 0))
+            result.append({
+                "id": a.id,
+                "assignment_title": a.assignment_title,
+                "description": a.description or "",
+                "max_score": a.max_score,
+                "due_date": a.due_date,
+                "submission_count": submission_count,
+                "pending_review": pending_count or 0
+            })
+        return result
+
+    async def get_assignment(self, assignment_id: str) -> Optional[Dict]:
+        """Get a raw assignment row by ID."""
+        async with await self._session() as session:
+            assignment = await session.get(StoreAssignment, assignment_id)
+        if not assignment:
+            return None
+        return _row(assignment, ["id", "course_code", "course_name", "assignment_title", "description",
+                                 "max_score", "due_date", "created_by", "created_at"])
+
+    async def get_assignment_submissions(self, assignment_id: str) -> List[Dict]:
+        """Get all submissions for an assignment."""
+        async with await self._session() as session:
+            submissions = (await session.scalars(
+                select(StoreSubmission)
+                .where(StoreSubmission.assignment_id == assignment_id)
+                .order_by(StoreSubmission.seq)
+            )).all()
+
+        return [{
+            "id": s.id,
+            "student_id": s.student_id,
+            "student_name": s.student_name,
+            "student_reg": s.student_reg,
+            "submission_text": s.submission_text or "",
+            "file_name": s.file_name or "",
+            "submitted_at": s.submitted_at,
+            "ai_score": int(s.ai_score) if s.ai_score else 0,
+            "ai_feedback": s.ai_feedback or "",
+            "ai_reasoning": s.ai_reasoning or "",
+            "teacher_verified": s.teacher_verified == "true",
+            "teacher_score": int(s.teacher_score) if s.teacher_score else 0,
+            "teacher_feedback": s.teacher_feedback or "",
+            "status": s.status
+        } for s in submissions]
+
+    async def add_submission(self, submission: Dict[str, Any]) -> str:
+        """
+        Store a new submission in one statement.
+
+        The next ID (``max(seq) + 1``) is computed by the INSERT itself, and
+        SQLite holds its write lock for the whole statement, so concurrent
+        writers queue on the lock instead of racing for the same ID.
+        """
+        fields = {
+            field: "" if submission.get(field) is None else str(submission.get(field, ""))
+            for field in SUBMISSION_FIELDS if field != "id"
+        }
+
+        next_seq = select((func.coalesce(func.max(StoreSubmission.seq), 0) + 1).label("seq")).subquery()
+        statement = insert(StoreSubmission).from_select(
+            ["id", "seq", *fields],
+            select(
+                literal("s") + cast(next_seq.c.seq, String),
+                next_seq.c.seq,
+                *[literal(value, String) for value in fields.values()]
+            )
+        ).returning(StoreSubmission.id)
+
+        async with await self._session() as session:
+            submission_id = (await session.execute(statement)).scalar_one()
+            await session.commit()
+        return submission_id
+
+    async def verify_submission(self, submission_id: str, teacher_score: int,
+                                teacher_feedback: str, approved: bool) -> bool:
+        """Teacher verifies and approves/modifies AI grading."""
+        async with await self._session() as session:
+            result = await session.execute(
+                update(StoreSubmission)
+                .where(StoreSubmission.id == submission_id)
+                .values(
+                    teacher_verified="true",
+                    teacher_score=str(teacher_score),
+                    teacher_feedback=teacher_feedback,
+                    status="approved" if approved else "needs_revision"
+                )
+            )
+            await session.commit()
+        return result.rowcount > 0
+
+    async def update_submissions(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Apply field updates to many submissions in one transaction; returns rows updated."""
+        updated = 0
+        async with await self._session() as session:
+            for submission_id, fields in updates.items():
+                values = {k: "" if v is None else str(v) for k, v in fields.items()}
+                result = await session.execute(
+                    update(StoreSubmission).where(StoreSubmission.id == submission_id).values(**values)
+                )
+                updated += result.rowcount
+            await session.commit()
+        return updated
+
+    async def get_grading_stats(self, teacher_email: str) -> Dict:
+        """Get grading statistics for teacher dashboard."""
+        courses = await self.get_teacher_courses(teacher_email)
+        course_codes = [c["course_code"] for c in courses]
+        repeats = {code: course_codes.count(code) for code in course_codes}
+
+        async with await self._session() as session:
+            submissions = (await session.execute(
+                select(
+                    StoreSubmission.course_code, StoreSubmission.status, StoreSubmission.teacher_verified,
+                    StoreSubmission.ai_score, StoreSubmission.teacher_score
+                ).where(StoreSubmission.course_code.in_(course_codes))
+            )).all()
+
+        # A course listed twice for the teacher counts its submissions twice, as in the CSV backend
+        teacher_submissions = [s for s in submissions for _ in range(repeats[s.course_code])]
+
+        verified = [s for s in teacher_submissions if s.teacher_verified == "true"]
+        ai_accuracy = 0
+        if verified:
+            accuracy_sum = sum(
+                100 - abs(int(s.ai_score) - int(s.teacher_score))
+                for s in verified if s.ai_score and s.teacher_score
+            )
+            ai_accuracy = round(accuracy_sum / len(verified), 1)
+
+        return {
+            "total_submissions": len(teacher_submissions),
+            "pending_review": sum(1 for s in teacher_submissions if s.status == "pending_review"),
+            "approved": sum(1 for s in teacher_submissions if s.status == "approved"),
+            "ai_accuracy": ai_accuracy
+        }
+
+    # ============================================
+    # Risk, Attendance & Analytics
+    # ============================================
+
+    async def get_risk_students(self) -> List[Dict]:
+        """Get all at-risk students from risk assessments."""
+        async with await self._session() as session:
+            rows = (await session.scalars(
+                select(StoreRiskAssessment).order_by(StoreRiskAssessment.position)
+            )).all()
+
+        return [{
+            "id": r.id,
+            "student_id": r.student_id,
+            "student_name": r.student_name,
+            "student_reg": r.student_reg,
+            "school_code": r.school_code,
+            "department": r.department,
+            "risk_level": r.risk_level,
+            "probability": r.probability,
+            "attendance_rate": r.attendance_rate,
+            "grade_average": r.grade_average,
+            "factors": r.factors.split(";"),
+            "recommended_actions": r.recommended_actions.split(";"),
+            "assessed_at": r.assessed_at
+        } for r in rows]
+
+    async def get_risk_counts(self) -> Dict:
+        """Get count of students by risk level."""
+        async with await self._session() as session:
+            rows = (await session.execute(
+                select(func.lower(StoreRiskAssessment.risk_level), func.count())
+                .group_by(func.lower(StoreRiskAssessment.risk_level))
+            )).all()
+
+        counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
+        for level, n in rows:
+            if level in counts:
+                counts[level] = n
+        return counts
+
+    async def get_attendance_stats(self) -> Dict:
+        """Get attendance statistics."""
+        async with await self._session() as session:
+            actual_total_students = await session.scalar(select(func.count()).select_from(StoreStudent))
+            attendance_data = (await session.execute(
+                select(StoreAttendanceSummary.school_code, StoreAttendanceSummary.attendance_rate)
+                .order_by(StoreAttendanceSummary.position)
+            )).all()
+
+        students_with_attendance = len(attendance_data)
+        total_attendance = sum(r.attendance_rate for r in attendance_data)
+        avg_attendance = (total_attendance / students_with_attendance * 100) if students_with_attendance > 0 else 0
+
+        by_school = {}
+        for r in attendance_data:
+            entry = by_school.setdefault(r.school_code, {"count": 0, "total_rate": 0})
+            entry["count"] += 1
+            entry["total_rate"] += r.attendance_rate
+        for entry in by_school.values():
+            entry["avg_rate"] = round((entry.pop("total_rate") / entry["count"] * 100), 1)
+
+        return {
+            "average_attendance": round(avg_attendance, 1),
+            "total_students": actual_total_students,
+            "students_with_attendance": students_with_attendance,
+            "excellent_attendance": sum(1 for r in attendance_data if r.attendance_rate >= 0.90),
+            "good_attendance": sum(1 for r in attendance_data if 0.75 <= r.attendance_rate < 0.90),
+            "poor_attendance": sum(1 for r in attendance_data if r.attendance_rate < 0.75),
+            "by_school": by_school
+        }
+
+    async def get_department_analytics(self, limit: int = 1000) -> Dict:
+        """Get comprehensive department analytics (first ``limit`` students)."""
+        all_students = await self.get_all_students(limit=limit)
+        student_ids = [s["id"] for s in all_students]
+
+        async with await self._session() as session:
+            # First risk row per student (file order), as the CSV backend does
+            risk_by_student = {}
+            for student_id, level in (await session.execute(
+                select(StoreRiskAssessment.student_id, StoreRiskAssessment.risk_level)
+                .where(StoreRiskAssessment.student_id.in_(student_ids))
+                .order_by(StoreRiskAssessment.position)
+            )).all():
+                risk_by_student.setdefault(student_id, level)
+            attendance_by_student = dict((await session.execute(
+                select(StoreAttendanceSummary.student_id, StoreAttendanceSummary.attendance_rate)
+                .where(StoreAttendanceSummary.student_id.in_(student_ids))
+            )).all())
+
+        dept_stats = {}
+        for student in all_students:
+            stats = dept_stats.setdefault(student["department"], {
+                "total_students": 0,
+                "at_risk": 0,
+                "critical_risk": 0,
+                "high_risk": 0,
+                "medium_risk": 0,
+                "avg_attendance": 0,
+                "attendance_sum": 0
+            })
+            stats["total_students"] += 1
+
+            level = risk_by_student.get(student["id"])
+            if level is not None:
+                stats["at_risk"] += 1
+                level = level.lower()
+                if level in ("critical", "high", "medium"):
+                    stats[f"{level}_risk"] += 1
+
+            if student["id"] in attendance_by_student:
+                stats["attendance_sum"] += attendance_by_student[student["id"]]
+
+        for stats in dept_stats.values():
+            if stats["total_students"] > 0:
+                stats["avg_attendance"] = round((stats["attendance_sum"] / stats["total_students"]) * 100, 1)
+            del stats["attendance_sum"]
+
+        return dept_stats
+
+    # ============================================
+    # Student Portal
+    # ============================================
+
+    async def get_student_dashboard(self, student_id: str) -> Dict:
+        """Get dashboard summary for a student."""
+        async with await self._session() as session:
+            attendance = await session.get(StoreAttendanceSummary, student_id)
+            grades = (await session.scalars(
+                select(StoreGradeSummary.current_grade).where(StoreGradeSummary.student_id == student_id)
+            )).all()
+            statuses = (await session.scalars(
+                select(StoreSubmission.status).where(StoreSubmission.student_id == student_id)
+            )).all()
+
+        avg_grade = 0
+        if grades:
+            avg_grade = round(sum(grades) / len(grades), 1)
+
+        return {
+            "attendance_rate": attendance.attendance_rate * 100 if attendance else 0,
+            "total_classes": attendance.total_classes if attendance else 0,
+            "attended": attendance.attended if attendance else 0,
+            "absent_days": attendance.absent_days if attendance else 0,
+            "avg_grade": avg_grade,
+            "total_courses": len(grades),
+            "total_submissions": len(statuses),
+            "pending_submissions": sum(1 for s in statuses if s == "pending_review")
+        }
+
+    async def _grades_for(self, session: AsyncSession, student_id: str) -> List[StoreGradeSummary]:
+        """Grade rows of a student in file order."""
+        return (await session.scalars(
+            select(StoreGradeSummary)
+            .where(StoreGradeSummary.student_id == student_id)
+            .order_by(StoreGradeSummary.pk)
+        )).all()
+
+    async def get_student_grades(self, student_id: str) -> List[Dict]:
+        """Get grades for a student."""
+        async with await self._session() as session:
+            grades = await self._grades_for(session, student_id)
+
+        return [{
+            "semester": g.semester,
+            "course_code": g.course_code,
+            "course_name": g.course_name,
+            "midterm_score": g.midterm_score,
+            "assignment_avg": g.assignment_avg,
+            "quiz_avg": g.quiz_avg,
+            "current_grade": g.current_grade,
+            "grade_letter": g.grade_letter,
+            "status": g.status
+        } for g in grades]
+
+    async def get_student_courses(self, student_id: str) -> Dict[int, List[Dict]]:
+        """Get courses for a student grouped by semester, joined with course attendance."""
+        async with await self._session() as session:
+            grades = await self._grades_for(session, student_id)
+            attendance_by_course = {}
+            for a in (await session.scalars(
+                select(StoreCourseAttendance)
+                .where(StoreCourseAttendance.student_id == student_id)
+                .order_by(StoreCourseAttendance.position)
+            )).all():
+                attendance_by_course.setdefault(a.course_code, a)
+
+        courses_by_semester = {}
+        for g in grades:
+            attendance = attendance_by_course.get(g.course_code)
+            courses_by_semester.setdefault(g.semester, []).append({
+                "course_code": g.course_code,
+                "course_name": g.course_name,
+                "current_grade": g.current_grade,
+                "grade_letter": g.grade_letter,
+                "status": g.status,
+                "attendance_rate": attendance.attendance_rate * 100 if attendance else 0,
+                "total_classes": attendance.total_classes if attendance else 0,
+                "attended": attendance.attended if attendance else 0
+            })
+        return courses_by_semester
+
+    async def get_student_assignments(self, student_id: str) -> List[Dict]:
+        """Get assignments for a student's courses along with their submissions."""
+        async with await self._session() as session:
+            course_codes = select(StoreGradeSummary.course_code).where(StoreGradeSummary.student_id == student_id)
+            assignments = (await session.scalars(
+                select(StoreAssignment)
+                .where(StoreAssignment.course_code.in_(course_codes))
+                .order_by(StoreAssignment.position)
+            )).all()
+            # Last submission per assignment wins, as in the CSV backend
+            submissions = {
+                s.assignment_id: s for s in (await session.scalars(
+                    select(StoreSubmission)
+                    .where(StoreSubmission.student_id == student_id)
+                    .order_by(StoreSubmission.seq)
+                )).all()
+            }
+
+        result = []
+        for a in assignments:
+            s = submissions.get(a.id)
+            result.append({
+                "id": a.id,
+                "course_code": a.course_code,
+                "course_name": a.course_name,
+                "assignment_title": a.assignment_title,
+                "description": a.description or "",
+                "max_score": a.max_score,
+                "due_date": a.due_date,
+                "submitted": s is not None,
+                "submission_id": s.id if s else None,
+                "ai_score": int(s.ai_score) if s and s.ai_score else None,
+                "ai_feedback": (s.ai_feedback or "") if s else None,
+                "teacher_verified": s.teacher_verified == "true" if s else False,
+                "teacher_score": int(s.teacher_score) if s and s.teacher_score else None,
+                "teacher_feedback": (s.teacher_feedback or "") if s else None,
+                "status": s.status if s else "not_submitted"
+            })
+        return result
+
+
+async def import_data_store(service: SqliteService, data_dir: str = "data_store") -> Dict[str, int]:
+    """
+    Load every data_store table into the SQLite backend (replacing its contents).
+
+    Tables are read through ``CsvService`` so journaled rows are included.
+
+    Args:
+        service: Target backend
+        data_dir: Root of the data store
+
+    Returns:
+        Imported row count per table
+    """
+    from app.core.csv_db import CsvService
+    source = CsvService(data_dir)
+
+    async def read(name: str) -> List[Dict[str, str]]:
+        return await source._read_csv(f"{data_dir}/{name}")
+
+    async with service.engine.begin() as conn:
+        await conn.run_sync(StoreBase.metadata.drop_all)
+        await conn.run_sync(StoreBase.metadata.create_all)
+    service._initialized = True
+
+    counts = {}
+    async with await service._session() as session:
+        schools = await read("schools.csv")
+        for school_position, s in enumerate(schools):
+            code = s["code"]
+            session.add(StoreSchool(code=code, id=s["id"], name=s["name"],
+                                    description=s["description"], position=school_position))
+            for row in await read(f"{code}/info.csv"):
+                session.add(StoreSchoolInfo(school_code=code, key=row["key"], value=row["value"]))
+            for row in await read(f"{code}/departments.csv"):
+                session.add(StoreDepartment(id=row["id"], school_code=code, name=row["name"], code=row["code"]))
+            for row in await read(f"{code}/courses.csv"):
+                session.add(StoreCourse(
+                    id=row["id"], school_code=code, code=row["code"], name=row["name"],
+                    credits=int(row["credits"] or 3), semester=int(row["semester"]),
+                    teacher_id=row.get("teacher_id") or None
+                ))
+
+            students_dir = f"{data_dir}/{code}/students"
+            for fname in await source._list_dir(students_dir):
+                semester = int(fname.replace("sem_", "").replace(".csv", ""))
+                for position, row in enumerate(await read(f"{code}/students/{fname}")):
+                    session.add(StoreStudent(
+                        id=row["id"], registration_number=row["registration_number"], name=row["name"],
+                        email=row["email"], department=row["department"], phone=row.get("phone", ""),
+                        school_code=code, semester=semester, school_position=school_position,
+                        position=position
+                    ))
+                    counts["students"] = counts.get("students", 0) + 1
+        counts["schools"] = len(schools)
+
+        users = await read("users.csv")
+        session.add_all(StoreUser(**{k: row[k] or None if k == "student_id" else row[k] for k in row})
+                        for row in users)
+        counts["users"] = len(users)
+
+        teacher_courses = await read("teacher_courses.csv")
+        session.add_all(StoreTeacherCourse(
+            teacher_id=row["teacher_id"], teacher_email=row["teacher_email"], course_id=row["course_id"],
+            course_code=row["course_code"], course_name=row["course_name"], school_code=row["school_code"],
+            semester=int(row["semester"]), total_students=int(row["total_students"]),
+            credits=int(row["credits"])
+        ) for row in teacher_courses)
+        counts["teacher_courses"] = len(teacher_courses)
+
+        assignments = await read("assignments.csv")
+        session.add_all(StoreAssignment(
+            **{**row, "max_score": int(row["max_score"])}, position=position
+        ) for position, row in enumerate(assignments))
+        counts["assignments"] = len(assignments)
+
+        submissions = await read("submissions.csv")
+        next_seq = max((_submission_seq(r["id"]) or 0 for r in submissions), default=0)
+        for row in submissions:
+            seq = _submission_seq(row["id"])
+            if seq is None:
+                # Non-standard ID: keep it, order it after the numbered rows
+                next_seq += 1
+                seq = next_seq
+            session.add(StoreSubmission(seq=seq, **{f: row.get(f, "") for f in SUBMISSION_FIELDS}))
+        counts["submissions"] = len(submissions)
+
+        course_attendance = await read("course_attendance.csv")
+        session.add_all(StoreCourseAttendance(
+            **{**row, "total_classes": int(row["total_classes"]), "attended": int(row["attended"]),
+               "attendance_rate": float(row["attendance_rate"])}, position=position
+        ) for position, row in enumerate(course_attendance))
+        counts["course_attendance"] = len(course_attendance)
+
+        attendance_summary = await read("attendance_summary.csv")
+        session.add_all(StoreAttendanceSummary(
+            **{**row, "total_classes": int(row["total_classes"]), "attended": int(row["attended"]),
+               "attendance_rate": float(row["attendance_rate"]), "absent_days": int(row["absent_days"]),
+               "late_days": int(row["late_days"])}, position=position
+        ) for position, row in enumerate(attendance_summary))
+        counts["attendance_summary"] = len(attendance_summary)
+
+        grades = await read("grades_summary.csv")
+        session.add_all(StoreGradeSummary(
+            **{**row, "semester": int(row.get("semester") or 1),
+               **{k: float(row[k]) for k in ("midterm_score", "assignment_avg", "quiz_avg", "current_grade")}}
+        ) for row in grades)
+        counts["grades_summary"] = len(grades)
+
+        risks = await read("risk_assessments.csv")
+        session.add_all(StoreRiskAssessment(
+            **{**row, **{k: float(row[k]) for k in ("probability", "attendance_rate", "grade_average")}},
+            position=position
+        ) for position, row in enumerate(risks))
+        counts["risk_assessments"] = len(risks)
+
+        await session.commit()
+
+    source.io_pool.shutdown()
+    return counts
@@ -0,0 +1,242 @@
+"""
+Opti-Scholar: Storage Backend
+Common interface for the data_store backends (CSV files or SQLite)
+"""
+
+import json
+import base64
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple
+
+from app.core.config import settings
+from app.api.schemas import StudentUpdate
+
+
+SUBMISSION_FIELDS = ["id", "assignment_id", "student_id", "student_name", "student_reg", 
+                     "course_code", "submission_text", "file_name", "submitted_at", 
+                     "ai_score", "ai_feedback", "ai_reasoning", "teacher_verified", 
+                     "teacher_score", "teacher_feedback", "status"]
+
+
+STUDENT_FIELDS = ["id", "registration_number", "name", "email", "department", "current_semester"]
+
+
+def encode_cursor(school: str, semester: int, position: int) -> str:
+    """
+    Opaque pagination cursor pointing at a student row.
+
+    Students are ordered by (school in schools.csv order, semester, row
+    position), so a cursor stays valid when rows are added or edited.
+    """
+    payload = json.dumps({"school": school, "semester": semester, "position": position})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Inverse of ``encode_cursor``; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {"school": str(key["school"]), "semester": int(key["semester"]), "position": int(key["position"])}
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class StorageBackend(ABC):
+    """
+    Data access API used by the routes.
+    
+    Backends only store and query data; grading submissions is done by
+    ``app.services.grading`` on top of these methods.
+    """
+
+    async def data_version(self) -> Optional[Tuple[str, float]]:
+        """
+        Version of the stored data, for HTTP caching of read-only endpoints.
+        
+        Returns:
+            Tuple of (token that changes whenever any table changes, last
+            modification time as a Unix timestamp), or None if unknown
+        """
+        return None
+
+    # ============================================
+    # Schools & Students
+    # ============================================
+
+    @abstractmethod
+    async def get_stats(self) -> Dict[str, Any]:
+        """Aggregate stats from all schools."""
+
+    @abstractmethod
+    async def get_schools(self) -> List[Dict]:
+        """All schools with department and course counts."""
+
+    @abstractmethod
+    async def get_school_details(self, code: str) -> Optional[Dict]:
+        """School info with students grouped by semester, or None."""
+
+    @abstractmethod
+    async def get_students_page(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        school: Optional[str] = None,
+        department: Optional[str] = None,
+        semester: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of students in stable order, filtered in the storage layer.
+        
+        Args:
+            limit: Maximum number of students
+            offset: Students to skip (after ``cursor``, if given)
+            cursor: ``next_cursor`` of the previous page
+            school: School code filter
+            department: Department name filter
+            semester: Semester filter
+            
+        Returns:
+            ``{"students": [...], "next_cursor": str or None}``
+        """
+
+    async def get_all_students(self, limit: int = 100) -> List[Dict]:
+        """Students across all schools, up to ``limit``."""
+        page = await self.get_students_page(limit=limit)
+        return page["students"]
+
+    async def iter_students(self, batch_size: int = 500, **filters) -> AsyncIterator[Dict]:
+        """
+        Stream every matching student, fetching ``batch_size`` rows at a time.
+        
+        Args:
+            batch_size: Rows per storage call
+            **filters: ``school``, ``department`` and/or ``semester``
+        """
+        cursor = None
+        while True:
+            page = await self.get_students_page(limit=batch_size, cursor=cursor, **filters)
+            for student in page["students"]:
+                yield student
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+    @abstractmethod
+    async def update_student(self, student_id: str, updates: StudentUpdate) -> bool:
+        """Update a student's profile; False if not found."""
+
+    @abstractmethod
+    async def get_admin_analytics(self) -> Dict:
+        """Enrollment and per-school distribution for the admin dashboard."""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[Dict]:
+        """Raw user row by email, or None."""
+
+    # ============================================
+    # Teaching, Assignments & Submissions
+    # ============================================
+
+    @abstractmethod
+    async def get_teacher_courses(self, teacher_email: str) -> List[Dict]:
+        """Courses taught by a specific teacher."""
+
+    @abstractmethod
+    async def get_course_attendance(self, course_code: str) -> List[Dict]:
+        """Attendance records for a specific course."""
+
+    @abstractmethod
+    async def update_course_attendance(self, attendance_id: str, attended: int) -> bool:
+        """Update attendance for a student in a course; False if not found."""
+
+    @abstractmethod
+    async def get_teacher_stats(self, teacher_email: str) -> Dict:
+        """Statistics for a teacher's courses."""
+
+    @abstractmethod
+    async def get_course_assignments(self, course_code: str) -> List[Dict]:
+        """Assignments for a course with submission counts."""
+
+    @abstractmethod
+    async def get_assignment(self, assignment_id: str) -> Optional[Dict]:
+        """Raw assignment row by ID, or None."""
+
+    @abstractmethod
+    async def get_assignment_submissions(self, assignment_id: str) -> List[Dict]:
+        """All submissions for an assignment."""
+
+    @abstractmethod
+    async def add_submission(self, submission: Dict[str, Any]) -> str:
+        """Store a new submission and return its allocated ID."""
+
+    @abstractmethod
+    async def verify_submission(self, submission_id: str, teacher_score: int, 
+                                teacher_feedback: str, approved: bool) -> bool:
+        """Teacher verifies and approves/modifies AI grading; False if not found."""
+
+    @abstractmethod
+    async def update_submissions(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Apply ``{submission_id: fields}`` in one bulk write; returns how many rows existed."""
+
+    @abstractmethod
+    async def get_grading_stats(self, teacher_email: str) -> Dict:
+        """Grading statistics for the teacher dashboard."""
+
+    # ============================================
+    # Risk, Attendance & Analytics
+    # ============================================
+
+    @abstractmethod
+    async def get_risk_students(self) -> List[Dict]:
+        """All at-risk students from risk assessments."""
+
+    @abstractmethod
+    async def get_risk_counts(self) -> Dict:
+        """Count of students by risk level."""
+
+    @abstractmethod
+    async def get_attendance_stats(self) -> Dict:
+        """Attendance statistics."""
+
+    @abstractmethod
+    async def get_department_analytics(self, limit: int = 1000) -> Dict:
+        """Per-department student, risk and attendance analytics over the first ``limit`` students."""
+
+    # ============================================
+    # Student Portal
+    # ============================================
+
+    @abstractmethod
+    async def get_student_dashboard(self, student_id: str) -> Dict:
+        """Dashboard summary for a student."""
+
+    @abstractmethod
+    async def get_student_grades(self, student_id: str) -> List[Dict]:
+        """Grades for a student."""
+
+    @abstractmethod
+    async def get_student_courses(self, student_id: str) -> Dict[int, List[Dict]]:
+        """Courses for a student grouped by semester."""
+
+    @abstractmethod
+    async def get_student_assignments(self, student_id: str) -> List[Dict]:
+        """Assignments for a student's courses along with their submissions."""
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """
+    Get the configured storage backend (cached).
+    
+    ``settings.storage_backend`` selects ``"csv"`` (data_store files, default)
+    or ``"sqlite"`` (tables imported with ``scripts/import_data_store.py``).
+    """
+    if settings.storage_backend == "sqlite":
+        from app.core.sqlite_db import SqliteService
+        return SqliteService(settings.storage_database_url)
+    
+    from app.core.csv_db import csv_db
+    return csv_db
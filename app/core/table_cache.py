@@ -0,0 +1,312 @@
+"""
+Opti-Scholar: Table Cache
+In-memory cache of parsed data_store CSV tables with mtime/size invalidation
+"""
+
+import os
+import csv
+import hashlib
+import threading
+from fnmatch import fnmatch
+from typing import List, Dict, Optional, Tuple, Iterable, Callable, Any
+
+from app.core.journal import TableJournal, apply_records
+
+
+# (inode, mtime_ns, size) of a file; None when the file does not exist
+Signature = Optional[Tuple[int, int, int]]
+
+
+def file_signature(path: str) -> Signature:
+    """Cheap change detector for a file or directory, based on a single stat call."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class CachedTable:
+    """Parsed rows of one CSV file at a given on-disk version, plus its hash indexes."""
+
+    def __init__(
+        self,
+        path: str,
+        rows: List[Dict[str, str]],
+        signature: Signature,
+        version: int,
+        indexed_columns: Iterable[str] = ()
+    ):
+        self.path = path
+        self.rows = rows
+        self.signature = signature
+        self.version = version
+        # Journal replay state (only used for journaled tables)
+        self.journal_signature: Signature = None
+        self.journal_offset = 0
+        self.journal_records = 0
+        self.positions: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+        self._positions: Optional[Dict[int, int]] = None
+        self._derived: Dict[str, Tuple[Any, Any]] = {}
+        for column in indexed_columns:
+            self.index(column)
+
+    def index(self, column: str) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Return the hash index ``value -> rows`` for a column.
+        
+        Declared indexes are built when the table is loaded; any other column
+        is indexed on first use. Either way an index is built once per version.
+        """
+        idx = self._indexes.get(column)
+        if idx is None:
+            idx = {}
+            for row in self.rows:
+                idx.setdefault(row.get(column, ""), []).append(row)
+            self._indexes[column] = idx
+        return idx
+
+    def lookup(self, column: str, value: str) -> List[Dict[str, str]]:
+        """All rows whose ``column`` equals ``value`` (O(1) probe)."""
+        return self.index(column).get(value, [])
+
+    def first(self, column: str, value: str) -> Optional[Dict[str, str]]:
+        """First row whose ``column`` equals ``value``, or None."""
+        matches = self.index(column).get(value)
+        return matches[0] if matches else None
+
+    def position(self, row: Dict[str, str]) -> int:
+        """File order of a row of this table, so probe results can be re-sorted cheaply."""
+        if self._positions is None:
+            self._positions = {id(r): i for i, r in enumerate(self.rows)}
+        return self._positions[id(row)]
+
+    def derive(self, name: str, build: Callable[["CachedTable"], Any], depends_on: Any = ()) -> Any:
+        """
+        Aggregate computed from this table version, kept until the table changes.
+        
+        This is the table's materialized view ``name``: ``build(table)`` runs once
+        per version, and again only if ``depends_on`` (e.g. the versions of other
+        tables the aggregate joins with) differs from the last build. Results
+        are shared and must be treated as read-only.
+        """
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == depends_on:
+            return cached[1]
+        value = build(self)
+        self._derived[name] = (depends_on, value)
+        return value
+
+
+class TableCache:
+    """
+    Keep parsed CSV tables in memory and reload only the ones that changed.
+
+    Every lookup costs one ``os.stat``; the file is re-parsed only when its
+    inode, mtime or size differs from the cached copy. Rows handed out by the
+    cache are shared between callers and must be treated as read-only.
+
+    The cache is safe to use from several threads: a table is loaded by one
+    thread at a time, and concurrent readers of the same stale table wait for
+    that single parse instead of repeating it.
+    """
+
+    def __init__(
+        self,
+        indexes: Optional[Dict[str, Tuple[str, ...]]] = None,
+        journaled: Iterable[str] = ()
+    ):
+        """
+        Initialize empty table and directory caches.
+        
+        Args:
+            indexes: Declared indexes as ``{filename pattern: (column, ...)}``,
+                e.g. ``{"submissions.csv": ("id", "student_id")}``
+            journaled: Filenames whose rows are the base CSV plus an append-only
+                journal (see ``TableJournal``), keyed by their ``id`` column
+        """
+        self.indexes = indexes or {}
+        self.journaled = set(journaled)
+        self._tables: Dict[str, CachedTable] = {}
+        self._listings: Dict[str, Tuple[Signature, List[str]]] = {}
+        # Every file and directory read through the cache (never shrinks, see ``signature``)
+        self._watched: Dict[str, None] = {}
+        self._next_version = 1
+        self._lock = threading.Lock()
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> CachedTable:
+        """Return the cached table for ``path``, re-parsing it if the file changed."""
+        with self._path_lock(path):
+            if os.path.basename(path) in self.journaled:
+                return self._get_journaled(path)
+            return self._get_plain(path)
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        """Lock serializing loads of one table."""
+        with self._lock:
+            lock = self._path_locks.get(path)
+            if lock is None:
+                lock = self._path_locks[path] = threading.Lock()
+            return lock
+
+    def _get_plain(self, path: str) -> CachedTable:
+        """Plain CSV table (caller holds its path lock)."""
+        signature = file_signature(path)
+        cached = self._tables.get(path)
+
+        if cached is not None and cached.signature == signature:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        rows = self._parse(path) if signature is not None else []
+        return self._store(path, rows, signature)
+
+    def journal(self, path: str) -> TableJournal:
+        """Journal that belongs to the table at ``path``."""
+        return TableJournal(TableJournal.path_for(path))
+
+    def _get_journaled(self, path: str) -> CachedTable:
+        """
+        Base CSV plus journal replay.
+        
+        When only the journal grew, just the appended tail is read and applied
+        to the previous version, so a submit never forces a full re-parse.
+        """
+        journal = self.journal(path)
+        signature = file_signature(path)
+        journal_signature = file_signature(journal.path)
+        cached = self._tables.get(path)
+
+        if cached is not None and cached.signature == signature:
+            if cached.journal_signature == journal_signature:
+                self.hits += 1
+                return cached
+
+            previous = cached.journal_signature
+            appended = journal_signature is not None and (
+                (previous is None and cached.journal_offset == 0)
+                or (
+                    previous is not None
+                    and previous[0] == journal_signature[0]
+                    and journal_signature[2] >= cached.journal_offset
+                )
+            )
+            if appended:
+                # Same journal file, only appended to: apply the tail
+                records, offset = journal.read_from(cached.journal_offset)
+                rows, positions = apply_records(cached.rows, cached.positions, records)
+                table = self._store(path, rows, signature)
+                table.positions = positions
+                table.journal_signature = journal_signature
+                table.journal_offset = offset
+                table.journal_records = cached.journal_records + len(records)
+                return table
+
+        # Base table changed (or first load): parse and replay the whole journal
+        self.misses += 1
+        base_rows = self._parse(path) if signature is not None else []
+        base_positions = {row.get("id"): i for i, row in enumerate(base_rows)}
+        records, offset = journal.read_from(0)
+        rows, positions = apply_records(base_rows, base_positions, records)
+        table = self._store(path, rows, signature)
+        table.positions = positions
+        table.journal_signature = journal_signature
+        table.journal_offset = offset
+        table.journal_records = len(records)
+        return table
+
+    def _store(self, path: str, rows: List[Dict[str, str]], signature: Signature) -> CachedTable:
+        """Register a new version of a table."""
+        with self._lock:
+            version = self._next_version
+            self._next_version += 1
+            self._watch(path)
+            if os.path.basename(path) in self.journaled:
+                self._watch(TableJournal.path_for(path))
+        table = CachedTable(path, rows, signature, version, self._declared_columns(path))
+        self._tables[path] = table
+        return table
+
+    def rows(self, path: str) -> List[Dict[str, str]]:
+        """Return the (read-only) parsed rows for ``path``."""
+        return self.get(path).rows
+
+    def listdir(self, path: str) -> List[str]:
+        """Return the sorted, non-hidden entries of a directory, cached by directory mtime."""
+        signature = file_signature(path)
+        if signature is None:
+            self._listings.pop(path, None)
+            return []
+
+        cached = self._listings.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        # Dotfiles are lock files and in-flight temp files from atomic writes
+        entries = sorted(e for e in os.listdir(path) if not e.startswith("."))
+        self._listings[path] = (signature, entries)
+        with self._lock:
+            self._watch(path)
+        return entries
+
+    def _watch(self, path: str):
+        """Include a path in ``signature`` (caller holds the cache lock)."""
+        if path not in self._watched:
+            self._watched = {**self._watched, path: None}
+
+    def signature(self) -> Optional[Tuple[str, float]]:
+        """
+        Version of everything read through the cache so far: one ``os.stat`` per file.
+        
+        Covers each table (and journal) and directory listing the cache has
+        loaded, rather than walking the data directory. A response can only
+        depend on files it read, and those are watched from then on, so any
+        later change to them, or a newly read file, changes the token.
+        Paths are never unwatched (not even by ``invalidate``), so a token
+        cannot come back after the data changed. Atomic writes replace the
+        inode, so a rewrite is detected even within one mtime tick.
+        
+        Returns:
+            Tuple of (hex digest, latest modification time as a Unix
+            timestamp), or None before anything was read
+        """
+        watched = self._watched
+        if not watched:
+            return None
+        digest = hashlib.sha1()
+        last_modified = 0
+        for path in sorted(watched):
+            signature = file_signature(path)
+            digest.update(f"{path}:{signature}\n".encode())
+            if signature is not None:
+                last_modified = max(last_modified, signature[1])
+        return digest.hexdigest(), last_modified / 1e9
+
+    def invalidate(self, path: str):
+        """Drop a cached table, e.g. right after this process rewrote the file."""
+        self._tables.pop(path, None)
+        self._listings.pop(os.path.dirname(path), None)
+
+    def clear(self):
+        """Drop every cached table and directory listing."""
+        self._tables.clear()
+        self._listings.clear()
+
+    def _declared_columns(self, path: str) -> List[str]:
+        """Columns declared as indexed for the file at ``path``."""
+        name = os.path.basename(path)
+        columns = []
+        for pattern, cols in self.indexes.items():
+            if fnmatch(name, pattern):
+                columns.extend(c for c in cols if c not in columns)
+        return columns
+
+    def _parse(self, path: str) -> List[Dict[str, str]]:
+        """Parse a CSV file into a list of row dicts."""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
@@ -0,0 +1,166 @@
+"""
+Opti-Scholar: Write Coordinator
+Locking, crash-atomic commits and ID allocation for data_store writes
+"""
+
+import os
+import re
+import csv
+import json
+import asyncio
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Iterable, Callable, TextIO
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows: only the in-process locks apply
+    FCNTL_AVAILABLE = False
+
+
+class WriteCoordinator:
+    """
+    Serialize writers per table, within and across worker processes.
+
+    Each table gets an ``asyncio.Lock`` (coroutines in this process) and an
+    advisory ``flock`` on ``<data_dir>/.locks/<table>.lock`` (other uvicorn
+    workers). Only writers to the same table wait for each other; readers are
+    never blocked because commits are temp-file + rename.
+    """
+
+    def __init__(self, data_dir: str, lock_timeout: float = 10.0, poll_interval: float = 0.005):
+        """
+        Initialize coordinator.
+
+        Args:
+            data_dir: Root of the data store
+            lock_timeout: Seconds to wait for another process to release a table
+            poll_interval: Initial delay between non-blocking lock attempts
+        """
+        self.data_dir = data_dir
+        self.lock_dir = os.path.join(data_dir, ".locks")
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def lock(self, table: str):
+        """
+        Hold the write lock for a table, e.g. ``"submissions.csv"``.
+
+        The process-level lock is polled with non-blocking ``flock`` calls so a
+        busy table in another worker never stalls this worker's event loop.
+        """
+        local = self._locks.setdefault(table, asyncio.Lock())
+        async with local:
+            handle = await self._acquire_file_lock(table)
+            try:
+                yield
+            finally:
+                if handle is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                    handle.close()
+
+    async def _acquire_file_lock(self, table: str):
+        """Take the advisory cross-process lock for a table (None without fcntl)."""
+        if not FCNTL_AVAILABLE:
+            return None
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        handle = open(self._lock_path(table, ".lock"), "a+")
+        deadline = time.monotonic() + self.lock_timeout
+        delay = self.poll_interval
+
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    handle.close()
+                    raise TimeoutError(f"Timed out waiting for write lock on {table}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.1)
+
+    def _lock_path(self, table: str, suffix: str) -> str:
+        """Per-table file under the lock directory."""
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "__", table)
+        return os.path.join(self.lock_dir, safe_name + suffix)
+
+    def next_id(self, table: str, prefix: str, seed_ids: Callable[[], Iterable[str]]) -> str:
+        """
+        Allocate the next monotonic ID for a table (call while holding its lock).
+
+        The counter lives in ``.locks/<table>.seq``. The first allocation seeds
+        it from the highest numeric suffix among ``seed_ids()``, so IDs never
+        collide with rows created before the allocator existed; after that each
+        allocation is a single small read and atomic write.
+
+        Args:
+            table: Table name, e.g. ``"submissions.csv"``
+            prefix: ID prefix, e.g. ``"s"`` for ``s42``
+            seed_ids: Returns the IDs already present in the table
+        """
+        seq_path = self._lock_path(table, ".seq")
+        current = self._read_counter(seq_path)
+
+        if current is None:
+            current = 0
+            pattern = re.compile(rf"^{re.escape(prefix)}(\d+)$")
+            for row_id in seed_ids():
+                match = pattern.match(row_id or "")
+                if match:
+                    current = max(current, int(match.group(1)))
+
+        current += 1
+        os.makedirs(self.lock_dir, exist_ok=True)
+        atomic_write_text(seq_path, json.dumps({"last": current}))
+        return f"{prefix}{current}"
+
+    def _read_counter(self, seq_path: str):
+        """Last allocated number, or None when the table has no counter yet."""
+        try:
+            with open(seq_path, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("last", 0))
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+def atomic_write(path: str, write: Callable[[TextIO], Any]):
+    """
+    Crash-atomic replace of a text file: ``write(f)`` fills a temp file in the
+    same directory, which is fsynced and renamed over ``path``. Readers see
+    either the old or the new content; the temp file is removed on failure.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path: str, text: str):
+    """Write a file so readers see either the old or the new content, never a torn one."""
+    atomic_write(path, lambda f: f.write(text))
+
+
+def atomic_write_csv(path: str, fieldnames: List[str], rows: List[Dict[str, Any]]):
+    """Write a CSV table via temp file + fsync + rename."""
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    atomic_write(path, write)
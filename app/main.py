@@ -9,7 +9,12 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.config import settings
-from app.api.routes import documents, grading, verification, prediction, management, auth, data
+from app.core.http_cache import DataCacheMiddleware
+from app.api.routes import documents, grading, verification, prediction, management, auth, data, jobs
+from app.services.jobs import get_job_queue
+from app.services.grading.tasks import register_grading_jobs
+from app.services.ingestion.tasks import register_ingestion_jobs
+from app.services.ingestion.ocr_pool import get_ocr_pool
 
 
 @asynccontextmanager
@@ -18,9 +23,16 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"Starting {settings.app_name} v{settings.app_version}")
     # CSV Service doesn't need explicit init, just file checks which happen on access
+    # Background workers; jobs left over from a previous run are picked up again
+    queue = get_job_queue()
+    register_grading_jobs(queue)
+    register_ingestion_jobs(queue)
+    queue.start()
     yield
     # Shutdown
     print("Shutting down...")
+    await queue.stop()
+    get_ocr_pool().shutdown()
 
 
 # Create FastAPI app
@@ -33,6 +45,15 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Conditional GETs and response cache for the read-only data endpoints
+# (added before CORS so cached and 304 responses still get CORS headers)
+app.add_middleware(
+    DataCacheMiddleware,
+    prefix="/api/v1/data",
+    exclude=["/api/v1/data/students/export"],
+    max_entries=settings.response_cache_entries,
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"],
 )
 
 
@@ -51,6 +73,7 @@ app.include_router(verification.router, prefix="/api/v1/verification", tags=["Ve
 app.include_router(prediction.router, prefix="/api/v1/prediction", tags=["Prediction"])
 app.include_router(management.router, prefix="/api/v1", tags=["Management"])
 app.include_router(data.router, prefix="/api/v1", tags=["Data"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
 
 
 @app.get("/health")
@@ -47,7 +47,7 @@ class Department(Base):
     __tablename__ = "departments"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"))
+    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"), index=True)
     name: Mapped[str] = mapped_column(String(200))
     code: Mapped[str] = mapped_column(String(20), unique=True)
     coordinator_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
@@ -82,11 +82,11 @@ class Student(Base):
     __tablename__ = "students"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), index=True)
     registration_number: Mapped[str] = mapped_column(String(20), unique=True, index=True)  # Format: YYYYMMDDNN
     enrollment_date: Mapped[datetime] = mapped_column(DateTime)
     current_semester: Mapped[int] = mapped_column(Integer, default=1)
-    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"))
+    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"), index=True)
     department: Mapped[str] = mapped_column(String(100))
     program: Mapped[str] = mapped_column(String(50))  # MSc, PhD, MTech, etc.
     
@@ -102,9 +102,9 @@ class Teacher(Base):
     __tablename__ = "teachers"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), index=True)
     employee_id: Mapped[str] = mapped_column(String(20), unique=True)
-    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"))
+    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"), index=True)
     department: Mapped[str] = mapped_column(String(100))
     designation: Mapped[str] = mapped_column(String(50))
     
@@ -128,8 +128,8 @@ class Course(Base):
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     credits: Mapped[int] = mapped_column(Integer, default=3)
     semester: Mapped[int] = mapped_column(Integer)
-    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"))
-    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"))
+    school_id: Mapped[str] = mapped_column(String(36), ForeignKey("schools.id"), index=True)
+    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"), index=True)
     
     # Relationships
     school: Mapped["School"] = relationship(back_populates="courses")
@@ -144,8 +144,8 @@ class Exam(Base):
     __tablename__ = "exams"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"))
-    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"))
+    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"), index=True)
+    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"), index=True)
     title: Mapped[str] = mapped_column(String(200))
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     exam_date: Mapped[datetime] = mapped_column(DateTime)
@@ -166,6 +166,7 @@ class Rubric(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     exam_id: Mapped[str] = mapped_column(String(36), ForeignKey("exams.id"), unique=True)
     raw_text: Mapped[str] = mapped_column(Text)  # Original teacher input
+    content_hash: Mapped[str] = mapped_column(String(64), index=True)  # sha256 of the normalized raw text
     parsed_schema: Mapped[dict] = mapped_column(JSON)  # Structured JSON
     total_points: Mapped[float] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -183,8 +184,8 @@ class Submission(Base):
     __tablename__ = "submissions"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    exam_id: Mapped[str] = mapped_column(String(36), ForeignKey("exams.id"))
-    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"))
+    exam_id: Mapped[str] = mapped_column(String(36), ForeignKey("exams.id"), index=True)
+    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"), index=True)
     
     # Document info
     document_path: Mapped[str] = mapped_column(String(500))
@@ -228,7 +229,7 @@ class Grade(Base):
     # pending, auto_approved, flagged, reviewed, final
     
     # Review
-    reviewed_by: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("teachers.id"), nullable=True)
+    reviewed_by: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("teachers.id"), index=True, nullable=True)
     review_notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Feedback
@@ -254,7 +255,7 @@ class AnomalyCheck(Base):
     __tablename__ = "anomaly_checks"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    grade_id: Mapped[str] = mapped_column(String(36), ForeignKey("grades.id"))
+    grade_id: Mapped[str] = mapped_column(String(36), ForeignKey("grades.id"), index=True)
     
     # Z-Score analysis
     z_score: Mapped[float] = mapped_column(Float)
@@ -278,7 +279,7 @@ class DistributionAnalysis(Base):
     __tablename__ = "distribution_analyses"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    exam_id: Mapped[str] = mapped_column(String(36), ForeignKey("exams.id"))
+    exam_id: Mapped[str] = mapped_column(String(36), ForeignKey("exams.id"), index=True)
     
     # Statistics
     count: Mapped[int] = mapped_column(Integer)
@@ -308,8 +309,8 @@ class Attendance(Base):
     __tablename__ = "attendance"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"))
-    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"))
+    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"), index=True)
+    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"), index=True)
     date: Mapped[datetime] = mapped_column(DateTime)
     status: Mapped[str] = mapped_column(String(10))  # present, absent, late, excused
     
@@ -323,7 +324,7 @@ class AttendancePattern(Base):
     __tablename__ = "attendance_patterns"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"))
+    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"), index=True)
     
     pattern_type: Mapped[str] = mapped_column(String(200))
     confidence: Mapped[float] = mapped_column(Float)
@@ -338,8 +339,8 @@ class SubjectCorrelation(Base):
     __tablename__ = "subject_correlations"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"))
-    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"))
+    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"), index=True)
+    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"), index=True)
     
     pearson_r: Mapped[float] = mapped_column(Float)
     p_value: Mapped[float] = mapped_column(Float)
@@ -353,7 +354,7 @@ class RiskAssessment(Base):
     __tablename__ = "risk_assessments"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"))
+    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"), index=True)
     
     risk_level: Mapped[str] = mapped_column(String(20))  # low, medium, high, critical
     probability: Mapped[float] = mapped_column(Float)
@@ -377,8 +378,8 @@ class CourseResource(Base):
     __tablename__ = "course_resources"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"))
-    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"))
+    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"), index=True)
+    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"), index=True)
     title: Mapped[str] = mapped_column(String(200))
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     resource_type: Mapped[str] = mapped_column(String(20))  # pdf, video, link, document
@@ -413,7 +414,7 @@ class Ticket(Base):
     __tablename__ = "tickets"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"))
+    student_id: Mapped[str] = mapped_column(String(36), ForeignKey("students.id"), index=True)
     
     subject: Mapped[str] = mapped_column(String(200))
     message: Mapped[str] = mapped_column(Text)
@@ -437,9 +438,9 @@ class Notification(Base):
     __tablename__ = "notifications"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"))
-    student_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("students.id"), nullable=True)  # Null for course-wide
-    course_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("courses.id"), nullable=True)
+    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"), index=True)
+    student_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("students.id"), index=True, nullable=True)  # Null for course-wide
+    course_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("courses.id"), index=True, nullable=True)
     
     notification_type: Mapped[str] = mapped_column(String(20))  # leave, class_postponed, extra_class, announcement
     title: Mapped[str] = mapped_column(String(200))
@@ -464,8 +465,8 @@ class AttendanceImage(Base):
     __tablename__ = "attendance_images"
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"))
-    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"))
+    course_id: Mapped[str] = mapped_column(String(36), ForeignKey("courses.id"), index=True)
+    teacher_id: Mapped[str] = mapped_column(String(36), ForeignKey("teachers.id"), index=True)
     
     image_path: Mapped[str] = mapped_column(String(500))
     class_date: Mapped[datetime] = mapped_column(DateTime)
@@ -0,0 +1,247 @@
+"""
+Opti-Scholar: Data Store Models
+SQLAlchemy tables mirroring the data_store CSV files for the SQLite storage backend
+
+These are deliberately not the platform models in ``app.models.models``.
+The data API serves the data_store rows as they are: denormalized (a
+submission carries the student's name and registration number, a student
+row its school and semester file) and keyed by the CSV IDs. The platform
+models are normalized around users, exams and grades with foreign keys,
+and have no place for those rows or their file order. ``SqliteService``
+has to return exactly what ``CsvService`` returns. That is why each table
+here is one CSV file, column for column. Per-school files take the columns
+the data API reads. Added columns only record where a row came from
+(school, semester file, position). The tables live in
+their own database (``STORAGE_DATABASE_URL``) and metadata, so neither
+schema constrains the other.
+
+The CSV files remain the source of truth. ``import_data_store`` rebuilds
+these tables from them. ``tests/integration/test_storage_parity.py``
+checks that both backends return the same results, and that every table
+here still has every column of its CSV file.
+"""
+
+from typing import Optional
+from sqlalchemy import String, Integer, Float, Text, Index
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class StoreBase(DeclarativeBase):
+    """Base class for data store tables (kept apart from the platform models' metadata)."""
+    pass
+
+
+# ============================================
+# Organizational Structure
+# ============================================
+
+class StoreSchool(StoreBase):
+    """Row of schools.csv."""
+    __tablename__ = "store_schools"
+
+    code: Mapped[str] = mapped_column(String(20), primary_key=True)
+    id: Mapped[str] = mapped_column(String(36))
+    name: Mapped[str] = mapped_column(String(200))
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    position: Mapped[int] = mapped_column(Integer, index=True)  # File order
+
+
+class StoreSchoolInfo(StoreBase):
+    """Row of <school>/info.csv."""
+    __tablename__ = "store_school_info"
+
+    school_code: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    value: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+class StoreDepartment(StoreBase):
+    """Row of <school>/departments.csv."""
+    __tablename__ = "store_departments"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    school_code: Mapped[str] = mapped_column(String(20), index=True)
+    name: Mapped[str] = mapped_column(String(200))
+    code: Mapped[str] = mapped_column(String(20))
+
+
+class StoreCourse(StoreBase):
+    """Row of <school>/courses.csv."""
+    __tablename__ = "store_courses"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    school_code: Mapped[str] = mapped_column(String(20), index=True)
+    code: Mapped[str] = mapped_column(String(20), index=True)
+    name: Mapped[str] = mapped_column(String(200))
+    credits: Mapped[int] = mapped_column(Integer, default=3)
+    semester: Mapped[int] = mapped_column(Integer)
+    teacher_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+
+
+class StoreStudent(StoreBase):
+    """Row of <school>/students/sem_<n>.csv."""
+    __tablename__ = "store_students"
+    __table_args__ = (
+        Index("ix_store_students_order", "school_position", "semester", "position"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    registration_number: Mapped[str] = mapped_column(String(20), index=True)
+    name: Mapped[str] = mapped_column(String(100))
+    email: Mapped[str] = mapped_column(String(100), index=True)
+    department: Mapped[str] = mapped_column(String(100), index=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    school_code: Mapped[str] = mapped_column(String(20), index=True)
+    semester: Mapped[int] = mapped_column(Integer, index=True)
+    school_position: Mapped[int] = mapped_column(Integer)  # Order of the school in schools.csv
+    position: Mapped[int] = mapped_column(Integer)  # Row order within the semester file
+
+
+# ============================================
+# Users & Teaching
+# ============================================
+
+class StoreUser(StoreBase):
+    """Row of users.csv."""
+    __tablename__ = "store_users"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    email: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    password: Mapped[str] = mapped_column(String(255))
+    role: Mapped[str] = mapped_column(String(20))
+    full_name: Mapped[str] = mapped_column(String(100))
+    student_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+
+
+class StoreTeacherCourse(StoreBase):
+    """Row of teacher_courses.csv."""
+    __tablename__ = "store_teacher_courses"
+
+    pk: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    teacher_id: Mapped[str] = mapped_column(String(36))
+    teacher_email: Mapped[str] = mapped_column(String(100), index=True)
+    course_id: Mapped[str] = mapped_column(String(36))
+    course_code: Mapped[str] = mapped_column(String(20), index=True)
+    course_name: Mapped[str] = mapped_column(String(200))
+    school_code: Mapped[str] = mapped_column(String(20))
+    semester: Mapped[int] = mapped_column(Integer)
+    total_students: Mapped[int] = mapped_column(Integer)
+    credits: Mapped[int] = mapped_column(Integer)
+
+
+class StoreAssignment(StoreBase):
+    """Row of assignments.csv."""
+    __tablename__ = "store_assignments"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    course_code: Mapped[str] = mapped_column(String(20), index=True)
+    course_name: Mapped[str] = mapped_column(String(200))
+    assignment_title: Mapped[str] = mapped_column(String(200))
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    max_score: Mapped[int] = mapped_column(Integer)
+    due_date: Mapped[str] = mapped_column(String(20))
+    created_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    position: Mapped[int] = mapped_column(Integer, index=True)
+
+
+class StoreSubmission(StoreBase):
+    """Row of submissions.csv (including journaled rows)."""
+    __tablename__ = "store_submissions"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, unique=True)  # Numeric part of the ID, for ordering/allocation
+    assignment_id: Mapped[str] = mapped_column(String(36), index=True)
+    student_id: Mapped[str] = mapped_column(String(36), index=True)
+    student_name: Mapped[str] = mapped_column(String(100))
+    student_reg: Mapped[str] = mapped_column(String(20))
+    course_code: Mapped[str] = mapped_column(String(20), index=True)
+    submission_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    file_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    submitted_at: Mapped[str] = mapped_column(String(20))
+    ai_score: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    ai_feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    ai_reasoning: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    teacher_verified: Mapped[str] = mapped_column(String(5), default="false")
+    teacher_score: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    teacher_feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), index=True)
+
+
+# ============================================
+# Attendance, Grades & Risk
+# ============================================
+
+class StoreCourseAttendance(StoreBase):
+    """Row of course_attendance.csv."""
+    __tablename__ = "store_course_attendance"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    course_code: Mapped[str] = mapped_column(String(20), index=True)
+    course_name: Mapped[str] = mapped_column(String(200))
+    student_id: Mapped[str] = mapped_column(String(36), index=True)
+    student_name: Mapped[str] = mapped_column(String(100))
+    student_reg: Mapped[str] = mapped_column(String(20))
+    total_classes: Mapped[int] = mapped_column(Integer)
+    attended: Mapped[int] = mapped_column(Integer)
+    attendance_rate: Mapped[float] = mapped_column(Float)
+    last_updated: Mapped[str] = mapped_column(String(20))
+    position: Mapped[int] = mapped_column(Integer)
+
+
+class StoreAttendanceSummary(StoreBase):
+    """Row of attendance_summary.csv."""
+    __tablename__ = "store_attendance_summary"
+
+    student_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    student_name: Mapped[str] = mapped_column(String(100))
+    student_reg: Mapped[str] = mapped_column(String(20))
+    school_code: Mapped[str] = mapped_column(String(20), index=True)
+    department: Mapped[str] = mapped_column(String(100))
+    total_classes: Mapped[int] = mapped_column(Integer)
+    attended: Mapped[int] = mapped_column(Integer)
+    attendance_rate: Mapped[float] = mapped_column(Float)
+    absent_days: Mapped[int] = mapped_column(Integer)
+    late_days: Mapped[int] = mapped_column(Integer)
+    position: Mapped[int] = mapped_column(Integer)
+
+
+class StoreGradeSummary(StoreBase):
+    """Row of grades_summary.csv."""
+    __tablename__ = "store_grades_summary"
+
+    pk: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    student_id: Mapped[str] = mapped_column(String(36), index=True)
+    student_name: Mapped[str] = mapped_column(String(100))
+    student_reg: Mapped[str] = mapped_column(String(20))
+    school_code: Mapped[str] = mapped_column(String(20))
+    department: Mapped[str] = mapped_column(String(100))
+    semester: Mapped[int] = mapped_column(Integer)
+    course_code: Mapped[str] = mapped_column(String(20), index=True)
+    course_name: Mapped[str] = mapped_column(String(200))
+    midterm_score: Mapped[float] = mapped_column(Float)
+    assignment_avg: Mapped[float] = mapped_column(Float)
+    quiz_avg: Mapped[float] = mapped_column(Float)
+    current_grade: Mapped[float] = mapped_column(Float)
+    grade_letter: Mapped[str] = mapped_column(String(5))
+    status: Mapped[str] = mapped_column(String(20))
+
+
+class StoreRiskAssessment(StoreBase):
+    """Row of risk_assessments.csv."""
+    __tablename__ = "store_risk_assessments"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    student_id: Mapped[str] = mapped_column(String(36), index=True)
+    student_name: Mapped[str] = mapped_column(String(100))
+    student_reg: Mapped[str] = mapped_column(String(20))
+    school_code: Mapped[str] = mapped_column(String(20), index=True)
+    department: Mapped[str] = mapped_column(String(100))
+    risk_level: Mapped[str] = mapped_column(String(20), index=True)
+    probability: Mapped[float] = mapped_column(Float)
+    attendance_rate: Mapped[float] = mapped_column(Float)
+    grade_average: Mapped[float] = mapped_column(Float)
+    factors: Mapped[str] = mapped_column(Text)  # ';'-separated, as in the CSV
+    recommended_actions: Mapped[str] = mapped_column(Text)  # ';'-separated, as in the CSV
+    assessed_at: Mapped[str] = mapped_column(String(20))
+    position: Mapped[int] = mapped_column(Integer)
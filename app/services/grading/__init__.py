@@ -2,5 +2,16 @@
 from app.services.grading.semantic_scorer import SemanticScorer
 from app.services.grading.confidence import ConfidenceQuantifier
 from app.services.grading.feedback import FeedbackGenerator
+from app.services.grading.fallback import heuristic_grade, heuristic_grade_batch
+from app.services.grading.local_scorer import LocalScorer, get_local_scorer
+from app.services.grading.submission import grade_submission_text
+from app.services.grading.batch import BatchGrader, BatchProgress
+from app.services.grading.pipeline import GradingPipeline, get_grading_pipeline
+from app.services.grading.tasks import register_grading_jobs
 
-__all__ = ["SemanticScorer", "ConfidenceQuantifier", "FeedbackGenerator"]
+__all__ = [
+    "SemanticScorer", "ConfidenceQuantifier", "FeedbackGenerator", "heuristic_grade",
+    "heuristic_grade_batch", "LocalScorer", "get_local_scorer",
+    "grade_submission_text", "BatchGrader", "BatchProgress", "register_grading_jobs",
+    "GradingPipeline", "get_grading_pipeline",
+]
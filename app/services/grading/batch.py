@@ -0,0 +1,287 @@
+"""
+Opti-Scholar: Batch Grading Service
+Grade every pending submission of an assignment in one background job
+"""
+
+import json
+import asyncio
+from typing import List, Dict, Optional, Any
+
+from app.core.config import settings
+from app.services.grading.fallback import heuristic_grade, heuristic_grade_batch
+from app.services.jobs import JobQueue, JobContext, get_job_queue
+from app.services.llm import (
+    LLMGateway, get_llm_gateway, get_grading_cache, grading_cache_key, BATCH_GRADE_SCHEMA, parse_grades,
+)
+
+
+class BatchProgress:
+    """Counters of one batch grading run, reported to the job queue as it advances."""
+
+    def __init__(self, assignment_id: str, context: Optional[JobContext] = None):
+        self.assignment_id = assignment_id
+        self.context = context
+        self.total = 0
+        self.graded = 0  # Graded by the LLM (or served from the grading cache)
+        self.fallback = 0  # Graded by the offline heuristic
+        self.prompts = 0  # LLM calls made
+        self.updated = 0  # Rows written back to storage
+
+    @property
+    def done(self) -> int:
+        """Submissions graded so far, by any scorer."""
+        return self.graded + self.fallback
+
+    async def report(self):
+        """Publish the counters on the job's status."""
+        if self.context is not None:
+            await self.context.report(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly snapshot."""
+        return {
+            "assignment_id": self.assignment_id,
+            "total": self.total,
+            "done": self.done,
+            "progress": round(self.done / self.total, 3) if self.total else 0.0,
+            "graded": self.graded,
+            "fallback": self.fallback,
+            "prompts": self.prompts,
+            "updated": self.updated,
+        }
+
+
+class BatchGrader:
+    """
+    Grade all pending submissions of an assignment with as few LLM calls as possible.
+
+    Answers are packed several to a prompt, as long as the assignment text and
+    answers fit the prompt budget, and chunks run concurrently; the shared LLM
+    gateway enforces the concurrency and rate limits. Results go back to
+    storage in one bulk update at the end of the run.
+    """
+
+    # Bump when BATCH_PROMPT changes, to retire cached grades
+    PROMPT_VERSION = "batch-v2"
+
+    # Stored by /submit; the row moves to pending_review once it has an AI grade
+    PENDING_STATUSES = ("submitted",)
+    # Awaiting teacher review, graded again with ``regrade`` (or when it has no AI grade yet)
+    REVIEW_STATUS = "pending_review"
+
+    BATCH_PROMPT = """You are an expert academic grader. Grade each of the following student submissions for the same assignment independently.
+
+Assignment Description: {description}
+Maximum Score: {max_score}
+
+Submissions (JSON):
+{submissions}
+
+Respond with a JSON array holding one object per submission:
+[{{"id": "<submission id>", "score": <number out of {max_score}>, "feedback": "<brief feedback for the student, 1-2 sentences>", "reasoning": "<reasoning for the grade, 2-3 sentences>"}}]"""
+
+    def __init__(
+        self,
+        storage,
+        llm: Optional[LLMGateway] = None,
+        cache=None,
+        queue: Optional[JobQueue] = None,
+        answers_per_prompt: Optional[int] = None,
+        max_prompt_chars: Optional[int] = None
+    ):
+        """
+        Initialize batch grader.
+
+        Args:
+            storage: Storage backend holding assignments and submissions
+            llm: LLM gateway (the shared one by default)
+            cache: Grading result cache (the shared one by default)
+            queue: Job queue holding per-submission grading jobs (the shared one by default)
+            answers_per_prompt: Most answers packed into one prompt
+            max_prompt_chars: Prompt size above which answers are not packed together
+        """
+        self.storage = storage
+        self.llm = llm or get_llm_gateway()
+        self.cache = cache or get_grading_cache()
+        self.queue = queue or get_job_queue()
+        self.answers_per_prompt = max(1, answers_per_prompt or settings.batch_answers_per_prompt)
+        self.max_prompt_chars = max_prompt_chars or settings.batch_prompt_max_chars
+
+    async def pending_submissions(self, assignment_id: str, regrade: bool = False) -> List[Dict]:
+        """
+        Submissions of an assignment that still need an AI grade.
+
+        These are unverified rows that are ``submitted`` or awaiting review
+        without an AI grade (no AI feedback was recorded). Rows whose own
+        ``grade_submission`` job is still queued, running or retrying are left
+        to that job; rows whose job was dead-lettered are graded here.
+
+        Args:
+            assignment_id: Assignment ID
+            regrade: Also re-grade AI-graded submissions awaiting teacher review
+        """
+        in_progress = {
+            payload.get("submission_id") for payload in await self.queue.active_payloads("grade_submission")
+        }
+        return [
+            s for s in await self.storage.get_assignment_submissions(assignment_id)
+            if not s["teacher_verified"] and s["id"] not in in_progress and self._needs_grade(s, regrade)
+        ]
+
+    def _needs_grade(self, submission: Dict, regrade: bool) -> bool:
+        """Whether an unverified submission is due for (re-)grading."""
+        if submission["status"] in self.PENDING_STATUSES:
+            return True
+        if submission["status"] == self.REVIEW_STATUS:
+            return regrade or not (submission["ai_feedback"] or submission["ai_reasoning"])
+        return False
+
+    async def run(self, assignment: Dict, regrade: bool = False, context: Optional[JobContext] = None) -> Dict[str, Any]:
+        """
+        Grade the assignment's pending submissions and write the grades back.
+
+        Args:
+            assignment: Raw assignment row (``id``, ``description``, ``max_score``)
+            regrade: Also re-grade submissions awaiting teacher review
+            context: Job to report progress on as chunks finish
+
+        Returns:
+            Final progress counters
+        """
+        progress = BatchProgress(assignment["id"], context)
+        submissions = await self.pending_submissions(assignment["id"], regrade)
+        progress.total = len(submissions)
+        await progress.report()
+
+        results = await self.grade(assignment, submissions, progress)
+
+        progress.updated = await self.storage.update_submissions({
+            sid: {
+                "ai_score": int(round(r["score"])),
+                "ai_feedback": r["feedback"],
+                "ai_reasoning": r["reasoning"],
+                "status": self.REVIEW_STATUS
+            }
+            for sid, r in results.items()
+        })
+        await progress.report()
+        return progress.to_dict()
+
+    async def grade(self, assignment: Dict, submissions: List[Dict], progress: BatchProgress) -> Dict[str, Dict]:
+        """
+        Grade submissions, returning ``{submission_id: {"score", "feedback", "reasoning"}}``.
+
+        Without a configured LLM every answer goes to the local scorer, in one
+        vectorized pass.
+        """
+        max_score = int(assignment["max_score"])
+        results: Dict[str, Dict] = {}
+
+        if not self.llm.available:
+            grades = heuristic_grade_batch(
+                [s["submission_text"] for s in submissions], max_score, assignment.get("description", "")
+            )
+            for s, (score, feedback, reasoning) in zip(submissions, grades):
+                results[s["id"]] = {"score": score, "feedback": feedback, "reasoning": reasoning}
+            progress.fallback += len(submissions)
+            return results
+
+        rubric = {"description": assignment.get("description", ""), "max_score": max_score}
+        keys = {}
+        uncached = []
+        for s in submissions:
+            keys[s["id"]] = grading_cache_key(
+                s["submission_text"], rubric, self.llm.model, None, self.PROMPT_VERSION
+            )
+            cached = await self.cache.get(keys[s["id"]])
+            if cached is not None:
+                results[s["id"]] = cached
+                progress.graded += 1
+            else:
+                uncached.append(s)
+
+        chunks = self._chunk(rubric, uncached)
+        graded = await asyncio.gather(*(self._grade_chunk(rubric, chunk, progress) for chunk in chunks))
+        for chunk_results in graded:
+            for sid, (result, from_llm) in chunk_results.items():
+                results[sid] = result
+                if from_llm:
+                    await self.cache.set(keys[sid], result)
+        return results
+
+    def _chunk(self, rubric: Dict, submissions: List[Dict]) -> List[List[Dict]]:
+        """Pack answers greedily into prompts of at most ``answers_per_prompt`` answers and ``max_prompt_chars``."""
+        base = len(self.BATCH_PROMPT) + len(rubric["description"])
+        chunks: List[List[Dict]] = []
+        current: List[Dict] = []
+        size = base
+        for s in submissions:
+            length = len(s["submission_text"]) + 64  # Answer plus its JSON framing
+            if current and (len(current) >= self.answers_per_prompt or size + length > self.max_prompt_chars):
+                chunks.append(current)
+                current, size = [], base
+            current.append(s)
+            size += length
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _grade_chunk(self, rubric: Dict, chunk: List[Dict], progress: BatchProgress) -> Dict[str, tuple]:
+        """
+        Grade one chunk with a single LLM call.
+
+        Answers the model skipped are re-graded one per prompt; if a
+        single-answer call fails the heuristic scorer takes over.
+
+        Returns:
+            Submission ID -> (result, graded_by_llm)
+        """
+        max_score = rubric["max_score"]
+        prompt = self.BATCH_PROMPT.format(
+            description=rubric["description"],
+            max_score=max_score,
+            submissions=json.dumps(
+                [{"id": s["id"], "text": s["submission_text"]} for s in chunk],
+                ensure_ascii=False, indent=1
+            )
+        )
+
+        try:
+            progress.prompts += 1
+            response_text = await self.llm.generate(prompt, schema=BATCH_GRADE_SCHEMA)
+            parsed = parse_grades(response_text, max_score)
+        except Exception as e:
+            print(f"Batch grading chunk error: {e}")
+            parsed = {}
+            if len(chunk) == 1:
+                s = chunk[0]
+                return {s["id"]: (self._fallback(s, rubric, progress), False)}
+
+        results = {}
+        missing = []
+        for s in chunk:
+            if s["id"] in parsed:
+                results[s["id"]] = (parsed[s["id"]], True)
+                progress.graded += 1
+            else:
+                missing.append(s)
+        if len(missing) < len(chunk):
+            await progress.report()
+
+        if missing and len(chunk) == 1:
+            s = missing[0]
+            results[s["id"]] = (self._fallback(s, rubric, progress), False)
+        elif missing:
+            retried = await asyncio.gather(*(self._grade_chunk(rubric, [s], progress) for s in missing))
+            for single in retried:
+                results.update(single)
+        return results
+
+    @staticmethod
+    def _fallback(submission: Dict, rubric: Dict, progress: BatchProgress) -> Dict:
+        """Offline local-scorer grade for one submission."""
+        score, feedback, reasoning = heuristic_grade(
+            submission["submission_text"], rubric["max_score"], rubric["description"]
+        )
+        progress.fallback += 1
+        return {"score": score, "feedback": feedback, "reasoning": reasoning}
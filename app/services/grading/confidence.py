@@ -3,7 +3,11 @@ Opti-Scholar: Confidence Quantifier Service
 Assess AI grading confidence for quality control
 """
 
-from typing import Optional
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
 
 
 class ConfidenceQuantifier:
@@ -76,13 +80,126 @@ class ConfidenceQuantifier:
         
         return min(1.0, max(0.0, confidence))
     
+    def quantify_batch(self, grading_results: List[dict]) -> Dict[str, np.ndarray]:
+        """
+        ``quantify`` and the ``get_uncertainty_sources`` checks for many results at once.
+        
+        The per-criterion reasoning lengths of all results are flattened
+        into one array and reduced per result with ``np.bincount``, so the
+        cost beyond reading the dicts is a handful of NumPy operations.
+        
+        Args:
+            grading_results: Outputs from SemanticScorer
+            
+        Returns:
+            Arrays aligned with ``grading_results``: ``confidence``,
+            ``coverage``, ``score_ratio`` (NaN without a max score),
+            ``reasoning_quality``, ``status`` (auto_approved / soft_flagged /
+            hard_flagged), ``needs_review``, and the uncertainty flags
+            ``missing_reasoning`` (criteria without reasoning), ``very_high``
+            and ``very_low``, which like ``get_uncertainty_sources`` are only
+            raised below 0.7 confidence
+        """
+        n = len(grading_results)
+        criteria = [r.get("criteria_scores") or [] for r in grading_results]
+        counts = np.fromiter((len(c) for c in criteria), dtype=np.int64, count=n)
+        owner = np.repeat(np.arange(n), counts)
+        lengths = np.fromiter(
+            (len(c.get("reasoning") or "") for cs in criteria for c in cs), dtype=np.int64, count=int(counts.sum())
+        )
+        totals = np.fromiter((r.get("total_score", 0) or 0 for r in grading_results), dtype=float, count=n)
+        max_scores = np.fromiter((r.get("max_score", 10) or 0 for r in grading_results), dtype=float, count=n)
+        
+        has_criteria = counts > 0
+        safe_counts = np.where(has_criteria, counts, 1)
+        
+        # Factor 1: Rubric coverage (40%)
+        addressed = np.bincount(owner, weights=lengths > 0, minlength=n)
+        coverage = np.where(has_criteria, addressed / safe_counts, 0.0)
+        
+        # Factor 2: Score distribution (30%), middle scores most confident
+        has_max = max_scores > 0
+        ratio = np.divide(totals, max_scores, out=np.full(n, np.nan), where=has_max)
+        distribution = np.select(
+            [(ratio >= 0.3) & (ratio <= 0.7), ((ratio >= 0.1) & (ratio < 0.3)) | ((ratio > 0.7) & (ratio <= 0.9))],
+            [1.0, 0.8],
+            default=0.6
+        )
+        
+        # Factor 3: Reasoning quality (30%)
+        per_criterion = np.select([lengths > 50, lengths > 20, lengths > 0], [1.0, 0.8, 0.5], default=0.0)
+        reasoning = np.where(has_criteria, np.bincount(owner, weights=per_criterion, minlength=n) / safe_counts, 0.0)
+        
+        confidence = np.clip(0.4 * coverage + np.where(has_max, 0.3 * distribution, 0.0) + 0.3 * reasoning, 0.0, 1.0)
+        
+        uncertain = confidence < 0.7
+        return {
+            "confidence": confidence,
+            "coverage": coverage,
+            "score_ratio": ratio,
+            "reasoning_quality": reasoning,
+            "status": np.select(
+                [confidence >= settings.confidence_auto_approve, confidence >= settings.confidence_hard_flag],
+                ["auto_approved", "soft_flagged"],
+                default="hard_flagged"
+            ),
+            "needs_review": confidence < settings.confidence_hard_flag,
+            "missing_reasoning": np.where(uncertain, counts - addressed.astype(np.int64), 0),
+            "very_high": uncertain & has_max & (ratio > 0.95),
+            "very_low": uncertain & has_max & (ratio < 0.1),
+        }
+    
+    def quantify_local(self, local_result: dict) -> float:
+        """
+        Confidence in a local (BM25) scorer result.
+        
+        Keyword coverage is reliable when it is clear-cut. Partial coverage is
+        where term matching and real understanding diverge, so confidence
+        falls as criteria land in the middle of their range. A criterion with
+        no matching terms counts as only half as clear as a fully covered one,
+        since the answer may address it in other words.
+        
+        The result is calibrated against ``confidence_local_accept``, the
+        level at which the grading pipeline keeps a local grade:
+        
+        - Passing results (half marks or more on average) can reach it when
+          their criteria are clearly covered, but stay just below
+          ``confidence_auto_approve``. Keyword coverage alone never approves
+          a grade: an answer that pastes the rubric matches every criterion,
+          so a local pass is always soft-flagged for a teacher.
+        - Failing results are capped at ``confidence_hard_flag``, below the
+          local-accept level, so a weak answer always goes to the LLM.
+        
+        Args:
+            local_result: Output from ``SemanticScorer.local_grade``
+            
+        Returns:
+            Confidence score between 0.5 and just below ``confidence_auto_approve``
+        """
+        criteria_scores = local_result.get("criteria_scores", [])
+        if not criteria_scores:
+            return 0.5
+        fractions = [c["score"] / c["max_score"] if c.get("max_score") else 0.5 for c in criteria_scores]
+        decisiveness = [abs(2 * f - 1) * (1.0 if f >= 0.5 else 0.5) for f in fractions]
+        confidence = 0.5 + 0.5 * sum(decisiveness) / len(decisiveness)
+        if sum(fractions) / len(fractions) >= 0.5:
+            return min(confidence, settings.confidence_auto_approve - 0.01)
+        return min(confidence, settings.confidence_hard_flag)
+    
+    def status(self, confidence: float) -> str:
+        """Review status for a confidence: auto_approved, soft_flagged or hard_flagged."""
+        if confidence >= settings.confidence_auto_approve:
+            return "auto_approved"
+        elif confidence >= settings.confidence_hard_flag:
+            return "soft_flagged"
+        return "hard_flagged"
+    
     def needs_review(
         self,
         confidence: float,
         threshold: Optional[float] = None
     ) -> bool:
         """Check if grade needs human review based on confidence."""
-        from app.core.config import settings
         threshold = threshold or settings.confidence_hard_flag
         return confidence < threshold
     
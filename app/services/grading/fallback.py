@@ -0,0 +1,51 @@
+"""
+Opti-Scholar: Fallback Scorer
+Offline grading used when the LLM is unavailable or fails
+"""
+
+from typing import List, Tuple
+
+from app.services.grading.local_scorer import get_local_scorer
+
+
+def heuristic_grade(submission_text: str, max_score: float, description: str = "") -> Tuple[float, str, str]:
+    """
+    Offline (score, feedback, reasoning) used when Gemini is unavailable.
+
+    Scored by the local BM25 scorer against the assignment description; the
+    word-count buckets are only used when there is no description to score
+    against.
+    """
+    return heuristic_grade_batch([submission_text], max_score, description)[0]
+
+
+def heuristic_grade_batch(submission_texts: List[str], max_score: float,
+                          description: str = "") -> List[Tuple[float, str, str]]:
+    """``heuristic_grade`` for many submissions to the same assignment, scored in one vectorized pass."""
+    criteria = [description] if description and description.strip() else []
+    try:
+        results = get_local_scorer().score_batch(submission_texts, criteria, max_score)
+    except ValueError:
+        return [word_count_grade(text, max_score) for text in submission_texts]
+    return [(r["score"], r["feedback"], r["reasoning"]) for r in results]
+
+
+def word_count_grade(submission_text: str, max_score: float) -> Tuple[float, str, str]:
+    """Word-count based (score, feedback, reasoning), for submissions without anything to score against."""
+    word_count = len(submission_text.split())
+    if word_count < 50:
+        return (max_score * 0.4,
+                "Submission is too brief. Please provide more detailed explanations.",
+                "Analysis shows insufficient depth. Word count below minimum threshold.")
+    elif word_count < 150:
+        return (max_score * 0.6,
+                "Good start, but could use more detail and examples.",
+                "Demonstrates basic understanding but lacks depth.")
+    elif word_count < 300:
+        return (max_score * 0.8,
+                "Well-written submission with good coverage of the topic.",
+                "Strong submission demonstrating solid understanding.")
+    else:
+        return (max_score * 0.9,
+                "Excellent comprehensive submission with thorough analysis.",
+                "Exceptional work showing comprehensive understanding.")
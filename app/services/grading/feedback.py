@@ -4,22 +4,35 @@ Generate personalized, constructive feedback for students using Gemini
 """
 
 import json
-from typing import Optional
-import google.generativeai as genai
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
 from app.core.config import settings
+from app.services.grading.feedback_cache import FeedbackCache, get_feedback_cache
+from app.services.llm import (
+    LLMGateway, get_llm_gateway, FEEDBACK_SCHEMA, GradingOutputError, load_json_lenient, PromptBuilder, prompt_prefix,
+)
 
 
 class FeedbackGenerator:
     """Generate personalized feedback based on grading results."""
     
-    SYSTEM_PROMPT = """You are a supportive academic mentor. Generate personalized feedback for a student based on their grading result.
+    # Bump when the feedback prompts change, to retire cached feedback
+    PROMPT_VERSION = "feedback-v1"
+    
+    GUIDELINES = """You are a supportive academic mentor. Generate personalized feedback for a student based on their grading result.
 
 Your feedback should be:
 1. ENCOURAGING - Start with positives
 2. SPECIFIC - Mention exact areas for improvement
 3. ACTIONABLE - Give concrete next steps
-4. AGE-APPROPRIATE - Professional but warm
+4. AGE-APPROPRIATE - Professional but warm"""
+
+    TONE_RULES = """Match tone to score:
+- 90-100%: celebratory
+- 60-89%: encouraging  
+- Below 60%: constructive (still positive!)"""
+
+    SYSTEM_PROMPT = GUIDELINES + """
 
 Output MUST be valid JSON:
 {
@@ -30,18 +43,53 @@ Output MUST be valid JSON:
     "tone": "encouraging" | "constructive" | "celebratory"
 }
 
-Match tone to score:
-- 90-100%: celebratory
-- 60-89%: encouraging  
-- Below 60%: constructive (still positive!)"""
+""" + TONE_RULES
 
-    def __init__(self):
-        """Initialize generator with Gemini client."""
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
-            self.model = genai.GenerativeModel(settings.gemini_model)
-        else:
-            self.model = None
+    # Line per item, so each item can be shown as soon as its line is complete
+    STREAM_SYSTEM_PROMPT = GUIDELINES + """
+
+Write plain text lines, no JSON and no Markdown, in this order:
+SUMMARY: <2-3 sentence overall feedback, on one line>
+STRENGTH: <one strength per line, 2-3 lines>
+IMPROVEMENT: <one area per line, 2-3 lines>
+NEXT_STEP: <one concrete action per line, 2-4 lines>
+TONE: encouraging | constructive | celebratory
+
+""" + TONE_RULES
+
+    # Streamed line prefix -> (event name, feedback list or None)
+    STREAM_FIELDS = {
+        "SUMMARY": ("summary", None),
+        "STRENGTH": ("strength", "strengths"),
+        "IMPROVEMENT": ("improvement", "improvements"),
+        "NEXT_STEP": ("next_step", "next_steps"),
+        "TONE": ("tone", None),
+    }
+
+    def __init__(
+        self,
+        llm: Optional[LLMGateway] = None,
+        max_prompt_tokens: Optional[int] = None,
+        cache: Optional[FeedbackCache] = None
+    ):
+        """
+        Initialize generator.
+        
+        Args:
+            llm: LLM gateway (the shared one by default)
+            max_prompt_tokens: Prompt token budget; a longer criteria breakdown is shortened
+            cache: Feedback reuse cache (the shared one by default)
+        """
+        self.llm = llm or get_llm_gateway()
+        self.cache = cache or get_feedback_cache()
+        self.builder = PromptBuilder(
+            prompt_prefix(self.SYSTEM_PROMPT),
+            max_tokens=max_prompt_tokens or settings.prompt_max_tokens
+        )
+        self.stream_builder = PromptBuilder(
+            prompt_prefix(self.STREAM_SYSTEM_PROMPT),
+            max_tokens=self.builder.max_tokens
+        )
     
     async def generate(
         self,
@@ -49,7 +97,8 @@ Match tone to score:
         score: float,
         max_score: float,
         criteria_breakdown: dict,
-        student_history: Optional[dict] = None
+        student_history: Optional[dict] = None,
+        course: Optional[str] = None
     ) -> dict:
         """
         Generate personalized feedback.
@@ -60,42 +109,180 @@ Match tone to score:
             max_score: Maximum possible score
             criteria_breakdown: Per-criterion scores and reasoning
             student_history: Optional historical performance data
+            course: Course code, part of the feedback cache profile
             
         Returns:
             Feedback dictionary with summary, strengths, improvements, next_steps
         """
-        if not self.model:
+        if not self.llm.available:
             return self._mock_feedback(score, max_score)
         
-        percentage = (score / max_score * 100) if max_score > 0 else 0
+        cache_key = self._cache_key(score, max_score, criteria_breakdown, student_history, course)
+        if cache_key:
+            cached = await self.cache.lookup(cache_key, grade_id, score, max_score)
+            if cached is not None:
+                return cached
         
-        prompt = f"""{self.SYSTEM_PROMPT}
-
-Generate feedback for this student:
-
-SCORE: {score}/{max_score} ({percentage:.1f}%)
-
-CRITERIA BREAKDOWN:
-{json.dumps(criteria_breakdown, indent=2)}
-
-{f'HISTORICAL TREND: {json.dumps(student_history)}' if student_history else ''}
-"""
+        prompt = self._build(self.builder, score, max_score, criteria_breakdown, student_history)
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    response_mime_type="application/json"
-                )
-            )
+            response_text = await self.llm.generate(prompt.text, temperature=0.7, schema=FEEDBACK_SCHEMA)
             
-            result = json.loads(response.text)
+            result = load_json_lenient(response_text)
+            if not self._complete(result):
+                raise GradingOutputError("Feedback response is missing fields")
+            if cache_key:
+                await self.cache.add(cache_key, result, score, max_score)
             return result
             
         except Exception as e:
+            print(f"Feedback generation error, using template feedback: {e}")
             return self._mock_feedback(score, max_score)
     
+    async def stream(
+        self,
+        grade_id: str,
+        score: float,
+        max_score: float,
+        criteria_breakdown: dict,
+        student_history: Optional[dict] = None,
+        course: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate feedback as a stream of events, each sent as soon as the model has written it.
+        
+        Events, in order: ``summary`` (``{"delta": text}``, repeated while the
+        summary is written), ``strength`` / ``improvement`` / ``next_step``
+        (``{"text": item}``, one per item), ``tone`` (``{"tone": tone}``)
+        and finally ``done`` with the complete feedback dictionary. If the
+        model fails after events were sent, the stream ends with ``error``
+        (``{"error": message, "partial": feedback so far}``) instead of ``done``.
+        
+        Args:
+            grade_id: Grade identifier
+            score: Achieved score
+            max_score: Maximum possible score
+            criteria_breakdown: Per-criterion scores and reasoning
+            student_history: Optional historical performance data
+            course: Course code, part of the feedback cache profile
+        """
+        if not self.llm.available:
+            for event in self._feedback_events(self._mock_feedback(score, max_score)):
+                yield event
+            return
+        
+        cache_key = self._cache_key(score, max_score, criteria_breakdown, student_history, course)
+        if cache_key:
+            cached = await self.cache.lookup(cache_key, grade_id, score, max_score)
+            if cached is not None:
+                for event in self._feedback_events(cached):
+                    yield event
+                return
+        
+        prompt = self._build(self.stream_builder, score, max_score, criteria_breakdown, student_history)
+        feedback = {"summary": "", "strengths": [], "improvements": [], "next_steps": [], "tone": "encouraging"}
+        buffer = ""
+        emitted = 0  # Characters of the open SUMMARY line already sent
+        started = False
+        try:
+            async for piece in self.llm.stream(prompt.text, temperature=0.7):
+                buffer += piece
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    for event in self._stream_line(line, feedback, emitted):
+                        started = True
+                        yield event
+                    emitted = 0
+                # Forward the summary while it is still being written
+                field, value = self._split_line(buffer)
+                if field == self.STREAM_FIELDS["SUMMARY"] and len(value) > emitted:
+                    delta = value[emitted:]
+                    emitted += len(delta)
+                    feedback["summary"] += delta
+                    started = True
+                    yield "summary", {"delta": delta}
+            for event in self._stream_line(buffer, feedback, emitted):
+                yield event
+        except Exception as e:
+            print(f"Feedback stream error: {e}")
+            if not started:
+                for event in self._feedback_events(self._mock_feedback(score, max_score)):
+                    yield event
+            else:
+                # Part of the feedback was sent already; do not present it as complete
+                feedback["summary"] = feedback["summary"].strip()
+                yield "error", {"error": "Feedback generation was interrupted", "partial": feedback}
+            return
+        
+        feedback["summary"] = feedback["summary"].strip()
+        if cache_key and self._complete(feedback):
+            await self.cache.add(cache_key, feedback, score, max_score)
+        yield "done", feedback
+    
+    def _cache_key(self, score: float, max_score: float, criteria_breakdown: dict,
+                   student_history: Optional[dict], course: Optional[str]) -> Optional[str]:
+        """Feedback cache key, or None when the feedback must be written for this student alone."""
+        if student_history:
+            # Feedback that refers to the student's own trend is not shared
+            return None
+        profile = self.cache.profile(score, max_score, criteria_breakdown, course)
+        return self.cache.key(profile, self.llm.model, self.PROMPT_VERSION)
+    
+    @staticmethod
+    def _complete(feedback: Any) -> bool:
+        """Whether generated feedback has every field, and so may be reused."""
+        return (
+            isinstance(feedback, dict) and bool(feedback.get("summary"))
+            and all(isinstance(feedback.get(k), list) for k in ("strengths", "improvements", "next_steps"))
+        )
+    
+    def _stream_line(self, line: str, feedback: dict, emitted: int):
+        """Events for one complete ``KEY: value`` line (``emitted`` summary characters were already sent)."""
+        field, value = self._split_line(line)
+        value = value.rstrip()
+        if field is None or not value:
+            return
+        event, list_name = field
+        if event == "summary":
+            delta = value[emitted:] if emitted else value
+            if delta:
+                feedback["summary"] += delta
+                yield "summary", {"delta": delta}
+        elif event == "tone":
+            feedback["tone"] = value.lower()
+            yield "tone", {"tone": feedback["tone"]}
+        else:
+            feedback[list_name].append(value)
+            yield event, {"text": value}
+    
+    def _split_line(self, line: str) -> Tuple[Optional[Tuple[str, Optional[str]]], str]:
+        """(``STREAM_FIELDS`` entry or None, value) of a ``KEY: value`` line, ignoring Markdown around the key."""
+        key, _, value = line.partition(":")
+        return self.STREAM_FIELDS.get(key.strip().strip("*-# ").upper()), value.lstrip().lstrip("*").lstrip()
+    
+    @staticmethod
+    def _feedback_events(feedback: dict):
+        """Event sequence of an already complete feedback dictionary."""
+        yield "summary", {"delta": feedback["summary"]}
+        for event, list_name in (("strength", "strengths"), ("improvement", "improvements"), ("next_step", "next_steps")):
+            for item in feedback.get(list_name, []):
+                yield event, {"text": item}
+        yield "tone", {"tone": feedback.get("tone", "encouraging")}
+        yield "done", feedback
+    
+    @staticmethod
+    def _build(builder: PromptBuilder, score: float, max_score: float, criteria_breakdown: dict,
+               student_history: Optional[dict]):
+        """Prompt for one student's feedback."""
+        percentage = (score / max_score * 100) if max_score > 0 else 0
+        
+        return builder.build([
+            ("", "Generate feedback for this student:"),
+            ("SCORE", f"{score}/{max_score} ({percentage:.1f}%)"),
+            ("HISTORICAL TREND", json.dumps(student_history) if student_history else None),
+            ("CRITERIA BREAKDOWN", json.dumps(criteria_breakdown, indent=2)),
+        ], flexible="CRITERIA BREAKDOWN")
+    
     def _mock_feedback(self, score: float, max_score: float) -> dict:
         """Generate mock feedback for demo."""
         percentage = (score / max_score * 100) if max_score > 0 else 0
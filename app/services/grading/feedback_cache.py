@@ -0,0 +1,148 @@
+"""
+Opti-Scholar: Feedback Cache
+Reuse generated feedback across grades with the same score band and criteria profile
+"""
+
+import re
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.llm.cache import GradingCache, _NullCache
+
+
+class FeedbackCache:
+    """
+    Feedback shared by grades with the same profile.
+
+    A profile is the score percentage band, the pass/fail vector of the
+    criteria (by criterion ID) and the course. The first ``variants`` grades
+    of a profile get fresh LLM feedback, which is stored; later grades get
+    one of the stored variants (picked by grade ID, so a grade always sees
+    the same one), with the score in the summary updated to their own.
+    Freshness and eviction are those of the underlying ``GradingCache``
+    (TTL and least-recently-used size limit).
+    """
+
+    def __init__(self, store, band_percent: float = 10.0, pass_ratio: float = 0.6, variants: int = 2):
+        """
+        Initialize cache.
+
+        Args:
+            store: Key-value store with async ``get``/``set`` (a ``GradingCache``)
+            band_percent: Width of a score band in percentage points
+            pass_ratio: Share of a criterion's points that counts as passing it
+            variants: LLM-written feedbacks collected per profile before reuse starts
+        """
+        self.store = store
+        self.band_percent = band_percent
+        self.pass_ratio = pass_ratio
+        self.variants = max(1, variants)
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def profile(self, score: float, max_score: float, criteria_breakdown: Any, course: Optional[str] = None) -> Dict:
+        """The (band, criteria pass/fail, course) profile of a grade."""
+        percentage = (score / max_score * 100) if max_score > 0 else 0
+        band = int(min(percentage, 99.999) // self.band_percent)
+        return {
+            "band": band,
+            "criteria": [
+                [cid, fraction >= self.pass_ratio] for cid, fraction in self._criteria_fractions(criteria_breakdown)
+            ],
+            "course": course or ""
+        }
+
+    @staticmethod
+    def key(profile: Dict, model: str, prompt_version: str) -> str:
+        """Store key of a profile."""
+        payload = json.dumps({"profile": profile, "model": model, "prompt_version": prompt_version}, sort_keys=True)
+        return "feedback:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def lookup(self, key: str, grade_id: str, score: float, max_score: float) -> Optional[Dict]:
+        """Stored feedback for the profile, personalized to this score; None until enough variants exist."""
+        entry = await self.store.get(key)
+        variants = (entry or {}).get("variants", [])
+        if len(variants) < self.variants:
+            self.misses += 1
+            return None
+        self.hits += 1
+        index = int(hashlib.sha1(grade_id.encode("utf-8")).hexdigest()[:8], 16) % len(variants)
+        chosen = variants[index]
+        return self._personalize(chosen["feedback"], chosen["score"], chosen["max_score"], score, max_score)
+
+    async def add(self, key: str, feedback: Dict, score: float, max_score: float):
+        """Record LLM-written feedback as a variant of the profile."""
+        entry = await self.store.get(key) or {"variants": []}
+        variants = entry["variants"]
+        if len(variants) >= self.variants:
+            return
+        variants.append({"feedback": feedback, "score": score, "max_score": max_score})
+        await self.store.set(key, {"variants": variants})
+
+    def _criteria_fractions(self, criteria_breakdown: Any) -> List[tuple]:
+        """Sorted (criterion ID, score fraction) pairs from a breakdown dict or criteria_scores list."""
+        if isinstance(criteria_breakdown, dict) and "criteria_scores" in criteria_breakdown:
+            criteria_breakdown = criteria_breakdown["criteria_scores"]
+        if isinstance(criteria_breakdown, dict):
+            items = [
+                {"id": cid, **value} for cid, value in criteria_breakdown.items() if isinstance(value, dict)
+            ]
+        elif isinstance(criteria_breakdown, list):
+            items = [c for c in criteria_breakdown if isinstance(c, dict)]
+        else:
+            items = []
+
+        fractions = []
+        for i, c in enumerate(items):
+            cid = str(c.get("id") or c.get("criterion_id") or f"c{i + 1}")
+            try:
+                fraction = float(c.get("score", 0)) / float(c.get("max_score") or 0)
+            except (TypeError, ValueError, ZeroDivisionError):
+                continue
+            fractions.append((cid, fraction))
+        return sorted(fractions)
+
+    @staticmethod
+    def _personalize(feedback: Dict, old_score: float, old_max: float, score: float, max_score: float) -> Dict:
+        """Copy of ``feedback`` with the old score and percentage in the summary replaced by the new ones."""
+        summary = feedback.get("summary", "")
+        old_pct = old_score / old_max * 100 if old_max > 0 else 0
+        new_pct = score / max_score * 100 if max_score > 0 else 0
+        summary = re.sub(rf"\b{re.escape(f'{old_pct:.0f}')}(\.\d+)?%", f"{new_pct:.0f}%", summary)
+        summary = re.sub(
+            rf"\b{re.escape(f'{old_score:g}')}\s*/\s*{re.escape(f'{old_max:g}')}\b",
+            f"{score:g}/{max_score:g}", summary
+        )
+        return {**feedback, "summary": summary}
+
+    def stats(self) -> Dict[str, Any]:
+        """Reuse counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "store": self.store.stats(),
+        }
+
+
+@lru_cache
+def get_feedback_cache() -> FeedbackCache:
+    """Get the process-wide feedback cache (cached)."""
+    if settings.feedback_cache_enabled:
+        store = GradingCache(
+            settings.feedback_cache_path,
+            max_entries=settings.feedback_cache_max_entries,
+            ttl_seconds=settings.feedback_cache_ttl_hours * 3600,
+        )
+    else:
+        store = _NullCache()
+    return FeedbackCache(
+        store,
+        band_percent=settings.feedback_cache_band_percent,
+        variants=settings.feedback_cache_variants,
+    )
@@ -0,0 +1,277 @@
+"""
+Opti-Scholar: Local Scorer
+Deterministic offline grading by BM25 coverage of rubric criteria and TF-IDF similarity to reference answers
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+
+_WORD = re.compile(r"[a-z0-9]+(?:[=+\-*/^][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most my
+myself no nor not now of off on once only or other our ours ourselves out over own same she should so
+some such than that the their theirs them themselves then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves explain describe discuss show give state write answer using use used
+""".split())
+
+
+def _stem(word: str) -> str:
+    """Light suffix stripping so "algorithms"/"algorithm" and "accelerates"/"acceleration" match."""
+    if len(word) <= 3:
+        return word
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ation", "ing", "ed", "ly", "ate", "ion", "e"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stop-word free, stemmed terms of ``text`` (formulas such as ``f=ma`` stay whole)."""
+    return [_stem(w) for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+class LocalScorer:
+    """
+    CPU-only grading against rubric criteria and reference answers.
+
+    Each criterion is treated as a BM25 query over the answer; its credit is
+    the answer's BM25 score divided by the best score any answer could get
+    for that query, i.e. the IDF-weighted share of criterion terms the answer
+    covers (with term-frequency saturation). Reference answers, when given,
+    add the TF-IDF cosine similarity to the closest one. Very short answers
+    are scaled down.
+
+    IDF and the BM25 length norm come from the rubric side only (criteria,
+    references), so an answer gets the same score whether it is graded alone
+    or in a batch. A whole batch is scored with a few NumPy matrix products.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        full_credit: float = 0.6,
+        min_words: int = 50,
+        typical_words: int = 250
+    ):
+        """
+        Initialize scorer.
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            full_credit: Coverage (or similarity) that earns full credit
+            min_words: Answers shorter than this are scaled down proportionally
+            typical_words: Expected answer length when there are no reference answers
+        """
+        self.k1 = k1
+        self.b = b
+        self.full_credit = full_credit
+        self.min_words = min_words
+        self.typical_words = typical_words
+
+    def score(
+        self,
+        answer: str,
+        criteria: List[Union[str, Dict[str, Any]]],
+        max_score: float,
+        references: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Score one answer (see ``score_batch``)."""
+        return self.score_batch([answer], criteria, max_score, references)[0]
+
+    def score_batch(
+        self,
+        answers: List[str],
+        criteria: List[Union[str, Dict[str, Any]]],
+        max_score: float,
+        references: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score answers to the same question.
+
+        Args:
+            answers: Student answers
+            criteria: Criterion descriptions, or rubric criteria dicts
+                (``id``, ``description``, ``points``)
+            max_score: Maximum score
+            references: Model answers, if any
+
+        Returns:
+            Per answer: ``score``, ``feedback``, ``reasoning``, ``coverage``,
+            ``similarity`` (None without references) and ``criteria_scores``
+        """
+        if not answers:
+            return []
+        crits = self._criteria(criteria)
+        references = [r for r in (references or []) if r and r.strip()]
+        if not crits and not references:
+            raise ValueError("Local scoring needs rubric criteria or reference answers")
+
+        crit_terms = [tokenize(c["description"]) for c in crits]
+        ref_terms = [tokenize(r) for r in references]
+        answer_terms = [tokenize(a) for a in answers]
+
+        vocab: Dict[str, int] = {}
+        for terms in crit_terms + ref_terms + answer_terms:
+            for t in terms:
+                vocab.setdefault(t, len(vocab))
+        size = max(1, len(vocab))
+
+        # IDF over the rubric documents; terms absent from all of them get the maximum
+        rubric_docs = crit_terms + ref_terms
+        df = np.zeros(size)
+        for terms in rubric_docs:
+            df[[vocab[t] for t in set(terms)]] += 1
+        n_docs = len(rubric_docs)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        tf = self._tf(answer_terms, vocab, size)
+        lengths = tf.sum(axis=1)
+        avg_length = float(np.mean([len(t) for t in ref_terms])) if ref_terms else float(self.typical_words)
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(1.0, avg_length))
+        saturated = tf * (self.k1 + 1) / (tf + norm[:, None])
+
+        # Criterion coverage: BM25(criterion, answer) / best possible BM25 for the criterion
+        if crits:
+            queries = (self._tf(crit_terms, vocab, size) > 0).astype(float)
+            best = (queries * idf).sum(axis=1) * (self.k1 + 1)
+            coverage = (saturated * idf) @ queries.T / np.where(best > 0, best, 1.0)
+            credit = np.clip(coverage / self.full_credit, 0.0, 1.0)
+            points = np.array([c["points"] for c in crits])
+            weights = points / points.sum() if points.sum() > 0 else np.full(len(crits), 1 / len(crits))
+            quality = credit @ weights
+        else:
+            coverage = credit = np.zeros((len(answers), 0))
+            quality = None
+
+        # Similarity to the closest reference answer (TF-IDF cosine)
+        similarity = None
+        if references:
+            ref_vectors = self._unit(self._tf(ref_terms, vocab, size) * idf)
+            similarity = (self._unit(tf * idf) @ ref_vectors.T).max(axis=1)
+            ref_credit = np.clip(similarity / self.full_credit, 0.0, 1.0)
+            quality = ref_credit if quality is None else (quality + ref_credit) / 2
+
+        words = np.array([len(a.split()) for a in answers], dtype=float)
+        length_factor = np.clip(words / max(1, self.min_words), 0.0, 1.0)
+        scores = np.round(max_score * quality * length_factor, 1)
+
+        results = []
+        for i in range(len(answers)):
+            criteria_scores = [
+                {
+                    "id": c["id"],
+                    "score": round(float(credit[i, j] * c["points"]), 1),
+                    "max_score": c["points"],
+                    "coverage": round(float(coverage[i, j]), 3),
+                    "reasoning": self._criterion_reasoning(credit[i, j], crit_terms[j], answer_terms[i])
+                }
+                for j, c in enumerate(crits)
+            ]
+            results.append({
+                "score": float(scores[i]),
+                "feedback": self._feedback(quality[i], length_factor[i], criteria_scores, crits),
+                "reasoning": self._reasoning(
+                    coverage[i] if crits else None,
+                    None if similarity is None else similarity[i],
+                    int(words[i])
+                ),
+                "coverage": round(float(coverage[i].mean()), 3) if crits else None,
+                "similarity": None if similarity is None else round(float(similarity[i]), 3),
+                "criteria_scores": criteria_scores
+            })
+        return results
+
+    @staticmethod
+    def _criteria(criteria: List[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Criteria as dicts with ``id``, ``description`` and numeric ``points``."""
+        normalized = []
+        for i, c in enumerate(criteria or []):
+            if isinstance(c, str):
+                c = {"description": c}
+            description = str(c.get("description") or "")
+            if not tokenize(description):
+                continue
+            normalized.append({
+                "id": str(c.get("id") or f"c{i + 1}"),
+                "description": description,
+                "points": float(c.get("points") or 1.0)
+            })
+        return normalized
+
+    @staticmethod
+    def _tf(documents: List[List[str]], vocab: Dict[str, int], size: int) -> np.ndarray:
+        """Term-frequency matrix (documents x vocabulary)."""
+        matrix = np.zeros((len(documents), size))
+        rows = [i for i, terms in enumerate(documents) for _ in terms]
+        cols = [vocab[t] for terms in documents for t in terms]
+        np.add.at(matrix, (rows, cols), 1.0)
+        return matrix
+
+    @staticmethod
+    def _unit(matrix: np.ndarray) -> np.ndarray:
+        """Rows scaled to unit length (zero rows stay zero)."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    @staticmethod
+    def _criterion_reasoning(credit: float, criterion_terms: List[str], answer_terms: List[str]) -> str:
+        """Which key terms of a criterion the answer covers."""
+        present = set(answer_terms)
+        missing = [t for t in dict.fromkeys(criterion_terms) if t not in present]
+        if credit >= 0.999:
+            return "Key concepts of this criterion are addressed"
+        if not missing:
+            return "Key terms mentioned but only briefly"
+        return f"Not addressed or only partly: {', '.join(missing[:5])}"
+
+    @staticmethod
+    def _feedback(quality: float, length_factor: float, criteria_scores: List[Dict], crits: List[Dict]) -> str:
+        """Short student-facing summary."""
+        parts = []
+        if quality >= 0.8:
+            parts.append("Covers the expected concepts well.")
+        elif quality >= 0.5:
+            parts.append("Covers several expected concepts, but some are missing or underdeveloped.")
+        else:
+            parts.append("Many expected concepts are missing.")
+        weak = [c for c, s in zip(crits, criteria_scores) if s["score"] < 0.5 * c["points"]]
+        if weak:
+            parts.append("Work on: " + "; ".join(c["description"][:60] for c in weak[:2]) + ".")
+        if length_factor < 1:
+            parts.append("The answer is too brief; explain in more detail.")
+        return " ".join(parts)
+
+    @staticmethod
+    def _reasoning(coverage: Optional[np.ndarray], similarity: Optional[float], words: int) -> str:
+        """How the local score was derived."""
+        parts = ["Scored offline by the local BM25 scorer"]
+        if coverage is not None and len(coverage):
+            parts.append(f"mean criterion coverage {float(np.mean(coverage)):.2f}")
+        if similarity is not None:
+            parts.append(f"reference similarity {float(similarity):.2f}")
+        parts.append(f"{words} words")
+        return ", ".join(parts) + "."
+
+
+@lru_cache
+def get_local_scorer() -> LocalScorer:
+    """Get the shared local scorer (cached)."""
+    return LocalScorer(full_credit=settings.local_scorer_full_credit, min_words=settings.local_scorer_min_words)
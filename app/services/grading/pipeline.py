@@ -0,0 +1,151 @@
+"""
+Opti-Scholar: Grading Pipeline
+Tiered grading: local score first, Gemini only when confidence is low, consistency checks only for doubtful grades
+"""
+
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.grading.confidence import ConfidenceQuantifier
+from app.services.grading.semantic_scorer import SemanticScorer
+from app.services.verification.consistency import ConsistencyChecker
+
+
+class TierStats:
+    """Calls and latency of one pipeline tier."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_latency = 0.0
+
+    def record(self, started: float):
+        """Count a call that began at ``started`` (``time.perf_counter``)."""
+        self.count += 1
+        self.total_latency += time.perf_counter() - started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_latency_ms": round(self.total_latency / self.count * 1000, 1) if self.count else 0.0
+        }
+
+
+class GradingPipeline:
+    """
+    Grade an answer with the cheapest tier that is confident enough.
+
+    1. ``local``: the offline BM25 scorer. Accepted when no LLM is
+       configured, or when its confidence
+       (``ConfidenceQuantifier.quantify_local``) reaches
+       ``confidence_local_accept``, which clearly covered passing answers
+       do. Local grades are never auto-approved (a passing one ends
+       ``soft_flagged`` for a teacher) and failing ones always escalate.
+    2. ``llm``: ``SemanticScorer`` with Gemini, confidence from
+       ``ConfidenceQuantifier.quantify``.
+    3. ``consistency``: only when the LLM grade is below
+       ``confidence_hard_flag``. If the independent samples agree with each
+       other and with the grade, it is lifted to ``soft_flagged``; otherwise
+       it stays ``hard_flagged`` for a teacher.
+    """
+
+    TIERS = ("local", "llm", "consistency")
+
+    def __init__(
+        self,
+        scorer: Optional[SemanticScorer] = None,
+        quantifier: Optional[ConfidenceQuantifier] = None,
+        checker: Optional[ConsistencyChecker] = None,
+        escalate_below: Optional[float] = None,
+        verify_below: Optional[float] = None
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            scorer: Semantic scorer (also provides the local tier)
+            quantifier: Confidence quantifier
+            checker: Consistency checker for the last tier
+            escalate_below: Local confidence below which Gemini grades the answer
+                (``confidence_local_accept`` if None)
+            verify_below: LLM confidence below which a consistency check runs
+        """
+        self.scorer = scorer or SemanticScorer()
+        self.quantifier = quantifier or ConfidenceQuantifier()
+        self.checker = checker or ConsistencyChecker(llm=self.scorer.llm)
+        self.escalate_below = escalate_below or settings.confidence_local_accept
+        self.verify_below = verify_below or settings.confidence_hard_flag
+        self.tiers = {tier: TierStats() for tier in self.TIERS}
+        self.outcomes: Dict[str, int] = {}
+
+    async def grade(self, answer_text: str, rubric_id: str, context: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Grade an answer through the tiers.
+
+        Args:
+            answer_text: Student's answer
+            rubric_id: ID of the rubric to use
+            context: Optional subject/context information
+
+        Returns:
+            ``SemanticScorer`` result plus ``confidence``, ``status``, the
+            deciding ``tier`` and, if run, the ``consistency`` check
+
+        Raises:
+            LookupError: No rubric with this ID
+        """
+        rubric = await self.scorer.rubrics.get(rubric_id)
+        if rubric is None:
+            # Without an LLM the scorer still returns its demo grade
+            result = await self.scorer.grade(answer_text, rubric_id, context)
+            return self._finish(result, self.quantifier.quantify(result), "local")
+
+        started = time.perf_counter()
+        result = self.scorer.local_grade(answer_text, rubric)
+        confidence = self.quantifier.quantify_local(result)
+        self.tiers["local"].record(started)
+        if confidence >= self.escalate_below or not self.scorer.llm.available:
+            return self._finish(result, confidence, "local")
+
+        started = time.perf_counter()
+        result = await self.scorer.grade(answer_text, rubric_id, context)
+        self.tiers["llm"].record(started)
+        if result.get("scorer") == "local":
+            # The LLM call failed and the scorer fell back to the local grade
+            return self._finish(result, confidence, "local")
+        confidence = self.quantifier.quantify(result)
+        if confidence >= self.verify_below:
+            return self._finish(result, confidence, "llm")
+
+        started = time.perf_counter()
+        check = await self.checker.check(answer_text, rubric_id)
+        self.tiers["consistency"].record(started)
+        max_score = float(result.get("max_score") or 10)
+        # Samples are on a 0-10 scale
+        agreed_score = check["mean"] / 10 * max_score
+        tolerance = check["max_acceptable_difference"] / 10 * max_score
+        if check["is_consistent"] and abs(agreed_score - float(result.get("total_score", 0))) <= tolerance:
+            confidence = max(confidence, self.verify_below)
+        return self._finish({**result, "consistency": check}, confidence, "consistency")
+
+    def _finish(self, result: Dict[str, Any], confidence: float, tier: str) -> Dict[str, Any]:
+        """Attach the routing outcome to a result."""
+        status = self.quantifier.status(confidence)
+        self.outcomes[status] = self.outcomes.get(status, 0) + 1
+        return {**result, "confidence": confidence, "status": status, "tier": tier}
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier call counts and latencies, and how many grades ended in each status."""
+        return {
+            "tiers": {tier: stats.to_dict() for tier, stats in self.tiers.items()},
+            "outcomes": dict(self.outcomes),
+            "escalate_below": self.escalate_below,
+            "verify_below": self.verify_below
+        }
+
+
+@lru_cache
+def get_grading_pipeline() -> GradingPipeline:
+    """Get the shared grading pipeline (cached, so its stats cover every request)."""
+    return GradingPipeline()
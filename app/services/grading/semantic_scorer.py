@@ -3,16 +3,24 @@ Opti-Scholar: Semantic Scorer Service
 Context-aware AI grading with partial credit support using Gemini
 """
 
-import json
 from typing import Optional
-import google.generativeai as genai
 
 from app.core.config import settings
+from app.services.grading.local_scorer import LocalScorer, get_local_scorer
+from app.services.ingestion.rubric_store import RubricStore, get_rubric_store
+from app.services.llm import (
+    LLMGateway, get_llm_gateway, get_grading_cache, grading_cache_key, RUBRIC_GRADE_SCHEMA, parse_rubric_grade,
+    PromptBuilder, prompt_prefix,
+)
 
 
 class SemanticScorer:
     """AI-powered semantic grading with context awareness using Gemini."""
     
+    # Bump when SYSTEM_PROMPT or the prompt layout changes, to retire cached grades
+    PROMPT_VERSION = "semantic-v3"
+    TEMPERATURE = 0.2
+    
     SYSTEM_PROMPT = """You are an expert academic grader. Grade the student's answer based on the rubric provided.
 
 For each criterion:
@@ -48,13 +56,29 @@ IMPORTANT:
 - Consider semantic meaning, not just keywords
 - Explain deductions clearly"""
 
-    def __init__(self):
-        """Initialize scorer with Gemini client."""
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
-            self.model = genai.GenerativeModel(settings.gemini_model)
-        else:
-            self.model = None
+    def __init__(
+        self,
+        llm: Optional[LLMGateway] = None,
+        cache=None,
+        rubrics: Optional[RubricStore] = None,
+        max_prompt_tokens: Optional[int] = None,
+        local: Optional[LocalScorer] = None
+    ):
+        """
+        Initialize scorer.
+        
+        Args:
+            llm: LLM gateway (the shared one by default)
+            cache: Grading result cache (the shared one by default)
+            rubrics: Rubric store (the shared one by default)
+            max_prompt_tokens: Prompt token budget; longer answers are shortened
+            local: Offline scorer used without an LLM or when the LLM call fails
+        """
+        self.llm = llm or get_llm_gateway()
+        self.cache = cache or get_grading_cache()
+        self.rubrics = rubrics or get_rubric_store()
+        self.max_prompt_tokens = max_prompt_tokens or settings.prompt_max_tokens
+        self.local = local or get_local_scorer()
     
     async def grade(
         self,
@@ -72,51 +96,78 @@ IMPORTANT:
             
         Returns:
             Grading result with scores and reasoning
+            
+        Raises:
+            LookupError: No rubric with this ID
         """
-        if not self.model:
-            return self._mock_grade(answer_text)
+        # Compiled once per rubric: the JSON is rendered when the rubric is loaded
+        rubric = await self.rubrics.get(rubric_id)
+        if not self.llm.available:
+            return self.local_grade(answer_text, rubric) if rubric else self._mock_grade(answer_text)
+        if rubric is None:
+            raise LookupError(f"Rubric {rubric_id} not found")
         
-        # TODO: Fetch rubric from database by ID
-        # For now, use a sample rubric
-        rubric = {
-            "total_points": 10,
-            "criteria": [
-                {"id": "c1", "description": "Explains concept correctly", "points": 5, "partial_credit": True},
-                {"id": "c2", "description": "Uses correct formula", "points": 3, "partial_credit": False},
-                {"id": "c3", "description": "Calculation is correct", "points": 2, "partial_credit": True}
-            ],
-            "deductions": [
-                {"id": "d1", "description": "Spelling errors", "points": -1}
-            ]
-        }
+        cache_key = grading_cache_key(
+            answer_text, rubric.content_hash, self.llm.model, self.TEMPERATURE, self.PROMPT_VERSION,
+            context=context, max_prompt_tokens=self.max_prompt_tokens
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        prompt = f"""{self.SYSTEM_PROMPT}
-
-Grade this answer:
-
-ANSWER:
-{answer_text}
-
-RUBRIC:
-{json.dumps(rubric, indent=2)}
-
-{f'CONTEXT: {context}' if context else ''}
-"""
+        # Instructions and rubric form the static prefix shared by every
+        # answer graded against this rubric; the answer comes last.
+        builder = PromptBuilder(
+            prompt_prefix(self.SYSTEM_PROMPT, f"RUBRIC:\n{rubric.prompt_json}"),
+            max_tokens=self.max_prompt_tokens
+        )
+        prompt = builder.build(
+            [("CONTEXT", context), ("", "Grade this answer:"), ("ANSWER", answer_text)],
+            flexible="ANSWER"
+        )
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.2,
-                    response_mime_type="application/json"
-                )
+            response_text = await self.llm.generate(
+                prompt.text, temperature=self.TEMPERATURE, schema=RUBRIC_GRADE_SCHEMA
             )
             
-            result = json.loads(response.text)
+            # Raises GradingOutputError when nothing usable came back, so
+            # only validated grades are cached
+            result = parse_rubric_grade(response_text, rubric.schema)
+            await self.cache.set(cache_key, result)
             return result
             
         except Exception as e:
-            raise ValueError(f"Grading failed: {str(e)}")
+            print(f"Semantic grading error, using local scorer: {e}")
+            return self.local_grade(answer_text, rubric)
+    
+    def local_grade(self, answer_text: str, rubric) -> dict:
+        """
+        Grade offline with the local scorer, in the same shape as an LLM result.
+        
+        Args:
+            answer_text: Student's answer
+            rubric: Compiled rubric
+        """
+        schema = rubric.schema
+        total = float(schema.get("total_points") or rubric.total_points or 10.0)
+        criteria = schema.get("criteria") or []
+        try:
+            result = self.local.score(answer_text, criteria, total)
+        except ValueError:
+            # Rubric without scorable criteria text
+            return self._mock_grade(answer_text)
+        return {
+            "total_score": result["score"],
+            "max_score": total,
+            "criteria_scores": [
+                {"id": c["id"], "score": c["score"], "max_score": c["max_score"], "reasoning": c["reasoning"]}
+                for c in result["criteria_scores"]
+            ],
+            "deductions": [],
+            "overall_feedback": result["feedback"],
+            "scorer": "local"
+        }
     
     def _mock_grade(self, answer_text: str) -> dict:
         """Generate mock grading result for demo."""
@@ -0,0 +1,129 @@
+"""
+Opti-Scholar: Submission Grading
+Grade a student's assignment submission with Gemini, or the offline local scorer
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.storage import StorageBackend
+from app.services.grading.fallback import heuristic_grade
+from app.services.jobs import JobQueue
+from app.services.llm import LLMGateway, get_llm_gateway, GRADE_SCHEMA, parse_grade
+
+
+SUBMISSION_PROMPT = """You are an expert academic grader. Grade the following student submission for the assignment "{assignment_title}" in course {course_code}.
+
+Assignment Title: {assignment_title}
+Maximum Score: {max_score}
+Course: {course_code}
+
+Student Submission:
+{submission_text}
+
+Respond with a JSON object:
+{{"score": <number out of {max_score}>, "feedback": "<brief feedback, 2-3 sentences, highlighting strengths>", "reasoning": "<detailed reasoning, 3-4 sentences, explaining the grade>"}}
+
+Grading Criteria:
+- Content accuracy and depth (40%)
+- Structure and organization (20%)
+- Technical terminology usage (20%)
+- Examples and explanations (20%)
+
+Be fair but thorough. Consider the academic level and course requirements."""
+
+
+async def grade_submission_text(
+    submission_text: str,
+    assignment_title: str,
+    course_code: str,
+    max_score: float,
+    llm: Optional[LLMGateway] = None,
+    description: str = ""
+) -> Tuple[float, str, str]:
+    """
+    Grade a submission through the shared LLM gateway.
+
+    The model answers with JSON matching ``GRADE_SCHEMA``, validated and if
+    needed repaired by ``parse_grade``. Without a configured LLM the
+    local scorer grades against the assignment description. LLM errors and responses without a usable
+    score are raised, so the caller decides whether to retry or fall back.
+
+    Args:
+        submission_text: The student's answer
+        assignment_title: Assignment title
+        course_code: Course code
+        max_score: Maximum score
+        llm: LLM gateway (the shared one by default)
+        description: Assignment description for the offline scorer (the title if empty)
+
+    Returns:
+        Tuple of (score rounded to 1 decimal, feedback, reasoning)
+    """
+    llm = llm or get_llm_gateway()
+    if not llm.available:
+        print("WARNING: Gemini API key not configured, using fallback grading")
+        score, feedback, reasoning = heuristic_grade(submission_text, max_score, description or assignment_title)
+        return round(score, 1), feedback, reasoning
+
+    ai_response = await llm.generate(SUBMISSION_PROMPT.format(
+        assignment_title=assignment_title,
+        course_code=course_code,
+        max_score=max_score,
+        submission_text=submission_text
+    ), schema=GRADE_SCHEMA)
+
+    grade = parse_grade(ai_response, max_score)
+    return round(grade["score"], 1), grade["feedback"], grade["reasoning"]
+
+
+async def queue_submission(
+    storage: StorageBackend,
+    queue: JobQueue,
+    submission: Dict[str, Any],
+    assignment_title: str,
+    max_score: float
+) -> Dict[str, Any]:
+    """
+    Store a submission and enqueue its ``grade_submission`` job.
+
+    The request returns as soon as both are persisted; the job records the
+    AI score for teacher review (see ``grade_submission_job``).
+
+    Args:
+        storage: Storage backend
+        queue: Job queue running the grading job
+        submission: Submission fields (assignment, student, course, text, file name)
+        assignment_title: Assignment title used in the grading prompt
+        max_score: Maximum score
+
+    Returns:
+        Dict with submission_id, job_id, job status and status_url
+    """
+    submission_id = await storage.add_submission({
+        **submission,
+        "submitted_at": datetime.utcnow().strftime("%Y-%m-%d"),
+        "ai_score": "",
+        "ai_feedback": "",
+        "ai_reasoning": "",
+        "teacher_verified": "false",
+        "teacher_score": "0",
+        "teacher_feedback": "",
+        "status": "submitted"
+    })
+
+    job = await queue.enqueue("grade_submission", {
+        "submission_id": submission_id,
+        "assignment_id": submission["assignment_id"],
+        "assignment_title": assignment_title,
+        "course_code": submission["course_code"],
+        "submission_text": submission["submission_text"],
+        "max_score": max_score
+    })
+
+    return {
+        "submission_id": submission_id,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/v1/jobs/{job['job_id']}"
+    }
@@ -0,0 +1,73 @@
+"""
+Opti-Scholar: Grading Jobs
+Background job handlers for submission and batch grading
+"""
+
+from typing import Any, Dict
+
+from app.core.storage import get_storage
+from app.services.grading.batch import BatchGrader
+from app.services.grading.fallback import heuristic_grade
+from app.services.grading.submission import grade_submission_text
+from app.services.jobs import JobQueue, JobContext
+
+
+async def grade_submission_job(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Grade a stored submission and record the AI score for teacher review.
+
+    LLM errors are raised so the queue retries them; on the last attempt the
+    local scorer's grade is recorded instead, so the student still gets a score.
+    """
+    storage = get_storage()
+    assignment = await storage.get_assignment(payload["assignment_id"]) if payload.get("assignment_id") else None
+    description = (assignment or {}).get("description") or payload["assignment_title"]
+    try:
+        ai_score, ai_feedback, ai_reasoning = await grade_submission_text(
+            payload["submission_text"],
+            payload["assignment_title"],
+            payload["course_code"],
+            payload["max_score"],
+            description=description
+        )
+        fallback = False
+    except Exception as e:
+        if context.attempt < context.max_attempts:
+            raise
+        print(f"Gemini API error: {e}")
+        ai_score, ai_feedback, ai_reasoning = heuristic_grade(payload["submission_text"], payload["max_score"], description)
+        ai_score = round(ai_score, 1)
+        fallback = True
+
+    updated = await storage.update_submissions({
+        payload["submission_id"]: {
+            "ai_score": int(ai_score),
+            "ai_feedback": ai_feedback,
+            "ai_reasoning": ai_reasoning,
+            "status": "pending_review"
+        }
+    })
+    if not updated:
+        raise LookupError(f"Submission {payload['submission_id']} not found")
+
+    return {
+        "submission_id": payload["submission_id"],
+        "ai_score": int(ai_score),
+        "ai_feedback": ai_feedback,
+        "fallback": fallback
+    }
+
+
+async def grade_batch_job(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Grade every pending submission of an assignment (see ``BatchGrader``)."""
+    storage = get_storage()
+    assignment = await storage.get_assignment(payload["assignment_id"])
+    if not assignment:
+        raise LookupError(f"Assignment {payload['assignment_id']} not found")
+    return await BatchGrader(storage).run(assignment, regrade=payload.get("regrade", False), context=context)
+
+
+def register_grading_jobs(queue: JobQueue):
+    """Register the grading job kinds on a queue."""
+    queue.register("grade_submission", grade_submission_job)
+    queue.register("grade_batch", grade_batch_job)
@@ -1,5 +1,15 @@
 """Opti-Scholar Ingestion Services Package"""
 from app.services.ingestion.id_extractor import IDExtractor
 from app.services.ingestion.rubric_parser import RubricParser
+from app.services.ingestion.rubric_store import RubricStore, CompiledRubric, get_rubric_store
+from app.services.ingestion.document_store import DocumentStore, get_document_store
+from app.services.ingestion.ocr_pool import OCRPool, OCRBusyError, OCRTimeoutError, get_ocr_pool
+from app.services.ingestion.page_pipeline import PagePipeline, get_page_pipeline
+from app.services.ingestion.tasks import register_ingestion_jobs
 
-__all__ = ["IDExtractor", "RubricParser"]
+__all__ = [
+    "IDExtractor", "RubricParser", "RubricStore", "CompiledRubric", "get_rubric_store",
+    "DocumentStore", "get_document_store",
+    "OCRPool", "OCRBusyError", "OCRTimeoutError", "get_ocr_pool",
+    "PagePipeline", "get_page_pipeline", "register_ingestion_jobs"
+]
@@ -0,0 +1,231 @@
+"""
+Opti-Scholar: Document Store
+Persisted processing records of uploaded documents (batch ID -> file, status, extraction result, timings)
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+# Record lifecycle: queued -> processing -> complete
+#                                    \-> failed (extraction retries exhausted)
+FINISHED_STATUSES = ("complete", "failed")
+
+
+class DocumentStore:
+    """
+    One processing record per uploaded document, kept in SQLite.
+
+    The record is created at upload time (it is also the index from batch ID
+    to the stored file) and written once more when extraction finishes, so
+    reading a document's status never runs OCR. Finished records do not
+    change again and are served from an in-memory LRU; records still in
+    progress are re-read from disk, since another process may be the one
+    working on them.
+    """
+
+    PAGE_COLUMNS = (("pages", "INTEGER"), ("id_page", "INTEGER"), ("answer_text", "TEXT"), ("stage_timings", "TEXT"))
+    # Everything but the (possibly long) answer text
+    _RECORD_COLUMNS = (
+        "batch_id, file_path, exam_id, status, attempts, student_id, confidence, method, raw_text, error,"
+        " ocr_ms, processing_time_ms, created_at, started_at, completed_at, pages, id_page, stage_timings"
+    )
+
+    def __init__(self, path: str, memory_entries: int = 4096):
+        """
+        Initialize store.
+
+        Args:
+            path: SQLite file (``":memory:"`` for a process-local store)
+            memory_entries: Finished records kept in memory
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Metrics
+        self.memory_hits = 0
+        self.disk_reads = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the store on first use (caller holds the db lock)."""
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " batch_id TEXT PRIMARY KEY, file_path TEXT NOT NULL, exam_id TEXT,"
+                " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " student_id TEXT, confidence REAL, method TEXT, raw_text TEXT, error TEXT,"
+                " ocr_ms REAL, processing_time_ms INTEGER,"
+                " created_at REAL NOT NULL, started_at REAL, completed_at REAL)"
+            )
+            # Columns added with the multi-page pipeline
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(documents)")}
+            for column, kind in self.PAGE_COLUMNS:
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE documents ADD COLUMN {column} {kind}")
+        return self._db
+
+    async def create(self, batch_id: str, file_path: str, exam_id: Optional[str] = None) -> Dict[str, Any]:
+        """Record a new upload as ``queued``."""
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO documents (batch_id, file_path, exam_id, status, created_at)"
+            " VALUES (?, ?, ?, 'queued', ?)",
+            (batch_id, file_path, exam_id, now)
+        )
+        self._memory.pop(batch_id, None)
+        return await self.get(batch_id)
+
+    async def start(self, batch_id: str, file_path: str, attempt: int = 1):
+        """Mark extraction as running (creates the record for uploads made before the store existed)."""
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO documents (batch_id, file_path, status, attempts, created_at, started_at)"
+            " VALUES (?, ?, 'processing', ?, ?, ?)"
+            " ON CONFLICT (batch_id) DO UPDATE SET status = 'processing', attempts = excluded.attempts,"
+            " started_at = COALESCE(documents.started_at, excluded.started_at)",
+            (batch_id, file_path, attempt, now, now)
+        )
+        self._memory.pop(batch_id, None)
+
+    async def complete(self, batch_id: str, result: Dict[str, Any], ocr_ms: Optional[float] = None):
+        """
+        Store the extraction result.
+
+        Args:
+            batch_id: Document batch ID
+            result: ``PagePipeline.process`` (or ``IDExtractor.extract``) result
+            ocr_ms: Wall time of the OCR call, including waiting for a worker
+        """
+        stage_timings = result.get("timings")
+        failed_pages = result.get("failed_pages")
+        # Pages that could not be read are reported on an otherwise complete record
+        error = "; ".join(f"page {page}: {e}" for page, e in failed_pages.items()) if failed_pages else None
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE documents SET status = 'complete', student_id = ?, confidence = ?, method = ?,"
+            " raw_text = ?, error = ?, ocr_ms = ?, processing_time_ms = ?, completed_at = ?,"
+            " pages = ?, id_page = ?, answer_text = ?, stage_timings = ? WHERE batch_id = ?",
+            (result.get("student_id"), result.get("confidence"), result.get("method"), result.get("raw_text"),
+             error, ocr_ms, result.get("processing_time_ms"), time.time(),
+             result.get("pages"), result.get("id_page"), result.get("answer_text"),
+             json.dumps(stage_timings) if stage_timings else None, batch_id)
+        )
+        self._memory.pop(batch_id, None)
+
+    async def fail(self, batch_id: str, error: str):
+        """Mark extraction as failed for good."""
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE documents SET status = 'failed', error = ?, completed_at = ? WHERE batch_id = ?",
+            (error, time.time(), batch_id)
+        )
+        self._memory.pop(batch_id, None)
+
+    async def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """The document's record, or None for an unknown batch ID."""
+        record = self._memory.get(batch_id)
+        if record is not None:
+            self._memory.move_to_end(batch_id)
+            self.memory_hits += 1
+            return record
+
+        row = await asyncio.to_thread(
+            self._fetch_one, f"SELECT {self._RECORD_COLUMNS} FROM documents WHERE batch_id = ?", (batch_id,)
+        )
+        self.disk_reads += 1
+        if row is None:
+            return None
+        record = self._to_dict(row)
+        if record["status"] in FINISHED_STATUSES:
+            self._memory[batch_id] = record
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return record
+
+    async def answer_text(self, batch_id: str) -> Optional[str]:
+        """Full OCR text of a processed document (kept out of the cached records, read from disk)."""
+        row = await asyncio.to_thread(
+            self._fetch_one, "SELECT answer_text FROM documents WHERE batch_id = ?", (batch_id,)
+        )
+        return row["answer_text"] if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Read counters."""
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_reads": self.disk_reads,
+        }
+
+    # ============================================
+    # Persistence (runs in worker threads)
+    # ============================================
+
+    def _execute(self, query: str, params: tuple = ()) -> int:
+        with self._db_lock:
+            return self._connection().execute(query, params).rowcount
+
+    def _fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            cursor = self._connection().execute(query, params)
+            row = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    @staticmethod
+    def _to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Public view of a record row, with stage timings in milliseconds."""
+        created, started, completed = row["created_at"], row.get("started_at"), row.get("completed_at")
+        timings = {
+            "queue_ms": round((started - created) * 1000, 1) if started is not None else None,
+            "ocr_ms": round(row["ocr_ms"], 1) if row.get("ocr_ms") is not None else None,
+            "total_ms": round((completed - created) * 1000, 1) if completed is not None else None,
+        }
+        if row.get("stage_timings"):
+            timings.update(json.loads(row["stage_timings"]))
+        return {
+            "batch_id": row["batch_id"],
+            "file_path": row["file_path"],
+            "exam_id": row.get("exam_id"),
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "student_id": row.get("student_id"),
+            "confidence": row.get("confidence"),
+            "method": row.get("method"),
+            "raw_text": row.get("raw_text"),
+            "pages": row.get("pages"),
+            "id_page": row.get("id_page"),
+            "error": row.get("error"),
+            "processing_time_ms": row.get("processing_time_ms"),
+            "timings": timings,
+            "created_at": _isoformat(created),
+            "completed_at": _isoformat(completed),
+        }
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    """UTC ISO-8601 string for a stored epoch timestamp."""
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+@lru_cache
+def get_document_store() -> DocumentStore:
+    """Get the process-wide document store (cached)."""
+    return DocumentStore(settings.document_store_path)
@@ -29,10 +29,17 @@ class IDExtractor:
         r"([A-Z]{2,4}\d{4,8})",  # Common format like CS2021001
     ]
     
-    def __init__(self, tesseract_cmd: Optional[str] = None):
-        """Initialize extractor with optional tesseract path."""
-        if tesseract_cmd:
+    def __init__(self, tesseract_cmd: Optional[str] = None, timeout: float = 0):
+        """
+        Initialize extractor.
+        
+        Args:
+            tesseract_cmd: Optional tesseract path
+            timeout: Seconds before a Tesseract run is stopped (0 = no limit)
+        """
+        if tesseract_cmd and CV2_AVAILABLE:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.timeout = timeout
     
     def extract(self, file_path: str) -> dict:
         """
@@ -55,7 +62,7 @@ class IDExtractor:
         text = self._extract_text(file_path)
         
         # Try to find registration number
-        student_id, confidence = self._find_registration_number(text)
+        student_id, confidence = self.find_registration_number(text)
         
         processing_time = int((time.time() - start_time) * 1000)
         
@@ -78,6 +85,70 @@ class IDExtractor:
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
     
+    def page_count(self, file_path: str) -> int:
+        """Number of pages of a PDF (1 for images)."""
+        if Path(file_path).suffix.lower() != ".pdf":
+            return 1
+        try:
+            from pdf2image import pdfinfo_from_path
+            
+            return int(pdfinfo_from_path(str(file_path))["Pages"])
+        except ImportError:
+            # Fallback: the mock document has one page
+            return 1
+    
+    def ocr_page(self, file_path: str, page: int, dpi: int = 200) -> dict:
+        """
+        Rasterize and OCR a single page.
+        
+        Only the requested page is rendered, so memory stays bounded by one
+        page whatever the length of the document.
+        
+        Args:
+            file_path: Path to PDF or image file
+            page: 1-based page number (images have only page 1)
+            dpi: Rendering resolution of PDF pages
+            
+        Returns:
+            Dict with page, text, rasterize_ms, recognize_ms
+        """
+        file_path = Path(file_path)
+        suffix = file_path.suffix.lower()
+        if suffix in [".jpg", ".jpeg", ".png"]:
+            if page != 1:
+                raise ValueError(f"Images have a single page, got page {page}")
+            start_time = time.perf_counter()
+            text = self._ocr_image(file_path)
+            return {
+                "page": page, "text": text, "rasterize_ms": 0.0,
+                "recognize_ms": (time.perf_counter() - start_time) * 1000
+            }
+        if suffix != ".pdf":
+            raise ValueError(f"Unsupported file type: {suffix}")
+        
+        try:
+            from pdf2image import convert_from_path
+        except ImportError:
+            # Fallback: return mock data
+            return {"page": page, "text": "REG NO: STU-404\nStudent Name: Demo Student",
+                    "rasterize_ms": 0.0, "recognize_ms": 0.0}
+        
+        start_time = time.perf_counter()
+        images = convert_from_path(str(file_path), dpi=dpi, first_page=page, last_page=page, grayscale=True)
+        rasterized = time.perf_counter()
+        text = ""
+        if images:
+            image = images[0]
+            if CV2_AVAILABLE:
+                import numpy as np
+                image = self._preprocess(np.array(image))
+            text = pytesseract.image_to_string(image, config="--psm 6", timeout=self.timeout)
+        return {
+            "page": page, "text": text,
+            "rasterize_ms": (rasterized - start_time) * 1000,
+            "recognize_ms": (time.perf_counter() - rasterized) * 1000
+        }
+    
     def _ocr_image(self, image_path: Path) -> str:
         """Run OCR on an image file."""
         if not CV2_AVAILABLE:
@@ -92,15 +163,19 @@ class IDExtractor:
         
         # Preprocess image for better OCR
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply thresholding
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        thresh = self._preprocess(gray)
         
         # OCR with Tesseract
-        text = pytesseract.image_to_string(thresh, config="--psm 6")
+        text = pytesseract.image_to_string(thresh, config="--psm 6", timeout=self.timeout)
         
         return text
     
+    @staticmethod
+    def _preprocess(gray):
+        """Binarize a grayscale page (Otsu thresholding) for better OCR."""
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return thresh
+    
     def _ocr_pdf(self, pdf_path: Path) -> str:
         """Extract text from PDF (first page only for speed)."""
         try:
@@ -111,14 +186,14 @@ class IDExtractor:
             
             if images:
                 # OCR the first page
-                text = pytesseract.image_to_string(images[0])
+                text = pytesseract.image_to_string(images[0], timeout=self.timeout)
                 return text
             return ""
         except ImportError:
             # Fallback: return mock data
             return "REG NO: STU-404\nStudent Name: Demo Student"
     
-    def _find_registration_number(self, text: str) -> tuple[Optional[str], float]:
+    def find_registration_number(self, text: str) -> tuple[Optional[str], float]:
         """
         Find registration number in text using patterns.
         
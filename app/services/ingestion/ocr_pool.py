@@ -0,0 +1,233 @@
+"""
+Opti-Scholar: OCR Worker Pool
+Process pool that runs IDExtractor off the event loop, with backpressure and per-task timeouts
+"""
+
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.ingestion.id_extractor import IDExtractor
+
+
+class OCRBusyError(Exception):
+    """The OCR queue stayed full for longer than the caller was willing to wait."""
+    pass
+
+
+class OCRTimeoutError(Exception):
+    """An OCR task ran past its timeout."""
+    pass
+
+
+def _extract(file_path: str, tesseract_cmd: Optional[str], timeout: float) -> Dict[str, Any]:
+    """Worker-process entry point: extract the student ID from one document."""
+    return IDExtractor(tesseract_cmd, timeout=timeout).extract(file_path)
+
+
+def _ocr_page(file_path: str, page: int, dpi: int, tesseract_cmd: Optional[str], timeout: float) -> Dict[str, Any]:
+    """Worker-process entry point: rasterize and OCR one page."""
+    return IDExtractor(tesseract_cmd, timeout=timeout).ocr_page(file_path, page, dpi)
+
+
+class OCRPool:
+    """
+    OCR in a pool of worker processes, one per CPU core by default.
+
+    OpenCV preprocessing and Tesseract are CPU bound, so they run in
+    separate processes: pages are recognized in parallel across cores and
+    the API event loop never blocks on them. At most ``max_pending`` tasks
+    are admitted (running or waiting for a worker); further callers wait
+    for a slot, up to their ``wait`` limit, which keeps a burst of uploads
+    from queueing unbounded work. Each task gets ``timeout`` seconds:
+    Tesseract itself is stopped at that point, and a worker that still does
+    not return is treated as hung and the pool is restarted.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: float = 60.0,
+        tesseract_cmd: Optional[str] = None
+    ):
+        """
+        Initialize pool (worker processes start on first use).
+
+        Args:
+            workers: Worker processes (CPU count if None)
+            max_pending: Tasks admitted at once (4 per worker if None)
+            timeout: Seconds one document may take
+            tesseract_cmd: Tesseract binary passed to the workers
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self.tesseract_cmd = tesseract_cmd
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._loop = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Admission semaphore bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._running = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        if self._executor is None:
+            # Spawned (not forked) workers: the server process runs threads
+            # whose locks a forked child could inherit in a held state
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Replace ``executor``'s worker processes (after a hung or crashed worker), unless already replaced."""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+        self.restarts += 1
+
+    async def extract(self, file_path: str, wait: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Extract the student ID from a document in a worker process.
+
+        Args:
+            file_path: Path to PDF or image file
+            wait: Longest wait in seconds for a queue slot (None waits as long as needed)
+
+        Returns:
+            ``IDExtractor.extract`` result
+
+        Raises:
+            OCRBusyError: No slot became free within ``wait`` seconds
+            OCRTimeoutError: The document took longer than ``timeout``
+        """
+        return await self._submit(wait, file_path, _extract, file_path, self.tesseract_cmd, self.timeout)
+
+    async def ocr_page(self, file_path: str, page: int, dpi: int = 200, wait: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Rasterize and OCR one page of a document in a worker process.
+
+        Args:
+            file_path: Path to PDF or image file
+            page: 1-based page number
+            dpi: Rendering resolution of PDF pages
+            wait: Longest wait in seconds for a queue slot (None waits as long as needed)
+
+        Returns:
+            ``IDExtractor.ocr_page`` result
+
+        Raises:
+            OCRBusyError: No slot became free within ``wait`` seconds
+            OCRTimeoutError: The page took longer than ``timeout``
+        """
+        label = f"page {page} of {file_path}"
+        return await self._submit(wait, label, _ocr_page, file_path, page, dpi, self.tesseract_cmd, self.timeout)
+
+    async def _submit(self, wait: Optional[float], label: str, fn, *args) -> Dict[str, Any]:
+        """Admit a task (waiting up to ``wait`` for a slot) and run it."""
+        slots = self._get_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise OCRBusyError(f"OCR queue is full ({self.max_pending} tasks pending)")
+
+        self.pending += 1
+        try:
+            # Only as many tasks as there are workers enter the executor, so a
+            # task's deadline runs from when a worker can start it, not from
+            # when it joined the queue
+            async with self._running:
+                return await self._run(label, fn, *args)
+        finally:
+            self.pending -= 1
+            slots.release()
+
+    async def _run(self, label: str, fn, *args) -> Dict[str, Any]:
+        """Run one task, restarting the pool if a worker hangs or dies."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                future = loop.run_in_executor(executor, fn, *args)
+                # Grace period beyond Tesseract's own timeout for image loading and result transfer
+                result = await asyncio.wait_for(future, timeout=self.timeout + 5)
+                break
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._restart(executor)
+                raise OCRTimeoutError(f"OCR of {label} took longer than {self.timeout:.0f}s")
+            except BrokenProcessPool:
+                # Also raised for tasks that shared the pool with a hung or crashed
+                # worker; those get one more try on the fresh pool
+                self._restart(executor)
+                if attempt == 0:
+                    continue
+                self.failed += 1
+                raise
+            except RuntimeError as e:
+                # pytesseract reports its own timeout as RuntimeError("Tesseract process timeout")
+                self.failed += 1
+                if "timeout" in str(e).lower():
+                    self.timeouts += 1
+                    raise OCRTimeoutError(f"OCR of {label} took longer than {self.timeout:.0f}s") from e
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+        self.completed += 1
+        return result
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, load and outcome counters."""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+        }
+
+
+@lru_cache
+def get_ocr_pool() -> OCRPool:
+    """Get the process-wide OCR pool (cached)."""
+    return OCRPool(
+        workers=settings.ocr_workers or None,
+        max_pending=settings.ocr_max_pending or None,
+        timeout=settings.ocr_timeout_seconds,
+        tesseract_cmd=settings.tesseract_cmd,
+    )
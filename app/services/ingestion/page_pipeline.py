@@ -0,0 +1,177 @@
+"""
+Opti-Scholar: Page Pipeline
+Multi-page document processing: pages rasterized lazily and OCRed in parallel, ID search that stops at the first confident match
+"""
+
+import time
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.ingestion.id_extractor import IDExtractor
+from app.services.ingestion.ocr_pool import OCRPool, get_ocr_pool
+
+
+Progress = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class PagePipeline:
+    """
+    Process every page of an answer booklet through the OCR worker pool.
+
+    Each page is rendered on its own at ``dpi`` inside a worker (nothing
+    is rasterized up front), and up to ``window`` pages are in flight at
+    once, so several pages are recognized in parallel while memory stays
+    bounded. The registration number is searched page by page in page
+    order as results arrive; once a match reaches ``id_confidence`` the
+    search stops. With ``full_text`` off, no further pages are scheduled
+    either, and the document is done as soon as its ID is known.
+
+    A page whose OCR fails is recorded and skipped; the document only
+    fails when no page yielded an ID or any text.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[OCRPool] = None,
+        dpi: int = 200,
+        id_confidence: float = 0.9,
+        window: Optional[int] = None,
+        full_text: bool = True
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            pool: OCR worker pool
+            dpi: Rendering resolution of PDF pages
+            id_confidence: ID match confidence that ends the search
+            window: Pages in flight at once (the pool's worker count if None)
+            full_text: OCR every page for the answer text, not only until the ID is found
+        """
+        self.pool = pool or get_ocr_pool()
+        self.dpi = dpi
+        self.id_confidence = id_confidence
+        self.window = window or self.pool.workers
+        self.full_text = full_text
+        self.extractor = IDExtractor()
+
+    async def process(self, file_path: str, progress: Optional[Progress] = None) -> Dict[str, Any]:
+        """
+        Extract the student ID and answer text of a document.
+
+        Args:
+            file_path: Path to PDF or image file
+            progress: Optional coroutine called with a progress dict after each page
+
+        Returns:
+            Dict with student_id, confidence, method, id_page, pages,
+            pages_processed, failed_pages (page -> error), answer_text,
+            raw_text (first 500 characters), processing_time_ms and timings
+            (milliseconds per stage)
+
+        Raises:
+            Exception: The first page error, when every page failed or came back empty
+        """
+        started = time.perf_counter()
+        pages = await asyncio.to_thread(self.extractor.page_count, file_path)
+        counted = time.perf_counter()
+
+        texts: Dict[int, str] = {}
+        errors: Dict[int, Exception] = {}
+        in_flight: Dict[int, asyncio.Future] = {}
+        next_page = 1
+        searched = 0
+        student_id, confidence, id_page, id_found_at = None, 0.0, None, None
+        rasterize_ms = recognize_ms = 0.0
+
+        try:
+            while True:
+                id_done = confidence >= self.id_confidence
+                while next_page <= pages and len(in_flight) < self.window and (self.full_text or not id_done):
+                    in_flight[next_page] = asyncio.ensure_future(self.pool.ocr_page(file_path, next_page, self.dpi))
+                    next_page += 1
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight.values(), return_when=asyncio.FIRST_COMPLETED)
+                for page in [p for p, task in in_flight.items() if task in done]:
+                    try:
+                        result = in_flight.pop(page).result()
+                    except Exception as e:
+                        print(f"OCR of page {page} of {file_path} failed: {type(e).__name__}: {e}")
+                        errors[page] = e
+                        texts[page] = ""  # Lets the ID search move past it
+                        continue
+                    texts[page] = result["text"] or ""
+                    rasterize_ms += result["rasterize_ms"]
+                    recognize_ms += result["recognize_ms"]
+
+                # Earlier pages win: the ID belongs on the cover, and answers
+                # on later pages may contain ID-like tokens
+                while confidence < self.id_confidence and searched + 1 in texts:
+                    searched += 1
+                    found_id, found_confidence = self.extractor.find_registration_number(texts[searched])
+                    if found_confidence > confidence:
+                        student_id, confidence, id_page = found_id, found_confidence, searched
+                    if confidence >= self.id_confidence:
+                        id_found_at = time.perf_counter()
+                        if not self.full_text:
+                            # Pages still running are not needed any more
+                            for task in in_flight.values():
+                                task.cancel()
+                            in_flight.clear()
+
+                if progress is not None:
+                    await progress({
+                        "pages": pages,
+                        "pages_processed": len(texts) - len(errors),
+                        "pages_failed": len(errors),
+                        "student_id": student_id,
+                        "id_confidence": confidence
+                    })
+        finally:
+            for task in in_flight.values():
+                task.cancel()
+
+        if errors and student_id is None and not any(text.strip() for text in texts.values()):
+            raise errors[min(errors)]
+
+        answer_text = self._join({page: text for page, text in texts.items() if page not in errors})
+        finished = time.perf_counter()
+        return {
+            "student_id": student_id,
+            "confidence": confidence,
+            "method": "ocr",
+            "id_page": id_page,
+            "pages": pages,
+            "pages_processed": len(texts) - len(errors),
+            "failed_pages": {page: f"{type(e).__name__}: {e}" for page, e in sorted(errors.items())},
+            "answer_text": answer_text,
+            "raw_text": answer_text[:500] if answer_text else None,
+            "processing_time_ms": int((finished - started) * 1000),
+            "timings": {
+                "page_count_ms": round((counted - started) * 1000, 1),
+                "rasterize_ms": round(rasterize_ms, 1),
+                "recognize_ms": round(recognize_ms, 1),
+                "id_found_ms": round((id_found_at - started) * 1000, 1) if id_found_at is not None else None,
+                "pipeline_ms": round((finished - started) * 1000, 1),
+            }
+        }
+
+    @staticmethod
+    def _join(texts: Dict[int, str]) -> str:
+        """Page texts in page order, separated by form feeds (as Tesseract ends a page)."""
+        parts: List[str] = [texts[page].strip() for page in sorted(texts)]
+        return "\n\f\n".join(parts)
+
+
+@lru_cache
+def get_page_pipeline() -> PagePipeline:
+    """Get the shared page pipeline (cached)."""
+    return PagePipeline(
+        dpi=settings.ocr_dpi,
+        id_confidence=settings.ocr_id_confidence,
+        full_text=settings.ocr_full_text,
+    )
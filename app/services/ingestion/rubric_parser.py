@@ -3,11 +3,9 @@ Opti-Scholar: Rubric Parser Service
 Convert natural language rubrics to structured JSON using Gemini LLM
 """
 
-import json
 from typing import Optional
-import google.generativeai as genai
 
-from app.core.config import settings
+from app.services.llm import LLMGateway, get_llm_gateway, load_json_lenient
 
 
 class RubricParser:
@@ -45,15 +43,16 @@ Rules:
 
 Return ONLY valid JSON, no explanation."""
 
-    def __init__(self):
-        """Initialize parser with Gemini client."""
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
-            self.model = genai.GenerativeModel(settings.gemini_model)
-        else:
-            self.model = None
+    def __init__(self, llm: Optional[LLMGateway] = None):
+        """
+        Initialize parser.
+        
+        Args:
+            llm: LLM gateway (the shared one by default)
+        """
+        self.llm = llm or get_llm_gateway()
     
-    def parse(self, raw_rubric: str) -> dict:
+    async def parse(self, raw_rubric: str) -> dict:
         """
         Parse natural language rubric to structured format.
         
@@ -63,22 +62,16 @@ Return ONLY valid JSON, no explanation."""
         Returns:
             Structured rubric dictionary
         """
-        if not self.model:
+        if not self.llm.available:
             # Return mock data for demo without API key
             return self._mock_parse(raw_rubric)
         
         try:
             prompt = f"{self.SYSTEM_PROMPT}\n\nParse this rubric:\n\n{raw_rubric}"
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,
-                    response_mime_type="application/json"
-                )
-            )
+            response_text = await self.llm.generate(prompt, temperature=0.1, json_mode=True)
             
-            result = json.loads(response.text)
+            result = load_json_lenient(response_text)
             
             # Validate structure
             self._validate_rubric(result)
@@ -0,0 +1,209 @@
+"""
+Opti-Scholar: Rubric Store
+Parse-once rubric repository with an in-memory cache of compiled rubrics
+"""
+
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import inspect, select, text
+
+from app.core.config import settings
+from app.core.database import engine, async_session_maker, init_db
+from app.models.models import Rubric
+from app.services.ingestion.rubric_parser import RubricParser
+from app.services.llm.cache import normalize_answer
+
+
+def rubric_content_hash(raw_text: str) -> str:
+    """Content address of a rubric: sha256 of its whitespace-normalized text."""
+    return hashlib.sha256(normalize_answer(raw_text).encode("utf-8")).hexdigest()
+
+
+def _migrate_content_hash(connection) -> int:
+    """
+    Add ``rubrics.content_hash`` to a database created before it existed and fill it in.
+
+    Returns:
+        Number of rubrics hashed
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("rubrics")}
+    if "content_hash" not in columns:
+        connection.execute(text("ALTER TABLE rubrics ADD COLUMN content_hash VARCHAR(64)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_rubrics_content_hash ON rubrics (content_hash)"))
+    rows = connection.execute(text("SELECT id, raw_text FROM rubrics WHERE content_hash IS NULL")).all()
+    for rubric_id, raw_text in rows:
+        connection.execute(
+            text("UPDATE rubrics SET content_hash = :content_hash WHERE id = :id"),
+            {"content_hash": rubric_content_hash(raw_text or ""), "id": rubric_id}
+        )
+    return len(rows)
+
+
+class CompiledRubric:
+    """
+    A parsed rubric with its prompt fragment rendered once.
+
+    Instances are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, rubric_id: str, content_hash: str, schema: Dict[str, Any],
+                 created_at: Optional[datetime] = None):
+        self.id = rubric_id
+        self.content_hash = content_hash
+        self.schema = schema
+        self.total_points = float(schema.get("total_points", 0))
+        self.created_at = created_at or datetime.utcnow()
+        # Rendered once, reused for every answer graded against this rubric
+        self.prompt_json = json.dumps(schema, indent=2)
+
+
+class RubricStore:
+    """
+    Rubrics keyed by ID and by content hash.
+
+    ``parse_and_store`` sends a rubric text to the LLM only the first time
+    that text is seen; later requests with the same content get the stored
+    rubric back. Lookups by ID are served from an in-memory LRU of compiled
+    rubrics, falling back to the ``rubrics`` table.
+    """
+
+    def __init__(self, parser: Optional[RubricParser] = None, max_entries: int = 256):
+        """
+        Initialize store.
+
+        Args:
+            parser: Rubric parser (a default one if None)
+            max_entries: Compiled rubrics kept in memory
+        """
+        self.parser = parser or RubricParser()
+        self.max_entries = max_entries
+        self._compiled: "OrderedDict[str, CompiledRubric]" = OrderedDict()
+        self._by_hash: Dict[str, str] = {}
+        self._parse_locks: Dict[str, asyncio.Lock] = {}
+        self._schema_ready = False
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.parses = 0
+
+    async def _ensure_schema(self):
+        """Create the platform tables on first use, migrating rubrics stored before content hashing."""
+        if not self._schema_ready:
+            await init_db()
+            async with engine.begin() as conn:
+                await conn.run_sync(_migrate_content_hash)
+            self._schema_ready = True
+
+    async def get(self, rubric_id: str) -> Optional[CompiledRubric]:
+        """Compiled rubric by ID, or None if unknown."""
+        compiled = self._compiled.get(rubric_id)
+        if compiled is not None:
+            self._compiled.move_to_end(rubric_id)
+            self.hits += 1
+            return compiled
+
+        self.misses += 1
+        await self._ensure_schema()
+        async with async_session_maker() as session:
+            row = await session.get(Rubric, rubric_id)
+        return self._remember(row) if row else None
+
+    async def get_by_hash(self, content_hash: str) -> Optional[CompiledRubric]:
+        """Compiled rubric whose raw text has ``content_hash``, or None."""
+        rubric_id = self._by_hash.get(content_hash)
+        if rubric_id is not None and rubric_id in self._compiled:
+            return await self.get(rubric_id)
+
+        await self._ensure_schema()
+        async with async_session_maker() as session:
+            row = (await session.execute(
+                select(Rubric).where(Rubric.content_hash == content_hash).limit(1)
+            )).scalar_one_or_none()
+        return self._remember(row) if row else None
+
+    async def parse_and_store(self, raw_text: str, exam_id: str) -> Tuple[CompiledRubric, bool]:
+        """
+        Parse a rubric unless the same text was parsed before, and store it for an exam.
+
+        Args:
+            raw_text: Teacher's rubric text
+            exam_id: Exam the rubric belongs to (one rubric per exam)
+
+        Returns:
+            Tuple of (compiled rubric, whether the LLM parser ran)
+        """
+        content_hash = rubric_content_hash(raw_text)
+        lock = self._parse_locks.setdefault(content_hash, asyncio.Lock())
+        async with lock:
+            existing = await self.get_by_hash(content_hash)
+            if existing is not None:
+                schema, parsed = existing.schema, False
+            else:
+                schema, parsed = await self.parser.parse(raw_text), True
+                self.parses += 1
+            row = await self._save(exam_id, raw_text, content_hash, schema)
+        self._parse_locks.pop(content_hash, None)
+        return self._remember(row), parsed
+
+    async def _save(self, exam_id: str, raw_text: str, content_hash: str, schema: Dict[str, Any]) -> Rubric:
+        """Insert or replace the exam's rubric row."""
+        await self._ensure_schema()
+        async with async_session_maker() as session:
+            row = (await session.execute(
+                select(Rubric).where(Rubric.exam_id == exam_id)
+            )).scalar_one_or_none()
+            if row is None:
+                row = Rubric(exam_id=exam_id)
+                session.add(row)
+            elif row.content_hash == content_hash:
+                return row
+            else:
+                self._forget(row.id)
+            row.raw_text = raw_text
+            row.content_hash = content_hash
+            row.parsed_schema = schema
+            row.total_points = float(schema.get("total_points", 0))
+            row.created_at = datetime.utcnow()
+            await session.commit()
+        return row
+
+    def _remember(self, row: Rubric) -> CompiledRubric:
+        """Compile a row into the LRU (reusing an existing compiled copy)."""
+        compiled = self._compiled.get(row.id)
+        if compiled is None or compiled.content_hash != row.content_hash:
+            compiled = CompiledRubric(row.id, row.content_hash, row.parsed_schema, row.created_at)
+        self._compiled[row.id] = compiled
+        self._compiled.move_to_end(row.id)
+        self._by_hash[row.content_hash] = row.id
+        while len(self._compiled) > self.max_entries:
+            _, evicted = self._compiled.popitem(last=False)
+            if self._by_hash.get(evicted.content_hash) == evicted.id:
+                del self._by_hash[evicted.content_hash]
+        return compiled
+
+    def _forget(self, rubric_id: str):
+        """Drop a compiled rubric whose row is about to change."""
+        compiled = self._compiled.pop(rubric_id, None)
+        if compiled is not None and self._by_hash.get(compiled.content_hash) == rubric_id:
+            del self._by_hash[compiled.content_hash]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "parses": self.parses,
+            "entries": len(self._compiled),
+        }
+
+
+@lru_cache
+def get_rubric_store() -> RubricStore:
+    """Get the process-wide rubric store (cached)."""
+    return RubricStore(max_entries=settings.rubric_cache_entries)
@@ -0,0 +1,38 @@
+"""
+Opti-Scholar: Ingestion Jobs
+Background job handlers for uploaded exam documents
+"""
+
+import time
+from typing import Any, Dict
+
+from app.services.ingestion.document_store import get_document_store
+from app.services.ingestion.page_pipeline import get_page_pipeline
+from app.services.jobs import JobQueue, JobContext
+
+
+async def process_document_job(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Extract the student ID and answer text of an uploaded document.
+
+    Pages are OCRed in the worker process pool; progress (pages done, ID
+    once found) is reported on the job, and the outcome is written to the
+    document's record, which the status endpoint reads.
+    """
+    store = get_document_store()
+    await store.start(context.id, payload["file_path"], context.attempt)
+    started = time.perf_counter()
+    try:
+        result = await get_page_pipeline().process(payload["file_path"], progress=context.report)
+    except Exception as e:
+        if context.attempt >= context.max_attempts:
+            await store.fail(context.id, f"{type(e).__name__}: {e}")
+        raise
+    await store.complete(context.id, result, ocr_ms=(time.perf_counter() - started) * 1000)
+    # The answer text lives in the document record, not in the job table
+    return {k: v for k, v in result.items() if k != "answer_text"}
+
+
+def register_ingestion_jobs(queue: JobQueue):
+    """Register the ingestion job kinds on a queue."""
+    queue.register("process_document", process_document_job)
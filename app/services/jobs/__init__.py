@@ -0,0 +1,4 @@
+"""Opti-Scholar Background Jobs Package"""
+from app.services.jobs.queue import JobQueue, JobContext, FINISHED_STATUSES, get_job_queue
+
+__all__ = ["JobQueue", "JobContext", "FINISHED_STATUSES", "get_job_queue"]
@@ -0,0 +1,433 @@
+"""
+Opti-Scholar: Job Queue
+In-process background job queue with a persisted job table, retries and dead-lettering
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+# Job lifecycle: queued -> running -> completed
+#                             \-> retrying -> running ... -> dead (retries exhausted)
+FINISHED_STATUSES = ("completed", "dead")
+
+
+class JobContext:
+    """Handle passed to a job handler for reporting progress."""
+
+    def __init__(self, queue: "JobQueue", job: Dict[str, Any]):
+        self.queue = queue
+        self.id = job["job_id"]
+        self.kind = job["kind"]
+        self.attempt = job["attempts"]
+        self.max_attempts = job["max_attempts"]
+        self.lease = job["lease"]
+
+    async def report(self, progress: Dict[str, Any]):
+        """Record progress (visible on the status endpoint) and extend the job's lease."""
+        await asyncio.to_thread(self.queue._save_progress, self.id, self.lease, progress)
+
+
+Handler = Callable[[Dict[str, Any], JobContext], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobQueue:
+    """
+    Background jobs run by a pool of async workers, with state kept in SQLite.
+
+    ``enqueue`` persists a job and returns at once; one of the queue's workers
+    claims it, runs the handler registered for its kind and stores the result.
+    A failing job is retried with exponential backoff and moved to the dead
+    letter state (``dead``) once ``max_attempts`` are used up.
+
+    Claims are leases: a job whose worker died (e.g. the process was
+    restarted) is picked up again once its lease expires, so no job is lost
+    and several processes can share one job table. A running job's lease is
+    renewed in the background (and on every progress report), and each
+    claim gets its own lease token, so a worker that lost its lease cannot
+    overwrite the outcome recorded by the worker that took the job over.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        workers: int = 4,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0,
+        lease_seconds: float = 300.0,
+        poll_interval: float = 1.0
+    ):
+        """
+        Initialize queue.
+
+        Args:
+            path: SQLite file holding the job table (``":memory:"`` for a process-local queue)
+            workers: Number of concurrent worker tasks
+            max_attempts: Default attempts per job before it is dead-lettered
+            backoff_base: First retry delay in seconds (doubles per attempt)
+            lease_seconds: How long a claimed job stays with its worker without a heartbeat
+            poll_interval: Idle workers re-check for due retries this often (and back off
+                from this after a job table error)
+        """
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Handler] = {}
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        # Metrics
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the job table on first use (caller holds the db lock)."""
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+                " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " max_attempts INTEGER NOT NULL, progress TEXT, result TEXT, error TEXT,"
+                " run_after REAL NOT NULL, locked_until REAL, lease TEXT,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL, finished_at REAL)"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]
+            if "lease" not in columns:
+                # Job table created before lease tokens
+                self._db.execute("ALTER TABLE jobs ADD COLUMN lease TEXT")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_run_after ON jobs (status, run_after)")
+        return self._db
+
+    # ============================================
+    # Producer API
+    # ============================================
+
+    def register(self, kind: str, handler: Handler):
+        """Register the coroutine ``handler(payload, context) -> result`` for jobs of ``kind``."""
+        self.handlers[kind] = handler
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        job_id: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Persist a new job and wake a worker.
+
+        Args:
+            kind: Registered job kind, e.g. ``"grade_submission"``
+            payload: JSON-serializable handler input
+            job_id: Caller-chosen ID (a UUID by default)
+            max_attempts: Attempts before dead-lettering (queue default if None)
+
+        Returns:
+            The job as returned by ``get``
+        """
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO jobs (id, kind, payload, status, max_attempts, run_after, created_at, updated_at)"
+            " VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), max_attempts or self.max_attempts,
+             now, now, now)
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of a job, or None if unknown."""
+        row = await asyncio.to_thread(self._fetch_one, "SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._to_dict(row) if row else None
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally only those with ``status`` (e.g. ``"dead"``)."""
+        query, params = "SELECT * FROM jobs", ()
+        if status:
+            query, params = query + " WHERE status = ?", (status,)
+        rows = await asyncio.to_thread(self._fetch_all, query + " ORDER BY created_at DESC LIMIT ?", params + (limit,))
+        return [self._to_dict(row) for row in rows]
+
+    async def active_payloads(self, kind: str) -> List[Dict[str, Any]]:
+        """Payloads of the unfinished (queued, running or retrying) jobs of ``kind``."""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT payload FROM jobs WHERE kind = ? AND status NOT IN (?, ?)",
+            (kind, *FINISHED_STATUSES)
+        )
+        return [json.loads(row["payload"]) for row in rows]
+
+    async def requeue(self, job_id: str) -> bool:
+        """Give a dead-lettered job a fresh set of attempts; False if it is not dead."""
+        now = time.time()
+        updated = await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, updated_at = ?, finished_at = NULL"
+            " WHERE id = ? AND status = 'dead'",
+            (now, now, job_id)
+        )
+        if updated and self._wakeup is not None:
+            self._wakeup.set()
+        return updated > 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this process's workers."""
+        return {
+            "workers": len(self._tasks),
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+    # ============================================
+    # Workers
+    # ============================================
+
+    def start(self):
+        """Start the worker tasks on the running event loop (idempotent)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are picked up again once their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    async def _worker(self):
+        """Claim and run jobs until cancelled; job table errors are logged and retried after a pause."""
+        failures = 0
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim, time.time())
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._run(job)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # E.g. the database is locked or the disk is full: keep the worker alive
+                failures += 1
+                delay = min(self.poll_interval * 2 ** (failures - 1), 60.0)
+                print(f"Job worker error ({type(e).__name__}: {e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _heartbeat(self, job: Dict[str, Any]):
+        """Renew a running job's lease until cancelled or the lease is lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self._renew_lease, job["job_id"], job["lease"])
+            except Exception as e:
+                print(f"Job {job['job_id']} lease renewal failed: {type(e).__name__}: {e}")
+                continue
+            if not renewed:
+                print(f"Job {job['job_id']} lost its lease to another worker")
+                return
+
+    async def _run(self, job: Dict[str, Any]):
+        """Run one claimed job and record its outcome."""
+        handler = self.handlers.get(job["kind"])
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            result = await handler(job["payload"], JobContext(self, job))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Job {job['job_id']} ({job['kind']}) attempt {job['attempts']} failed: {error}")
+            if job["attempts"] >= job["max_attempts"] or handler is None:
+                if await asyncio.to_thread(self._finish, job["job_id"], "dead", None, error, job["lease"]):
+                    self.dead += 1
+            else:
+                delay = self.backoff_base * 2 ** (job["attempts"] - 1)
+                delay *= random.uniform(0.8, 1.2)
+                if await asyncio.to_thread(self._retry_later, job["job_id"], job["lease"], error, time.time() + delay):
+                    self.retried += 1
+            return
+        finally:
+            heartbeat.cancel()
+
+        if await asyncio.to_thread(self._finish, job["job_id"], "completed", result, None, job["lease"]):
+            self.completed += 1
+        else:
+            print(f"Job {job['job_id']} finished after losing its lease; result discarded")
+
+    # ============================================
+    # Persistence (runs in worker threads)
+    # ============================================
+
+    def _execute(self, query: str, params: tuple = ()) -> int:
+        with self._db_lock:
+            return self._connection().execute(query, params).rowcount
+
+    def _fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            cursor = self._connection().execute(query, params)
+            row = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    def _fetch_all(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            cursor = self._connection().execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _claim(self, now: float) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the oldest due job, or one whose lease expired.
+
+        An expired lease used up an attempt, so a reclaimed job that has no
+        attempts left is dead-lettered instead of being run again.
+        ``BEGIN IMMEDIATE`` serializes claims across processes sharing the file.
+        """
+        with self._db_lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    cursor = db.execute(
+                        "SELECT * FROM jobs WHERE (status IN ('queued', 'retrying') AND run_after <= ?)"
+                        " OR (status = 'running' AND locked_until < ?)"
+                        " ORDER BY run_after LIMIT 1",
+                        (now, now)
+                    )
+                    row = cursor.fetchone()
+                    if row is None:
+                        db.execute("COMMIT")
+                        return None
+                    job = dict(zip([c[0] for c in cursor.description], row))
+                    if job["status"] != "running" or job["attempts"] < job["max_attempts"]:
+                        break
+                    self.dead += 1
+                    db.execute(
+                        "UPDATE jobs SET status = 'dead', error = ?, locked_until = NULL, lease = NULL,"
+                        " updated_at = ?, finished_at = ? WHERE id = ?",
+                        (f"Lease expired on the last of {job['max_attempts']} attempts"
+                         + (f" (last error: {job['error']})" if job.get("error") else ""), now, now, job["id"])
+                    )
+                job["status"] = "running"
+                job["attempts"] += 1
+                job["lease"] = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = ?, locked_until = ?, lease = ?, updated_at = ?"
+                    " WHERE id = ?",
+                    (job["attempts"], now + self.lease_seconds, job["lease"], now, job["id"])
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return self._to_dict(job, with_payload=True)
+
+    # Updates by a worker match the job's current lease token, so they are
+    # no-ops (rowcount 0) once another worker has reclaimed the job.
+
+    def _save_progress(self, job_id: str, lease: str, progress: Dict[str, Any]) -> bool:
+        now = time.time()
+        return self._execute(
+            "UPDATE jobs SET progress = ?, locked_until = ?, updated_at = ? WHERE id = ? AND lease = ?",
+            (json.dumps(progress, ensure_ascii=False, default=str), now + self.lease_seconds, now, job_id, lease)
+        ) > 0
+
+    def _renew_lease(self, job_id: str, lease: str) -> bool:
+        now = time.time()
+        return self._execute(
+            "UPDATE jobs SET locked_until = ? WHERE id = ? AND lease = ? AND status = 'running'",
+            (now + self.lease_seconds, job_id, lease)
+        ) > 0
+
+    def _retry_later(self, job_id: str, lease: str, error: str, run_after: float) -> bool:
+        return self._execute(
+            "UPDATE jobs SET status = 'retrying', error = ?, run_after = ?, locked_until = NULL, lease = NULL,"
+            " updated_at = ? WHERE id = ? AND lease = ?",
+            (error, run_after, time.time(), job_id, lease)
+        ) > 0
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str],
+                lease: Optional[str] = None) -> bool:
+        """Record a final outcome; with ``lease``, only if that claim still holds the job."""
+        now = time.time()
+        query = ("UPDATE jobs SET status = ?, result = ?, error = ?, locked_until = NULL, lease = NULL,"
+                 " updated_at = ?, finished_at = ? WHERE id = ?")
+        params = (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                  error, now, now, job_id)
+        if lease is not None:
+            query, params = query + " AND lease = ?", params + (lease,)
+        return self._execute(query, params) > 0
+
+    @staticmethod
+    def _to_dict(row: Dict[str, Any], with_payload: bool = False) -> Dict[str, Any]:
+        """Public view of a job row (the payload and lease token are only handed to workers)."""
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "progress": json.loads(row["progress"]) if row.get("progress") else None,
+            "result": json.loads(row["result"]) if row.get("result") else None,
+            "error": row.get("error"),
+            "created_at": _isoformat(row["created_at"]),
+            "updated_at": _isoformat(row["updated_at"]),
+            "finished_at": _isoformat(row.get("finished_at")),
+        }
+        if with_payload:
+            job["payload"] = json.loads(row["payload"])
+            job["lease"] = row["lease"]
+        return job
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    """UTC ISO-8601 string for a stored epoch timestamp."""
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+@lru_cache
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue (cached)."""
+    return JobQueue(
+        settings.job_queue_path,
+        workers=settings.job_workers,
+        max_attempts=settings.job_max_attempts,
+        backoff_base=settings.job_retry_backoff_seconds,
+        lease_seconds=settings.job_lease_seconds,
+    )
@@ -0,0 +1,20 @@
+"""Opti-Scholar LLM Gateway Package"""
+from app.services.llm.gateway import LLMGateway, LLMError, TokenBucket, get_llm_gateway
+from app.services.llm.backends import LLMBackend, GeminiBackend, FakeBackend
+from app.services.llm.cache import GradingCache, grading_cache_key, get_grading_cache
+from app.services.llm.structured import (
+    GRADE_SCHEMA, BATCH_GRADE_SCHEMA, RUBRIC_GRADE_SCHEMA, FEEDBACK_SCHEMA, GradingOutputError, load_json_lenient,
+    parse_grade, parse_grades, parse_rubric_grade,
+)
+from app.services.llm.prompts import (
+    PromptBuilder, PromptPrefix, Prompt, prompt_prefix, estimate_tokens, fit_to_budget,
+)
+
+__all__ = [
+    "LLMGateway", "LLMError", "TokenBucket", "get_llm_gateway",
+    "LLMBackend", "GeminiBackend", "FakeBackend",
+    "GradingCache", "grading_cache_key", "get_grading_cache",
+    "GRADE_SCHEMA", "BATCH_GRADE_SCHEMA", "RUBRIC_GRADE_SCHEMA", "FEEDBACK_SCHEMA", "GradingOutputError",
+    "load_json_lenient", "parse_grade", "parse_grades", "parse_rubric_grade",
+    "PromptBuilder", "PromptPrefix", "Prompt", "prompt_prefix", "estimate_tokens", "fit_to_budget",
+]
@@ -0,0 +1,284 @@
+"""
+Opti-Scholar: LLM Backends
+Provider adapters used by the LLM gateway (Gemini and a deterministic fake)
+"""
+
+import asyncio
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any
+
+try:
+    import google.generativeai as genai
+    from google.api_core import exceptions as google_exceptions
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+
+class LLMBackend(ABC):
+    """Interface of a text-generation provider."""
+
+    name = "base"
+
+    @abstractmethod
+    async def generate(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float] = None,
+        json_mode: bool = False,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Return the model's text completion for ``prompt`` (JSON matching ``schema`` if given)."""
+
+    async def stream(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Yield the completion for ``prompt`` in pieces as the model produces them."""
+        # Providers without streaming deliver the whole text as one piece
+        yield await self.generate(prompt, model, temperature)
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether a failed call may succeed if repeated."""
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the async ``generate_content_async`` API."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        """
+        Configure the Gemini client once for the whole process.
+        
+        Args:
+            api_key: Gemini API key
+        """
+        if not GENAI_AVAILABLE:
+            raise RuntimeError("google-generativeai is not installed")
+        genai.configure(api_key=api_key)
+        self._models: Dict[str, Any] = {}
+
+    def _model(self, model: str):
+        """Reuse one GenerativeModel per model name."""
+        if model not in self._models:
+            self._models[model] = genai.GenerativeModel(model)
+        return self._models[model]
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float] = None,
+        json_mode: bool = False,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        config = {}
+        if temperature is not None:
+            config["temperature"] = temperature
+        if json_mode or schema:
+            config["response_mime_type"] = "application/json"
+        if schema:
+            config["response_schema"] = schema
+
+        response = await self._model(model).generate_content_async(
+            prompt,
+            generation_config=genai.types.GenerationConfig(**config) if config else None
+        )
+        return response.text
+
+    async def stream(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        config = genai.types.GenerationConfig(temperature=temperature) if temperature is not None else None
+        response = await self._model(model).generate_content_async(prompt, generation_config=config, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def is_retryable(self, error: Exception) -> bool:
+        if super().is_retryable(error):
+            return True
+        return isinstance(error, (
+            google_exceptions.ResourceExhausted,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.InternalServerError,
+        ))
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline backend for tests and local development.
+    
+    The default responder derives a stable score from a hash of the prompt
+    and answers with structured JSON (or the streamed feedback lines when
+    the prompt asks for them), so grading code paths run end to end
+    without network access. Calls with an array schema (batch grading) get
+    one grade per answer ID found in the prompt, and rubric grading calls
+    get a score for each criterion of the rubric in the prompt.
+    """
+
+    name = "fake"
+
+    def __init__(self, responder: Optional[Callable[[str, bool], str]] = None, latency: float = 0.0,
+                 chunk_size: int = 16):
+        """
+        Initialize fake backend.
+        
+        Args:
+            responder: ``(prompt, json_mode) -> text``; defaults to ``default_response``
+            latency: Simulated round-trip time in seconds
+            chunk_size: Characters per piece when streaming
+        """
+        self.responder = responder or self.default_response
+        self._default_responder = responder is None
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls: List[Dict[str, Any]] = []
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float] = None,
+        json_mode: bool = False,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        json_mode = json_mode or schema is not None
+        self.calls.append({
+            "prompt": prompt, "model": model, "temperature": temperature, "json_mode": json_mode, "schema": schema
+        })
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._default_responder and schema is not None:
+            if schema.get("type") == "ARRAY":
+                return self.batch_response(prompt)
+            if "criteria_scores" in schema.get("properties", {}):
+                return self.rubric_response(prompt)
+        return self.responder(prompt, json_mode)
+
+    async def stream(
+        self,
+        prompt: str,
+        model: str,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """The response in ``chunk_size`` pieces, the latency spread evenly over them."""
+        self.calls.append({
+            "prompt": prompt, "model": model, "temperature": temperature, "json_mode": False, "schema": None,
+            "stream": True
+        })
+        text = self.responder(prompt, False)
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        for piece in pieces:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(pieces))
+            yield piece
+
+    @staticmethod
+    def _fake_score(text: str) -> float:
+        """Stable pseudo-score for ``text``: a fraction in [0.5, 1.0) of a 10-point scale."""
+        fraction = 0.5 + int(hashlib.sha1(text.encode()).hexdigest()[:8], 16) % 50 / 100
+        return round(10 * fraction, 1)
+
+    @staticmethod
+    def _embedded(prompt: str, opener: str, accept: Callable[[Any], bool]) -> Any:
+        """The first JSON value starting with ``opener`` embedded in the prompt that ``accept`` takes, or None."""
+        decoder = json.JSONDecoder()
+        start = prompt.find(opener)
+        while start != -1:
+            try:
+                value, _ = decoder.raw_decode(prompt, start)
+            except ValueError:
+                value = None
+            if value is not None and accept(value):
+                return value
+            start = prompt.find(opener, start + 1)
+        return None
+
+    @classmethod
+    def _batch_items(cls, prompt: str) -> List[Dict[str, Any]]:
+        """The first JSON array of objects with an ``id`` embedded in the prompt, if any."""
+        return cls._embedded(
+            prompt, "[",
+            lambda v: isinstance(v, list) and bool(v) and all(isinstance(i, dict) and "id" in i for i in v)
+        ) or []
+
+    @classmethod
+    def batch_response(cls, prompt: str) -> str:
+        """One pseudo-grade per answer of a batch prompt, keyed by the answer's ID."""
+        return json.dumps([
+            {
+                "id": str(item["id"]),
+                "score": cls._fake_score(json.dumps(item, sort_keys=True)),
+                "feedback": "Fake feedback: covers the main points.",
+                "reasoning": "Fake reasoning: deterministic score derived from the answer."
+            }
+            for item in cls._batch_items(prompt)
+        ])
+
+    @classmethod
+    def rubric_response(cls, prompt: str) -> str:
+        """Pseudo-grade per criterion of the rubric embedded in the prompt (see ``RUBRIC_GRADE_SCHEMA``)."""
+        rubric = cls._embedded(prompt, "{", lambda v: isinstance(v, dict) and isinstance(v.get("criteria"), list)) or {}
+        criteria_scores = []
+        for criterion in rubric.get("criteria", []):
+            points = float(criterion.get("points") or 0)
+            fraction = cls._fake_score(f"{prompt}\n{criterion.get('id')}") / 10
+            criteria_scores.append({
+                "id": str(criterion.get("id")),
+                "score": round(points * fraction, 1),
+                "max_score": points,
+                "reasoning": "Fake reasoning: deterministic score derived from the answer."
+            })
+        max_score = float(rubric.get("total_points") or sum(c["max_score"] for c in criteria_scores) or 10)
+        total = sum(c["score"] for c in criteria_scores) if criteria_scores else cls._fake_score(prompt)
+        return json.dumps({
+            "total_score": round(min(total, max_score), 1),
+            "max_score": max_score,
+            "criteria_scores": criteria_scores,
+            "deductions": [],
+            "overall_feedback": "Fake feedback: covers the main points."
+        })
+
+    @classmethod
+    def default_response(cls, prompt: str, json_mode: bool) -> str:
+        """Stable pseudo-grade for a prompt: a fraction in [0.5, 1.0) of the score scale."""
+        score = cls._fake_score(prompt)
+        feedback = "Fake feedback: covers the main points."
+        reasoning = "Fake reasoning: deterministic score derived from the prompt."
+        if "NEXT_STEP:" in prompt:
+            # Line-per-item feedback format used for streaming
+            return (f"SUMMARY: {feedback}\nSTRENGTH: Clear structure\nIMPROVEMENT: Add examples\n"
+                    f"NEXT_STEP: Review the chapter summary\nTONE: encouraging")
+        # Every grading path asks for structured output, so answer with JSON
+        # even when JSON mode was not requested
+        return json.dumps({
+            "score": score,
+            "total_score": score,
+            "max_score": 10,
+            "total_points": 10,
+            "criteria": [
+                {"id": "c1", "description": "Fake criterion", "points": 10, "partial_credit": True}
+            ],
+            "criteria_scores": [],
+            "deductions": [],
+            "feedback": feedback,
+            "overall_feedback": feedback,
+            "reasoning": reasoning,
+            "summary": feedback,
+            "strengths": ["Clear structure"],
+            "improvements": ["Add examples"],
+            "next_steps": ["Review the chapter summary"],
+            "tone": "encouraging"
+        })
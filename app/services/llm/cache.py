@@ -0,0 +1,219 @@
+"""
+Opti-Scholar: Grading Cache
+Content-addressed, persistent cache of LLM grading results
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+def normalize_answer(text: str) -> str:
+    """Canonical form of an answer: Unicode NFKC, trimmed, whitespace runs collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def grading_cache_key(
+    answer_text: str,
+    rubric: Any,
+    model: str,
+    temperature: Optional[float],
+    prompt_version: str,
+    **extra: Any
+) -> str:
+    """
+    Content address of a grading request.
+    
+    Two requests share a key exactly when the normalized answer, rubric,
+    model, temperature, prompt version and any ``extra`` inputs (e.g. the
+    subject context) are equal, so a cached result is only reused where
+    the model would have seen the same prompt.
+    """
+    payload = json.dumps({
+        "answer": normalize_answer(answer_text),
+        "rubric": rubric,
+        "model": model,
+        "temperature": temperature,
+        "prompt_version": prompt_version,
+        "extra": extra,
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GradingCache:
+    """
+    LRU/TTL cache of grading results, persisted in a SQLite file.
+    
+    Recently used entries are also kept in memory, so a repeat of a hot
+    request is a dict lookup; colder entries cost one indexed read from disk.
+    Disk I/O runs in a worker thread. Entries expire ``ttl_seconds`` after
+    they were written, and the least recently used ones are evicted once the
+    store holds more than ``max_entries``.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 30 * 24 * 3600,
+                 memory_entries: int = 1024):
+        """
+        Initialize cache.
+        
+        Args:
+            path: SQLite file (``":memory:"`` for a process-local cache)
+            max_entries: Maximum entries kept on disk
+            ttl_seconds: Lifetime of an entry
+            memory_entries: Maximum entries kept in the in-memory LRU
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the store on first use (caller holds the db lock)."""
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS grading_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_grading_cache_accessed ON grading_cache (accessed_at)")
+            self._db.commit()
+        return self._db
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``, or None on a miss or an expired entry."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if now - created_at < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(value)
+            del self._memory[key]
+
+        row = await asyncio.to_thread(self._disk_get, key, now)
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, row[0], row[1])
+        return json.loads(row[1])
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        """Store a result under ``key``."""
+        value = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        self._remember(key, now, value)
+        await asyncio.to_thread(self._disk_set, key, value, now)
+        self.writes += 1
+
+    def _remember(self, key: str, created_at: float, value: str):
+        """Insert into the in-memory LRU."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        """(created_at, value) from disk, refreshing its LRU timestamp; expired rows are dropped."""
+        with self._db_lock:
+            db = self._connection()
+            row = db.execute("SELECT created_at, value FROM grading_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[0] >= self.ttl_seconds:
+                db.execute("DELETE FROM grading_cache WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE grading_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            db.commit()
+            return row
+
+    def _disk_set(self, key: str, value: str, now: float):
+        """Upsert a row and evict expired and least recently used rows past the size limit."""
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO grading_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            evicted = db.execute("DELETE FROM grading_cache WHERE created_at <= ?", (now - self.ttl_seconds,)).rowcount
+            count = db.execute("SELECT COUNT(*) FROM grading_cache").fetchone()[0]
+            if count > self.max_entries:
+                evicted += db.execute(
+                    "DELETE FROM grading_cache WHERE key IN ("
+                    " SELECT key FROM grading_cache ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+            db.commit()
+            self.evictions += evicted
+
+    def clear(self):
+        """Drop every entry (memory and disk)."""
+        self._memory.clear()
+        with self._db_lock:
+            db = self._connection()
+            db.execute("DELETE FROM grading_cache")
+            db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+        }
+
+
+class _NullCache:
+    """Stand-in used when the grading cache is disabled."""
+
+    async def get(self, key: str) -> None:
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": False}
+
+
+@lru_cache
+def get_grading_cache():
+    """Get the process-wide grading cache (cached)."""
+    if not settings.grading_cache_enabled:
+        return _NullCache()
+    return GradingCache(
+        settings.grading_cache_path,
+        max_entries=settings.grading_cache_max_entries,
+        ttl_seconds=settings.grading_cache_ttl_hours * 3600,
+    )
@@ -0,0 +1,287 @@
+"""
+Opti-Scholar: LLM Gateway
+Shared async entry point for all LLM calls: concurrency limit, rate limit, timeouts and retries
+"""
+
+import asyncio
+import random
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.services.llm.backends import LLMBackend, GeminiBackend, FakeBackend
+
+
+# Placeholder keys shipped in .env.example / docs
+_PLACEHOLDER_KEYS = {"", "your-gemini-api-key", "your-gemini-api-key-here"}
+
+
+class LLMError(Exception):
+    """An LLM call failed after all retries (or no backend is configured)."""
+    pass
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+    
+    Holds up to ``capacity`` tokens and refills at ``rate`` tokens per second;
+    each request takes one token, waiting for a refill if the bucket is empty.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        wait = self.delay()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class LLMGateway:
+    """
+    One shared client for every service that talks to an LLM.
+    
+    Calls are non-blocking (the event loop keeps serving other requests
+    while a completion is in flight), limited to ``max_concurrency`` in
+    flight at once, spaced by a token bucket so bursts stay under the
+    provider quota, cut off after ``timeout`` seconds, and retried with
+    full-jitter exponential backoff on transient errors.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[LLMBackend],
+        model: str = "gemini-2.5-flash",
+        max_concurrency: int = 8,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        requests_per_minute: float = 60.0
+    ):
+        """
+        Initialize gateway.
+        
+        Args:
+            backend: Provider adapter, or None when no LLM is configured
+            model: Default model name
+            max_concurrency: Maximum requests in flight
+            timeout: Seconds before a single attempt is abandoned
+            max_retries: Extra attempts after a transient failure
+            backoff_base: First backoff ceiling in seconds (doubles per retry)
+            backoff_max: Upper bound on a single backoff
+            requests_per_minute: Sustained request rate (burst = max_concurrency)
+        """
+        self.backend = backend
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(requests_per_minute / 60.0, max(1, max_concurrency))
+        self._loop = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Metrics
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.streams = 0
+        self.total_first_chunk_latency = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Whether a backend is configured (callers fall back to heuristics otherwise)."""
+        return self.backend is not None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        json_mode: bool = False,
+        model: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Get a completion for ``prompt``.
+        
+        Args:
+            prompt: Full prompt text
+            temperature: Sampling temperature (provider default if None)
+            json_mode: Ask the provider for a JSON response
+            model: Model name (gateway default if None)
+            schema: Response schema for structured output (implies ``json_mode``)
+            
+        Returns:
+            Response text
+            
+        Raises:
+            LLMError: No backend configured, or the call kept failing
+        """
+        if self.backend is None:
+            raise LLMError("No LLM backend configured")
+
+        semaphore = self._get_semaphore()
+        attempt = 0
+        while True:
+            async with semaphore:
+                await self.bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    text = await asyncio.wait_for(
+                        self.backend.generate(prompt, model or self.model, temperature, json_mode, schema),
+                        timeout=self.timeout
+                    )
+                    self.calls += 1
+                    self.total_latency += time.perf_counter() - started
+                    return text
+                except Exception as e:
+                    error = e
+
+            if attempt >= self.max_retries or not self.backend.is_retryable(error):
+                self.failures += 1
+                raise LLMError(f"LLM call failed: {type(error).__name__}: {error}") from error
+
+            # Back off outside the semaphore so other requests can proceed
+            attempt += 1
+            self.retries += 1
+            ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+            await asyncio.sleep(random.uniform(0, ceiling))
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the completion for ``prompt`` in pieces as the model produces them.
+        
+        Subject to the same concurrency and rate limits as ``generate``; each
+        piece must arrive within ``timeout`` seconds. A transient failure is
+        retried only before the first piece was yielded, since the caller may
+        already have forwarded it.
+        
+        Args:
+            prompt: Full prompt text
+            temperature: Sampling temperature (provider default if None)
+            model: Model name (gateway default if None)
+            
+        Raises:
+            LLMError: No backend configured, or the call failed
+        """
+        if self.backend is None:
+            raise LLMError("No LLM backend configured")
+
+        semaphore = self._get_semaphore()
+        attempt = 0
+        while True:
+            emitted = False
+            async with semaphore:
+                await self.bucket.acquire()
+                started = time.perf_counter()
+                pieces = self.backend.stream(prompt, model or self.model, temperature)
+                try:
+                    while True:
+                        try:
+                            piece = await asyncio.wait_for(pieces.__anext__(), timeout=self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        if not emitted:
+                            emitted = True
+                            self.streams += 1
+                            self.total_first_chunk_latency += time.perf_counter() - started
+                        yield piece
+                    self.calls += 1
+                    self.total_latency += time.perf_counter() - started
+                    return
+                except Exception as e:
+                    error = e
+                finally:
+                    await pieces.aclose()
+
+            if emitted or attempt >= self.max_retries or not self.backend.is_retryable(error):
+                self.failures += 1
+                raise LLMError(f"LLM stream failed: {type(error).__name__}: {error}") from error
+
+            attempt += 1
+            self.retries += 1
+            ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+            await asyncio.sleep(random.uniform(0, ceiling))
+
+    def stats(self) -> dict:
+        """Call counters and average latency."""
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "avg_latency_ms": round(self.total_latency / self.calls * 1000, 1) if self.calls else 0.0,
+            "streams": self.streams,
+            "avg_first_chunk_ms": (
+                round(self.total_first_chunk_latency / self.streams * 1000, 1) if self.streams else 0.0
+            )
+        }
+
+
+def build_backend(name: str) -> Optional[LLMBackend]:
+    """
+    Backend selected by ``settings.llm_backend``.
+    
+    ``"gemini"`` needs a real API key and otherwise yields None, so services
+    fall back to their offline heuristics exactly as before; ``"fake"`` is the
+    deterministic test backend; ``"none"`` disables LLM calls.
+    """
+    if name == "fake":
+        return FakeBackend()
+    if name == "gemini" and settings.gemini_api_key not in _PLACEHOLDER_KEYS:
+        return GeminiBackend(settings.gemini_api_key)
+    return None
+
+
+@lru_cache
+def get_llm_gateway() -> LLMGateway:
+    """Get the process-wide LLM gateway (cached)."""
+    return LLMGateway(
+        build_backend(settings.llm_backend),
+        model=settings.gemini_model,
+        max_concurrency=settings.llm_max_concurrency,
+        timeout=settings.llm_timeout_seconds,
+        max_retries=settings.llm_max_retries,
+        requests_per_minute=settings.llm_requests_per_minute,
+    )
@@ -0,0 +1,153 @@
+"""
+Opti-Scholar: Prompt Builder
+Shared static prompt prefixes and local token budgeting for grading prompts
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+
+# Rough characters per token for English prose and JSON (Gemini and GPT
+# tokenizers both average close to 4); used only for budgeting, never billing.
+CHARS_PER_TOKEN = 4
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local estimate of the token count of ``text``.
+
+    Takes the larger of a words-and-punctuation count and a characters/4
+    count, so both short-word prose and long identifiers or numbers are
+    not underestimated. No tokenizer or network call is needed.
+    """
+    if not text:
+        return 0
+    return max(len(_TOKEN_PIECES.findall(text)), (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Shorten ``text`` to about ``max_tokens`` tokens.
+
+    Keeps the opening two thirds and the closing third of the budget, cut
+    at word boundaries, with a marker saying how much was left out: essays
+    state their thesis up front and their conclusion at the end, so both
+    survive.
+
+    Returns:
+        Tuple of (text, whether it was shortened)
+    """
+    if max_tokens <= 0:
+        return "", bool(text)
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+
+    words = text.split()
+    # Tokens per word of this text, so the cut lands close to the budget
+    ratio = estimate_tokens(text) / max(1, len(words))
+    keep = int(max_tokens / ratio) - 16  # Leave room for the marker
+    while True:
+        keep = max(0, min(keep, len(words) - 1))
+        head = (keep * 2 + 2) // 3
+        tail = keep - head
+        marker = f"[... {len(words) - keep} words omitted to fit the length budget ...]"
+        shortened = " ".join(words[:head] + [marker] + words[len(words) - tail:])
+        if keep == 0 or estimate_tokens(shortened) <= max_tokens:
+            return shortened, True
+        keep = int(keep * 0.9)
+
+
+class PromptPrefix:
+    """
+    The static head of a prompt (system instructions, rubric), built once.
+
+    Every prompt that starts with the same prefix text lets the provider
+    reuse its cached context for that prefix (Gemini caches repeated
+    prompt prefixes implicitly), so only the per-answer tail is new work.
+    Instances are shared and must be treated as read-only.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+
+
+@lru_cache(maxsize=512)
+def prompt_prefix(*parts: str) -> PromptPrefix:
+    """Shared ``PromptPrefix`` for the non-empty ``parts`` joined by blank lines."""
+    return PromptPrefix("\n\n".join(p for p in parts if p))
+
+
+class Prompt:
+    """A rendered prompt and its token accounting."""
+
+    def __init__(self, prefix: PromptPrefix, body: str, tokens: int, truncated: bool):
+        self.prefix = prefix
+        self.body = body
+        self.text = f"{prefix.text}\n\n{body}" if prefix.text else body
+        self.tokens = tokens
+        self.truncated = truncated
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class PromptBuilder:
+    """
+    Assemble prompts as a shared static prefix followed by per-call sections.
+
+    Sections are rendered as ``LABEL:\\ntext`` blocks after the prefix, in
+    order; empty sections are skipped. If the estimated total exceeds
+    ``max_tokens``, the one section named as ``flexible`` (typically the
+    student's answer) is shortened with ``fit_to_budget`` so the prompt fits;
+    the prefix and the other sections are always sent in full.
+    """
+
+    def __init__(self, prefix: PromptPrefix, max_tokens: Optional[int] = None):
+        """
+        Initialize builder.
+
+        Args:
+            prefix: Static prompt head shared by every call
+            max_tokens: Input token budget of one prompt (no limit if None)
+        """
+        self.prefix = prefix
+        self.max_tokens = max_tokens
+
+    def build(self, sections: List[Tuple[str, Optional[str]]], flexible: Optional[str] = None) -> Prompt:
+        """
+        Render the prompt.
+
+        Args:
+            sections: ``(label, text)`` pairs appended after the prefix
+            flexible: Label of the section that may be shortened to fit the budget
+
+        Returns:
+            The rendered prompt
+        """
+        sections = [(label, text) for label, text in sections if text]
+        body = self._render(sections)
+        tokens = self.prefix.tokens + estimate_tokens(body)
+        if self.max_tokens is None or tokens <= self.max_tokens or flexible is None:
+            return Prompt(self.prefix, body, tokens, False)
+
+        fixed = self.prefix.tokens + estimate_tokens(self._render(
+            [(label, "" if label == flexible else text) for label, text in sections]
+        ))
+        truncated = False
+        fitted = []
+        for label, text in sections:
+            if label == flexible:
+                text, truncated = fit_to_budget(text, self.max_tokens - fixed)
+            fitted.append((label, text))
+        body = self._render(fitted)
+        return Prompt(self.prefix, body, self.prefix.tokens + estimate_tokens(body), truncated)
+
+    @staticmethod
+    def _render(sections: List[Tuple[str, str]]) -> str:
+        if not sections:
+            return ""
+        return "\n\n".join(f"{label}:\n{text}" if label else text for label, text in sections) + "\n"
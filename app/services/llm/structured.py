@@ -0,0 +1,396 @@
+"""
+Opti-Scholar: Structured Output
+JSON response schemas for grading calls and a validating parser that repairs near-misses
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Response schemas (OpenAPI subset accepted by Gemini's ``response_schema``)
+GRADE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "score": {"type": "NUMBER"},
+        "feedback": {"type": "STRING"},
+        "reasoning": {"type": "STRING"},
+    },
+    "required": ["score", "feedback", "reasoning"],
+}
+
+BATCH_GRADE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            **GRADE_SCHEMA["properties"],
+        },
+        "required": ["id", "score", "feedback", "reasoning"],
+    },
+}
+
+RUBRIC_GRADE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "total_score": {"type": "NUMBER"},
+        "max_score": {"type": "NUMBER"},
+        "criteria_scores": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "STRING"},
+                    "score": {"type": "NUMBER"},
+                    "max_score": {"type": "NUMBER"},
+                    "reasoning": {"type": "STRING"},
+                },
+                "required": ["id", "score", "max_score", "reasoning"],
+            },
+        },
+        "deductions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "STRING"},
+                    "applied": {"type": "BOOLEAN"},
+                    "reason": {"type": "STRING"},
+                },
+                "required": ["id", "applied"],
+            },
+        },
+        "overall_feedback": {"type": "STRING"},
+    },
+    "required": ["total_score", "max_score", "criteria_scores", "overall_feedback"],
+}
+
+FEEDBACK_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "improvements": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "next_steps": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "tone": {"type": "STRING", "enum": ["encouraging", "constructive", "celebratory"]},
+    },
+    "required": ["summary", "strengths", "improvements", "next_steps", "tone"],
+}
+
+# Field names models use instead of the requested ones
+SCORE_KEYS = ("score", "total_score", "grade", "points", "mark")
+FEEDBACK_KEYS = ("feedback", "overall_feedback", "summary", "comment", "comments")
+REASONING_KEYS = ("reasoning", "explanation", "justification", "rationale")
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class GradingOutputError(ValueError):
+    """The model's response holds no usable grade, even after repair."""
+
+
+def load_json_lenient(text: str) -> Any:
+    """
+    Parse JSON from a model response, repairing common defects.
+
+    Handles Markdown code fences, prose around the JSON value, trailing
+    commas and output cut off mid-value (open strings and brackets are
+    closed). Raises ``GradingOutputError`` when nothing parseable remains.
+    """
+    text = _FENCE.sub("", (text or "").strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise GradingOutputError("Response contains no JSON value")
+    body = text[min(starts):]
+
+    candidates = []
+    closer = "}" if body[0] == "{" else "]"
+    end = body.rfind(closer)
+    if end > 0:
+        candidates.append(body[:end + 1])
+    candidates.append(_close_truncated(body))
+
+    for candidate in candidates:
+        for fixed in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            try:
+                return json.loads(fixed)
+            except ValueError:
+                continue
+    raise GradingOutputError("Response JSON could not be repaired")
+
+
+def _close_truncated(body: str) -> str:
+    """Close the strings and brackets left open by a response that was cut off."""
+    stack: List[str] = []
+    in_string = escaped = False
+    for ch in body:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+
+    repaired = body + ('"' if in_string else "")
+    # Drop a dangling separator or a key that never got its value
+    repaired = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', "", repaired.rstrip())
+    return repaired + "".join(reversed(stack))
+
+
+def parse_grade(text: str, max_score: float) -> Dict[str, Any]:
+    """
+    Validated ``{"score", "feedback", "reasoning", "repaired"}`` from a grading response.
+
+    Prefers the JSON object requested with ``GRADE_SCHEMA``; falls back to
+    field aliases and to ``SCORE:``-style lines, so a partially valid answer
+    still yields a grade without a second model call. ``repaired`` tells
+    whether anything beyond a plain ``json.loads`` was needed, including a
+    score that had to be rescaled or clamped into range.
+
+    Raises:
+        GradingOutputError: No score could be recovered
+    """
+    repaired = False
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        repaired = True
+        try:
+            data = load_json_lenient(text)
+        except GradingOutputError:
+            data = None
+
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        data = data[0]
+
+    if isinstance(data, dict):
+        grade = _grade_from_dict(data, max_score)
+        if grade is not None:
+            aliased = grade.pop("aliased")
+            grade["repaired"] = repaired or aliased
+            return grade
+
+    grade = _grade_from_text(text or "", max_score)
+    if grade is None:
+        raise GradingOutputError("No score found in the model response")
+    grade["repaired"] = True
+    return grade
+
+
+def parse_grades(text: str, max_score: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Validated ``{id: grade}`` from a batch response (see ``BATCH_GRADE_SCHEMA``).
+
+    Entries without an ID or a usable score are dropped, so the caller can
+    re-grade just those answers.
+    """
+    data = load_json_lenient(text)
+    if isinstance(data, dict):
+        data = data.get("results", data.get("submissions", data.get("grades", [data])))
+
+    grades = {}
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict) or item.get("id") in (None, ""):
+            continue
+        grade = _grade_from_dict(item, max_score)
+        if grade is not None:
+            del grade["aliased"]
+            grades[str(item["id"])] = grade
+    return grades
+
+
+def parse_rubric_grade(text: str, rubric: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validated rubric grade (see ``RUBRIC_GRADE_SCHEMA``) from a grading response.
+
+    Criterion scores are matched to the rubric's criteria by ID and kept
+    within each criterion's points; entries for unknown criteria or
+    without a usable score are dropped. A missing total is the sum of the
+    criterion scores, and applied deductions are returned as the rubric's
+    own deduction entries. ``repaired`` is set as in ``parse_grade``.
+
+    Args:
+        text: Model response
+        rubric: Parsed rubric (``total_points``, ``criteria``, ``deductions``)
+
+    Raises:
+        GradingOutputError: Neither a total nor any criterion score could be recovered
+    """
+    repaired = False
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        repaired = True
+        data = load_json_lenient(text)
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        data = data[0]
+        repaired = True
+    if not isinstance(data, dict):
+        raise GradingOutputError("Rubric grade is not a JSON object")
+
+    criteria = {str(c["id"]): c for c in rubric.get("criteria") or [] if isinstance(c, dict) and "id" in c}
+    max_score = float(rubric.get("total_points") or sum(float(c.get("points") or 0) for c in criteria.values())
+                      or 10.0)
+
+    criteria_scores = []
+    items = data.get("criteria_scores")
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            repaired = True
+            continue
+        criterion = criteria.get(str(item.get("id")))
+        if criteria and criterion is None:
+            repaired = True
+            continue
+        points = criterion.get("points") if criterion else item.get("max_score")
+        if isinstance(points, bool) or not isinstance(points, (int, float)) or points <= 0:
+            repaired = True
+            continue
+        points = float(points)
+        raw_score, score_key = _first(item, SCORE_KEYS)
+        score, adjusted = _coerce_score(raw_score, points)
+        if score is None:
+            repaired = True
+            continue
+        reasoning, reasoning_key = _first(item, REASONING_KEYS + FEEDBACK_KEYS)
+        repaired = repaired or adjusted or score_key != "score" or reasoning_key != "reasoning"
+        criteria_scores.append({
+            "id": str(item["id"]),
+            "score": score,
+            "max_score": points,
+            "reasoning": _as_text(reasoning),
+        })
+
+    raw_total, total_key = _first(data, SCORE_KEYS)
+    total, adjusted = _coerce_score(raw_total, max_score)
+    if total is None:
+        if not criteria_scores:
+            raise GradingOutputError("No total or criterion score found in the model response")
+        total = min(sum(c["score"] for c in criteria_scores), max_score)
+        adjusted = True
+    repaired = repaired or adjusted or total_key != "total_score" or not isinstance(items, list)
+
+    rubric_deductions = {str(d["id"]): d for d in rubric.get("deductions") or [] if isinstance(d, dict) and "id" in d}
+    deductions = []
+    for item in data.get("deductions") or []:
+        deduction = rubric_deductions.get(str(item.get("id"))) if isinstance(item, dict) else None
+        if deduction is not None and item.get("applied") is True:
+            deductions.append({
+                "id": str(deduction["id"]),
+                "description": str(deduction.get("description", "")),
+                "points": float(deduction.get("points") or 0),
+            })
+
+    feedback, _ = _first(data, FEEDBACK_KEYS)
+    return {
+        "total_score": total,
+        "max_score": max_score,
+        "criteria_scores": criteria_scores,
+        "deductions": deductions,
+        "overall_feedback": _as_text(feedback),
+        "repaired": repaired,
+    }
+
+
+def coerce_score(value: Any, max_score: float) -> Optional[float]:
+    """
+    Number from a score field on the ``[0, max_score]`` scale.
+
+    Accepts numbers and strings such as ``"8"``, ``"8.5/10"``, ``"17 out
+    of 20"`` or ``"85%"``; fractions with a different denominator and
+    percentages are rescaled, and values still out of range are clamped.
+    """
+    return _coerce_score(value, max_score)[0]
+
+
+def _coerce_score(value: Any, max_score: float) -> Tuple[Optional[float], bool]:
+    """(score, adjusted): ``adjusted`` is True when the value had to be rescaled or clamped."""
+    if isinstance(value, bool):
+        return None, False
+    adjusted = False
+    if isinstance(value, (int, float)):
+        score = float(value)
+    elif isinstance(value, str):
+        numbers = _NUMBER.findall(value)
+        if not numbers:
+            return None, False
+        score = float(numbers[0])
+        lowered = value.lower()
+        if len(numbers) > 1 and ("/" in value or "out of" in lowered):
+            scale = float(numbers[1])
+            if scale > 0 and scale != max_score:
+                score = score / scale * max_score
+                adjusted = True
+        elif "%" in value or "percent" in lowered:
+            score = score / 100 * max_score
+            adjusted = True
+    else:
+        return None, False
+    clamped = max(0.0, min(score, float(max_score)))
+    return clamped, adjusted or clamped != score
+
+
+def _first(data: Dict[str, Any], keys: tuple) -> tuple:
+    """(value, key) of the first present key, or (None, None)."""
+    for key in keys:
+        if data.get(key) not in (None, ""):
+            return data[key], key
+    return None, None
+
+
+def _grade_from_dict(data: Dict[str, Any], max_score: float) -> Optional[Dict[str, Any]]:
+    """Grade fields from a parsed object, or None without a usable score."""
+    raw_score, score_key = _first(data, SCORE_KEYS)
+    score, adjusted = _coerce_score(raw_score, max_score)
+    if score is None:
+        return None
+    feedback, feedback_key = _first(data, FEEDBACK_KEYS)
+    reasoning, reasoning_key = _first(data, REASONING_KEYS)
+    return {
+        "score": score,
+        "feedback": _as_text(feedback),
+        "reasoning": _as_text(reasoning),
+        "aliased": score_key != "score" or feedback_key != "feedback" or reasoning_key != "reasoning"
+                   or not isinstance(raw_score, (int, float)) or adjusted,
+    }
+
+
+def _grade_from_text(text: str, max_score: float) -> Optional[Dict[str, Any]]:
+    """Grade fields from ``SCORE: ...`` lines or ``"score": ...`` fragments."""
+    fields = {}
+    for name in ("score", "feedback", "reasoning"):
+        match = re.search(
+            rf'["\']?{name}["\']?\s*[:=]\s*"?(.*?)(?:"\s*[,}}]|"?\s*$)',
+            text, re.IGNORECASE | re.MULTILINE
+        )
+        if match:
+            fields[name] = match.group(1).strip()
+
+    score = coerce_score(fields.get("score"), max_score)
+    if score is None:
+        return None
+    return {"score": score, "feedback": fields.get("feedback", ""), "reasoning": fields.get("reasoning", "")}
+
+
+def _as_text(value: Any) -> str:
+    """Feedback/reasoning as a string (lists are joined)."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value)
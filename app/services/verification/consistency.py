@@ -3,30 +3,68 @@ Opti-Scholar: Consistency Checker Service
 Multi-model consensus validation using Gemini with temperature variation
 """
 
-import json
-from typing import Optional
-import google.generativeai as genai
+import asyncio
+from typing import List, Optional, Tuple
 
 from app.core.config import settings
+from app.services.llm import (
+    LLMGateway, get_llm_gateway, get_grading_cache, grading_cache_key, GRADE_SCHEMA, parse_grade,
+)
 
 
 class ConsistencyChecker:
-    """Check grading consistency using multiple Gemini calls with different temperatures."""
+    """Check grading consistency using concurrent Gemini samples at different temperatures (and models)."""
     
-    def __init__(self, max_difference: float = 1.0):
+    # Bump when the sampling prompt changes, to retire cached samples
+    PROMPT_VERSION = "consistency-v1"
+    
+    def __init__(
+        self,
+        max_difference: float = 1.0,
+        llm: Optional[LLMGateway] = None,
+        cache=None,
+        temperatures: Optional[List[float]] = None,
+        models: Optional[List[str]] = None,
+        min_samples: Optional[int] = None
+    ):
         """
         Initialize checker.
         
         Args:
             max_difference: Maximum acceptable score difference (in points)
+            llm: LLM gateway (the shared one by default)
+            cache: Grading result cache (the shared one by default)
+            temperatures: Sampling temperature of each sample
+            models: Models assigned to the samples in turn (gateway default if empty)
+            min_samples: Samples needed before the check may stop early
         """
         self.max_difference = max_difference
+        self.llm = llm or get_llm_gateway()
+        self.cache = cache or get_grading_cache()
+        self.temperatures = list(temperatures or settings.consistency_temperatures)
+        self.models = list(models if models is not None else settings.consistency_models)
+        self.min_samples = max(2, min_samples or settings.consistency_min_samples)
+    
+    def _plan(self) -> List[Tuple[float, str]]:
+        """(temperature, model) of every sample."""
+        models = self.models or [self.llm.model]
+        return [(t, models[i % len(models)]) for i, t in enumerate(self.temperatures)]
+    
+    def _settled(self, scores: List[float]) -> bool:
+        """
+        Whether the remaining samples can no longer change the verdict in practice.
         
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
-            self.model = genai.GenerativeModel(settings.gemini_model)
-        else:
-            self.model = None
+        The spread only grows as samples are added, so once it exceeds
+        ``max_difference`` the answer is certainly inconsistent. Agreement is
+        taken as clear once ``min_samples`` samples lie within half the
+        tolerance of each other.
+        """
+        if len(scores) < 2:
+            return False
+        spread = max(scores) - min(scores)
+        return spread > self.max_difference or (
+            len(scores) >= self.min_samples and spread <= self.max_difference / 2
+        )
     
     async def check(
         self,
@@ -36,83 +74,110 @@ class ConsistencyChecker:
         """
         Check grading consistency using multiple model calls.
         
+        All samples are requested at once, so the check costs about one model
+        round-trip; samples still in flight are cancelled as soon as the
+        outcome is settled (see ``_settled``).
+        
         Args:
             answer_text: Student's answer
             rubric_id: Rubric to grade against
             
         Returns:
-            Consistency check result
+            Consistency check result with the samples' mean, spread and count
         """
-        if not self.model:
+        if not self.llm.available:
             return self._mock_consistency_check()
         
-        # Grade with low temperature (more deterministic)
-        result_low_temp = await self._grade_with_temperature(answer_text, 0.1)
+        plan = self._plan()
+        tasks = {
+            asyncio.ensure_future(self._grade_with_temperature(answer_text, temperature, model)): (temperature, model)
+            for temperature, model in plan
+        }
+        results = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    sample = task.result()
+                    if sample is not None:
+                        temperature, model = tasks[task]
+                        results.append({**sample, "temperature": temperature, "model": model})
+                if self._settled([r["score"] for r in results]):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
         
-        # Grade with slightly higher temperature (more varied)
-        result_high_temp = await self._grade_with_temperature(answer_text, 0.5)
+        if not results:
+            # Every call failed: keep the previous neutral default
+            temperature, model = plan[0]
+            results = [{"score": 7.0, "confidence": 0.70, "temperature": temperature, "model": model}]
         
-        # Calculate difference
-        difference = abs(result_low_temp["score"] - result_high_temp["score"])
-        is_consistent = difference <= self.max_difference
+        # Report samples in plan order (lowest temperature first, as configured)
+        results.sort(key=lambda r: plan.index((r["temperature"], r["model"])))
+        scores = [r["score"] for r in results]
+        spread = round(max(scores) - min(scores), 2)
+        is_consistent = spread <= self.max_difference
         
         # Conflict resolution if needed
         conflict_resolution = None
         if not is_consistent:
-            conflict_resolution = self._resolve_conflict(result_low_temp, result_high_temp)
+            conflict_resolution = self._resolve_conflict(results)
         
         return {
             "is_consistent": is_consistent,
             "model_results": [
                 {
-                    "model": f"{settings.gemini_model} (temp=0.1)",
-                    "score": result_low_temp["score"],
-                    "confidence": result_low_temp["confidence"]
-                },
-                {
-                    "model": f"{settings.gemini_model} (temp=0.5)",
-                    "score": result_high_temp["score"],
-                    "confidence": result_high_temp["confidence"]
+                    "model": f"{r['model']} (temp={r['temperature']})",
+                    "score": r["score"],
+                    "confidence": r["confidence"]
                 }
+                for r in results
             ],
-            "difference": difference,
+            "difference": spread,
+            "spread": spread,
+            "mean": round(sum(scores) / len(scores), 2),
+            "sample_count": len(results),
+            "samples_requested": len(plan),
             "max_acceptable_difference": self.max_difference,
             "conflict_resolution": conflict_resolution
         }
     
-    async def _grade_with_temperature(self, answer_text: str, temperature: float) -> dict:
-        """Grade using Gemini with specified temperature."""
+    async def _grade_with_temperature(self, answer_text: str, temperature: float, model: str) -> Optional[dict]:
+        """Grade using Gemini with specified temperature (None if the call fails)."""
+        cache_key = grading_cache_key(answer_text, None, model, temperature, self.PROMPT_VERSION)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             prompt = f"""Grade this answer on a scale of 0-10. Return ONLY a JSON object with 'score' (number) and 'reasoning' (string).
 
 Answer: {answer_text}"""
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    response_mime_type="application/json"
-                )
-            )
+            response_text = await self.llm.generate(prompt, temperature=temperature, model=model, schema=GRADE_SCHEMA)
             
-            result = json.loads(response.text)
+            grade = parse_grade(response_text, 10)
             
-            return {
-                "score": float(result.get("score", 7.0)),
+            sample = {
+                "score": grade["score"],
                 "confidence": 0.85 if temperature < 0.3 else 0.75
             }
-        except Exception:
-            return {"score": 7.0, "confidence": 0.70}
+            await self.cache.set(cache_key, sample)
+            return sample
+        except Exception as e:
+            print(f"Consistency sample error (temp={temperature}): {e}")
+            return None
     
-    def _resolve_conflict(self, result_a: dict, result_b: dict) -> str:
+    def _resolve_conflict(self, results: List[dict]) -> str:
         """Suggest resolution for conflicting grades."""
-        if result_a["confidence"] > result_b["confidence"]:
-            return f"Recommend using low-temperature score ({result_a['score']}) due to higher confidence"
-        elif result_b["confidence"] > result_a["confidence"]:
-            return f"Recommend using high-temperature score ({result_b['score']}) due to higher confidence"
-        else:
-            avg = (result_a["score"] + result_b["score"]) / 2
-            return f"Models disagree - suggest human review. Average score: {avg:.1f}"
+        best = max(results, key=lambda r: r["confidence"])
+        if sum(1 for r in results if r["confidence"] == best["confidence"]) == 1:
+            label = "low-temperature" if best["temperature"] == min(r["temperature"] for r in results) else f"temp={best['temperature']}"
+            return f"Recommend using {label} score ({best['score']}) due to higher confidence"
+        avg = sum(r["score"] for r in results) / len(results)
+        return f"Models disagree - suggest human review. Average score: {avg:.1f}"
     
     def _mock_consistency_check(self) -> dict:
         """Return mock result for demo."""
@@ -123,6 +188,10 @@ Answer: {answer_text}"""
                 {"model": f"{settings.gemini_model} (temp=0.5)", "score": 7.5, "confidence": 0.75}
             ],
             "difference": 0.5,
+            "spread": 0.5,
+            "mean": 7.25,
+            "sample_count": 2,
+            "samples_requested": 2,
             "max_acceptable_difference": self.max_difference,
             "conflict_resolution": None
         }
@@ -1805,7 +1805,19 @@ function StudentAssignments({ user }) {
       })
 
       if (response.ok) {
-        const result = await response.json()
+        let result = await response.json()
+        // Grading runs as a background job: poll it until the AI score is ready
+        if (response.status === 202 && result.job_id) {
+          for (let attempt = 0; attempt < 60; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 1000))
+            const job = await fetchAPI(`/jobs/${result.job_id}`)
+            if (job?.status === 'completed') {
+              result = { ...result, ...job.result }
+              break
+            }
+            if (job?.status === 'dead') break
+          }
+        }
         setUploadSuccess({
           assignment: assignment.assignment_title,
           ai_score: result.ai_score,
@@ -0,0 +1,27 @@
+"""
+Opti-Scholar: Data Store Importer
+One-shot copy of the data_store CSV tables into the SQLite storage backend
+"""
+
+import asyncio
+
+import sys
+sys.path.insert(0, '.')
+
+from app.core.config import settings
+from app.core.sqlite_db import SqliteService, import_data_store
+
+
+async def main():
+    """Import data_store into ``settings.storage_database_url``."""
+    service = SqliteService(settings.storage_database_url)
+    print(f"Importing data_store into {settings.storage_database_url} ...")
+    counts = await import_data_store(service)
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows")
+    await service.engine.dispose()
+    print("Done. Set STORAGE_BACKEND=sqlite to serve the data API from it.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1 @@
+"""Opti-Scholar Test Suite"""
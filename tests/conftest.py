@@ -0,0 +1,19 @@
+"""
+Opti-Scholar Tests: Shared Fixtures
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+
+DATA_STORE = Path(__file__).resolve().parent.parent / "data_store"
+
+
+@pytest.fixture
+def data_dir(tmp_path) -> str:
+    """Private copy of the sample data_store, safe to write to."""
+    target = tmp_path / "data_store"
+    shutil.copytree(DATA_STORE, target)
+    return str(target)
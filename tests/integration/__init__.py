@@ -0,0 +1 @@
+"""Opti-Scholar Integration Tests"""
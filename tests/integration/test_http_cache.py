@@ -0,0 +1,94 @@
+"""
+Opti-Scholar Tests: Data API HTTP Cache
+"""
+
+import os
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import http_cache
+from app.core.csv_db import CsvService
+from app.core.http_cache import DataCacheMiddleware, uncacheable
+
+
+LATER = "Fri, 01 Jan 2100 00:00:00 GMT"
+
+
+@pytest.fixture
+def storage(data_dir, monkeypatch):
+    service = CsvService(data_dir)
+    monkeypatch.setattr(http_cache, "get_storage", lambda: service)
+    return service
+
+
+@pytest.fixture
+def client(storage):
+    app = FastAPI()
+    app.add_middleware(DataCacheMiddleware, prefix="/data")
+
+    @app.get("/data/assignment/{assignment_id}")
+    async def get_assignment(assignment_id: str):
+        assignment = await storage.get_assignment(assignment_id)
+        if assignment is None:
+            raise HTTPException(status_code=404, detail="Assignment not found")
+        return assignment
+
+    @app.get("/data/broken")
+    async def broken():
+        return uncacheable([])
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _validated(client, path):
+    """ETag of ``path`` once the tables it reads are part of the data version."""
+    client.get(path)
+    return client.get(path).headers["etag"]
+
+
+def test_matching_etag_gets_304(client):
+    etag = _validated(client, "/data/assignment/a1")
+
+    response = client.get("/data/assignment/a1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_missing_routes_and_rows_are_never_304(client):
+    _validated(client, "/data/assignment/a1")
+    for path in ("/data/assignment/nope", "/data/no-such-route"):
+        assert client.get(path, headers={"If-Modified-Since": LATER}).status_code == 404
+        assert client.get(path, headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get("/data/broken", headers={"If-Modified-Since": LATER}).status_code == 200
+
+
+def test_write_changes_the_etag(client, storage):
+    etag = _validated(client, "/data/assignment/a1")
+
+    asyncio.run(storage.update_submissions({"s1": {"status": "pending_review"}}))
+
+    # The write added the submissions table (and journal) to the version
+    response = client.get("/data/assignment/a1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_data_version_only_stats_tables_read(storage, data_dir):
+    assert asyncio.run(storage.data_version()) is None
+    asyncio.run(storage.get_assignment("a1"))
+    version = asyncio.run(storage.data_version())
+
+    # A table nothing has read does not change the version...
+    with open(os.path.join(data_dir, "risk_assessments.csv"), "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert asyncio.run(storage.data_version()) == version
+
+    # ...a table that was read does
+    path = os.path.join(data_dir, "assignments.csv")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert asyncio.run(storage.data_version()) != version
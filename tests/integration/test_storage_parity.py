@@ -0,0 +1,160 @@
+"""
+Opti-Scholar Tests: CSV / SQLite Storage Parity
+"""
+
+import os
+import csv
+import asyncio
+
+import pytest
+
+from app.api.schemas import StudentUpdate
+from app.core.csv_db import CsvService
+from app.core.sqlite_db import SqliteService, import_data_store
+from app.models.store import (
+    StoreSchool, StoreSchoolInfo, StoreDepartment, StoreCourse, StoreStudent,
+    StoreUser, StoreTeacherCourse, StoreAssignment, StoreSubmission,
+    StoreCourseAttendance, StoreAttendanceSummary, StoreGradeSummary, StoreRiskAssessment
+)
+
+
+TEACHER = "teacher@uohyd.ac.in"
+STUDENT = "s-SCIS-1-0"
+COURSE = "CS501"
+ASSIGNMENT = "a1"
+
+# (method, args) pairs whose results must match row for row
+READS = [
+    ("get_stats", ()),
+    ("get_schools", ()),
+    ("get_school_details", ("SCIS",)),
+    ("get_school_details", ("NOPE",)),
+    ("get_students_page", ()),
+    ("get_all_students", (25,)),
+    ("get_admin_analytics", ()),
+    ("get_user_by_email", (TEACHER,)),
+    ("get_user_by_email", ("nobody@example.com",)),
+    ("get_teacher_courses", (TEACHER,)),
+    ("get_course_attendance", (COURSE,)),
+    ("get_teacher_stats", (TEACHER,)),
+    ("get_course_assignments", (COURSE,)),
+    ("get_assignment", (ASSIGNMENT,)),
+    ("get_assignment_submissions", (ASSIGNMENT,)),
+    ("get_grading_stats", (TEACHER,)),
+    ("get_risk_students", ()),
+    ("get_risk_counts", ()),
+    ("get_attendance_stats", ()),
+    ("get_department_analytics", ()),
+    ("get_student_dashboard", (STUDENT,)),
+    ("get_student_grades", (STUDENT,)),
+    ("get_student_courses", (STUDENT,)),
+    ("get_student_assignments", (STUDENT,)),
+]
+
+
+@pytest.fixture
+def backends(data_dir, tmp_path):
+    """``(csv, sqlite_url)``: both backends over the same copy of the sample data."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'store.db'}"
+
+    async def load():
+        service = SqliteService(url)
+        await import_data_store(service, data_dir)
+        await service.engine.dispose()
+
+    asyncio.run(load())
+    return data_dir, url
+
+
+def _run_on_both(backends, scenario):
+    """Run ``scenario(storage)`` against each backend (fresh instances, one event loop each)."""
+    data_dir, url = backends
+
+    async def on_sqlite():
+        service = SqliteService(url)
+        try:
+            return await scenario(service)
+        finally:
+            await service.engine.dispose()
+
+    return asyncio.run(scenario(CsvService(data_dir))), asyncio.run(on_sqlite())
+
+
+@pytest.mark.parametrize("method, args", READS, ids=[f"{m}{list(a)}" for m, a in READS])
+def test_reads_match(backends, method, args):
+    async def scenario(storage):
+        return await getattr(storage, method)(*args)
+
+    from_csv, from_sqlite = _run_on_both(backends, scenario)
+    assert from_csv == from_sqlite
+
+
+def test_student_pages_match_across_cursors(backends):
+    async def scenario(storage):
+        return [s async for s in storage.iter_students(batch_size=37, school="SCIS")]
+
+    from_csv, from_sqlite = _run_on_both(backends, scenario)
+    assert from_csv
+    assert from_csv == from_sqlite
+
+
+def test_writes_match(backends):
+    async def scenario(storage):
+        new_id = await storage.add_submission({
+            "assignment_id": ASSIGNMENT, "student_id": STUDENT, "student_name": "Aarav Sharma",
+            "student_reg": "23SCIS100", "course_code": COURSE, "submission_text": "An answer, with \"quotes\"",
+            "file_name": "answer.txt", "submitted_at": "2024-02-01", "ai_score": "", "ai_feedback": "",
+            "ai_reasoning": "", "teacher_verified": "false", "teacher_score": "0", "teacher_feedback": "",
+            "status": "submitted",
+        })
+        updated = await storage.update_submissions({
+            new_id: {"ai_score": 6, "ai_feedback": "Fine.", "status": "pending_review"},
+            "s-missing": {"status": "pending_review"},
+        })
+        await storage.verify_submission(new_id, 7, "Checked.", True)
+        await storage.update_student(STUDENT, StudentUpdate(name="Aarav S. Sharma"))
+        return (
+            new_id,
+            updated,
+            await storage.get_assignment_submissions(ASSIGNMENT),
+            await storage.get_grading_stats(TEACHER),
+            await storage.get_student_assignments(STUDENT),
+            (await storage.get_students_page(limit=3, school="SCIS"))["students"],
+        )
+
+    from_csv, from_sqlite = _run_on_both(backends, scenario)
+    assert from_csv[1] == 1
+    assert from_csv == from_sqlite
+    assert from_csv[5][0]["id"] == STUDENT
+    assert from_csv[5][0]["name"] == "Aarav S. Sharma"
+
+
+# Store tables and the data_store file whose header they mirror
+STORE_FILES = [
+    (StoreSchool, "schools.csv"),
+    (StoreSchoolInfo, "SCIS/info.csv"),
+    (StoreDepartment, "SCIS/departments.csv"),
+    (StoreCourse, "SCIS/courses.csv"),
+    (StoreStudent, "SCIS/students/sem_1.csv"),
+    (StoreUser, "users.csv"),
+    (StoreTeacherCourse, "teacher_courses.csv"),
+    (StoreAssignment, "assignments.csv"),
+    (StoreSubmission, "submissions.csv"),
+    (StoreCourseAttendance, "course_attendance.csv"),
+    (StoreAttendanceSummary, "attendance_summary.csv"),
+    (StoreGradeSummary, "grades_summary.csv"),
+    (StoreRiskAssessment, "risk_assessments.csv"),
+]
+
+# Columns recording where a row came from rather than CSV fields
+SOURCE_COLUMNS = {"pk", "seq", "position", "school_position", "school_code", "semester"}
+
+
+@pytest.mark.parametrize("model, name", STORE_FILES, ids=[name for _, name in STORE_FILES])
+def test_store_tables_mirror_csv_headers(data_dir, model, name):
+    with open(os.path.join(data_dir, name), newline="", encoding="utf-8") as f:
+        header = set(next(csv.reader(f)))
+    columns = {column.name for column in model.__table__.columns}
+
+    assert header <= columns, f"{model.__tablename__} lacks {sorted(header - columns)}"
+    assert columns - header <= SOURCE_COLUMNS
@@ -0,0 +1 @@
+"""Opti-Scholar Unit Tests"""
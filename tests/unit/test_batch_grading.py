@@ -0,0 +1,122 @@
+"""
+Opti-Scholar Tests: Batch Grading
+"""
+
+import json
+import asyncio
+
+from app.core.csv_db import CsvService
+from app.core.storage import SUBMISSION_FIELDS
+from app.services.grading.batch import BatchGrader
+from app.services.jobs import JobQueue
+from app.services.llm import LLMGateway, GradingCache, FakeBackend
+
+
+ASSIGNMENT = "a1"
+
+
+class DroppingBackend(FakeBackend):
+    """FakeBackend whose batch answers always leave out one submission."""
+
+    def __init__(self, drop: str):
+        super().__init__()
+        self.drop = drop
+
+    def batch_response(self, prompt: str) -> str:
+        grades = json.loads(FakeBackend.batch_response(prompt))
+        return json.dumps([g for g in grades if g["id"] != self.drop])
+
+
+def _submission(text: str, **fields):
+    row = {field: "" for field in SUBMISSION_FIELDS if field != "id"}
+    row.update({"assignment_id": ASSIGNMENT, "student_id": "s-test", "course_code": "CS501",
+                "submission_text": text, "teacher_verified": "false", "teacher_score": "0",
+                "status": "submitted"})
+    row.update(fields)
+    return row
+
+
+def _grader(storage, backend, queue=None, per_prompt=3) -> BatchGrader:
+    return BatchGrader(
+        storage,
+        llm=LLMGateway(backend, backoff_base=0.001, requests_per_minute=60000),
+        cache=GradingCache(":memory:"),
+        queue=queue or JobQueue(":memory:"),
+        answers_per_prompt=per_prompt,
+    )
+
+
+async def _add(storage, count, **fields):
+    return [await storage.add_submission(_submission(f"Answer {i} about sorting complexity", **fields))
+            for i in range(count)]
+
+
+def test_pending_answers_are_packed_several_per_prompt(data_dir):
+    async def scenario():
+        storage = CsvService(data_dir)
+        new_ids = await _add(storage, 7)
+        # Awaiting review but never AI graded (no feedback recorded)
+        new_ids += await _add(storage, 1, status="pending_review")
+        backend = FakeBackend()
+        grader = _grader(storage, backend)
+        assignment = await storage.get_assignment(ASSIGNMENT)
+        progress = await grader.run(assignment)
+        rows = {s["id"]: s for s in await storage.get_assignment_submissions(ASSIGNMENT)}
+        return new_ids, backend, progress, rows
+
+    new_ids, backend, progress, rows = asyncio.run(scenario())
+    assert progress["total"] == 8
+    assert (progress["graded"], progress["fallback"], progress["prompts"]) == (8, 0, 3)
+    assert progress["updated"] == 8
+    assert len(backend.calls) == 3
+    for sid in new_ids:
+        assert rows[sid]["status"] == "pending_review"
+        assert rows[sid]["ai_feedback"]
+        assert 5 <= rows[sid]["ai_score"] <= 10
+    # Already graded sample rows were left alone
+    assert all(s["ai_feedback"] for s in rows.values())
+
+
+def test_answer_missing_from_batch_is_regraded_then_falls_back(data_dir):
+    async def scenario():
+        storage = CsvService(data_dir)
+        new_ids = await _add(storage, 3)
+        backend = DroppingBackend(drop=new_ids[1])
+        progress = await _grader(storage, backend).run(await storage.get_assignment(ASSIGNMENT))
+        rows = {s["id"]: s for s in await storage.get_assignment_submissions(ASSIGNMENT)}
+        return new_ids, backend, progress, rows
+
+    new_ids, backend, progress, rows = asyncio.run(scenario())
+    # One prompt for the chunk, one single-answer retry for the dropped answer
+    assert progress["prompts"] == 2
+    assert len(backend.calls) == 2
+    assert (progress["graded"], progress["fallback"]) == (2, 1)
+    assert all(rows[sid]["status"] == "pending_review" for sid in new_ids)
+
+
+def test_nothing_pending_on_graded_data_unless_regrading(data_dir):
+    async def scenario():
+        storage = CsvService(data_dir)
+        grader = _grader(storage, FakeBackend())
+        return (await grader.pending_submissions(ASSIGNMENT),
+                await grader.pending_submissions(ASSIGNMENT, regrade=True))
+
+    pending, regrade = asyncio.run(scenario())
+    assert pending == []
+    assert regrade and all(s["status"] == "pending_review" for s in regrade)
+
+
+def test_submissions_with_a_live_grading_job_are_skipped(data_dir):
+    async def scenario():
+        storage = CsvService(data_dir)
+        queue = JobQueue(":memory:")
+        live, dead = await _add(storage, 2)
+        await queue.enqueue("grade_submission", {"submission_id": live})
+        finished = await queue.enqueue("grade_submission", {"submission_id": dead})
+        queue._finish(finished["job_id"], "dead", None, "LLMError: quota")
+        grader = _grader(storage, FakeBackend(), queue=queue)
+        return live, dead, await queue.active_payloads("grade_submission"), await grader.pending_submissions(ASSIGNMENT)
+
+    live, dead, active, pending = asyncio.run(scenario())
+    assert active == [{"submission_id": live}]
+    assert [s["id"] for s in pending] == [dead]
@@ -0,0 +1,55 @@
+"""
+Opti-Scholar Tests: Confidence Quantifier
+"""
+
+import random
+
+import pytest
+
+from app.services.grading.confidence import ConfidenceQuantifier
+
+
+# Reasoning lengths around the 20/50 character quality steps, including none
+REASONING_LENGTHS = [0, 0, 1, 19, 20, 21, 49, 50, 51, 200]
+
+
+def _random_result(rng: random.Random) -> dict:
+    """Grading result with random criteria, reasoning lengths and score ratio (boundaries included)."""
+    max_score = rng.choice([0, 4, 10, 10, 20, 100])
+    if rng.random() < 0.4:
+        # Exactly on a distribution step: 0.1, 0.3, 0.7, 0.9 or 0.95 of the maximum
+        total = max_score * rng.choice([0.0, 0.1, 0.3, 0.7, 0.9, 0.95, 1.0])
+    else:
+        total = round(rng.uniform(0, max(max_score, 1)), 2)
+    criteria = []
+    for i in range(rng.choice([0, 1, 2, 3, 5])):
+        criterion = {"id": f"c{i}", "score": 1, "max_score": 2}
+        length = rng.choice(REASONING_LENGTHS)
+        if length or rng.random() < 0.5:
+            criterion["reasoning"] = "x" * length
+        criteria.append(criterion)
+    return {"total_score": total, "max_score": max_score, "criteria_scores": criteria}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_on_random_results(seed):
+    rng = random.Random(seed)
+    quantifier = ConfidenceQuantifier()
+    results = [_random_result(rng) for _ in range(200)]
+
+    batch = quantifier.quantify_batch(results)
+
+    for i, result in enumerate(results):
+        confidence = quantifier.quantify(result)
+        sources = quantifier.get_uncertainty_sources(result, confidence)
+        assert batch["confidence"][i] == pytest.approx(confidence, abs=1e-12), result
+        assert batch["status"][i] == quantifier.status(confidence), result
+        assert bool(batch["needs_review"][i]) == quantifier.needs_review(confidence), result
+        assert batch["missing_reasoning"][i] == sum(s.startswith("Missing reasoning") for s in sources), result
+        assert bool(batch["very_high"][i]) == ("Very high score may need verification" in sources), result
+        assert bool(batch["very_low"][i]) == ("Very low score may need verification" in sources), result
+
+
+def test_batch_of_nothing_is_empty():
+    batch = ConfidenceQuantifier().quantify_batch([])
+    assert all(len(values) == 0 for values in batch.values())
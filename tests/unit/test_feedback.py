@@ -0,0 +1,39 @@
+"""
+Opti-Scholar Tests: Feedback Generator
+"""
+
+import asyncio
+
+from app.services.grading.feedback import FeedbackGenerator
+from app.services.grading.feedback_cache import FeedbackCache
+from app.services.llm import LLMGateway, GradingCache, FakeBackend, FEEDBACK_SCHEMA
+
+
+def _generator(backend):
+    llm = LLMGateway(backend, backoff_base=0.001, requests_per_minute=60000)
+    return FeedbackGenerator(llm=llm, cache=FeedbackCache(GradingCache(":memory:")))
+
+
+def test_feedback_uses_structured_output():
+    backend = FakeBackend()
+    feedback = asyncio.run(_generator(backend).generate("g1", 7.0, 10.0, {}))
+
+    assert backend.calls[0]["schema"] == FEEDBACK_SCHEMA
+    assert feedback["summary"].startswith("Fake feedback")
+    assert feedback["strengths"] and feedback["next_steps"]
+
+
+def test_fenced_feedback_is_repaired():
+    text = '```json\n{"summary": "Good work.", "strengths": ["a"], "improvements": ["b"], "next_steps": ["c"],' \
+           ' "tone": "encouraging",}\n```'
+    feedback = asyncio.run(_generator(FakeBackend(responder=lambda p, j: text)).generate("g1", 7.0, 10.0, {}))
+    assert feedback["summary"] == "Good work."
+
+
+def test_incomplete_feedback_falls_back_to_template():
+    backend = FakeBackend(responder=lambda prompt, json_mode: '{"summary": "Only a summary."}')
+    generator = _generator(backend)
+
+    feedback = asyncio.run(generator.generate("g1", 7.0, 10.0, {}))
+
+    assert feedback == generator._mock_feedback(7.0, 10.0)
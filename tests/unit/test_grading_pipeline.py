@@ -0,0 +1,132 @@
+"""
+Opti-Scholar Tests: Tiered Grading Pipeline
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.services.grading.confidence import ConfidenceQuantifier
+from app.services.grading.local_scorer import LocalScorer
+from app.services.grading.pipeline import GradingPipeline
+from app.services.grading.semantic_scorer import SemanticScorer
+from app.services.ingestion.rubric_store import CompiledRubric
+from app.services.llm import LLMGateway, GradingCache, FakeBackend, RUBRIC_GRADE_SCHEMA
+
+
+RUBRIC = CompiledRubric("r-sorting", "hash-sorting", {
+    "total_points": 10,
+    "criteria": [
+        {"id": "c1", "description": "Time complexity of quicksort is O(n log n) on average", "points": 4},
+        {"id": "c2", "description": "Worst case of quicksort is O(n^2) with a bad pivot", "points": 3},
+        {"id": "c3", "description": "Merge sort needs O(n) extra memory for merging", "points": 3},
+    ],
+})
+
+STRONG = (
+    "Quicksort runs in O(n log n) time on average because each partition step splits the array "
+    "roughly in half and the partitioning work per level is linear. Its worst case is O(n^2), "
+    "which happens with a bad pivot choice such as always taking the first element of a sorted "
+    "array. Merge sort always takes O(n log n) time, but it needs O(n) extra memory for merging "
+    "the two halves, whereas quicksort sorts in place. Choosing a random pivot or the median of "
+    "three makes the quadratic worst case of quicksort very unlikely in practice."
+)
+
+WEAK = "Sorting puts things in order. Some methods are faster than others, it depends on the data."
+
+
+class StubRubrics:
+    """Rubric store holding a single compiled rubric."""
+
+    async def get(self, rubric_id):
+        return RUBRIC if rubric_id == RUBRIC.id else None
+
+
+def _scorer(backend):
+    llm = LLMGateway(backend, backoff_base=0.001, requests_per_minute=60000)
+    return SemanticScorer(llm=llm, cache=GradingCache(":memory:"), rubrics=StubRubrics(), local=LocalScorer())
+
+
+def _pipeline(backend):
+    return GradingPipeline(scorer=_scorer(backend))
+
+
+def test_strong_answer_stops_at_local_tier():
+    backend = FakeBackend()
+    pipeline = _pipeline(backend)
+
+    result = asyncio.run(pipeline.grade(STRONG, RUBRIC.id))
+
+    assert result["tier"] == "local"
+    assert result["scorer"] == "local"
+    assert result["total_score"] >= 8
+    assert result["status"] == "soft_flagged"
+    assert backend.calls == []
+    assert pipeline.stats()["tiers"]["llm"]["count"] == 0
+
+
+def test_weak_answer_escalates_to_llm():
+    backend = FakeBackend()
+    pipeline = _pipeline(backend)
+
+    result = asyncio.run(pipeline.grade(WEAK, RUBRIC.id))
+
+    assert result["tier"] in ("llm", "consistency")
+    assert backend.calls
+    assert pipeline.stats()["tiers"]["llm"]["count"] == 1
+
+
+def test_pasted_rubric_is_never_auto_approved():
+    pasted = " ".join(c["description"] for c in RUBRIC.schema["criteria"]) * 5
+    pipeline = _pipeline(FakeBackend())
+
+    local = pipeline.scorer.local_grade(pasted, RUBRIC)
+    confidence = pipeline.quantifier.quantify_local(local)
+
+    assert local["total_score"] == 10
+    assert pipeline.quantifier.status(confidence) == "soft_flagged"
+
+
+def test_without_llm_local_grade_is_final():
+    pipeline = _pipeline(None)
+
+    result = asyncio.run(pipeline.grade(WEAK, RUBRIC.id))
+
+    assert result["tier"] == "local"
+    assert result["status"] in ("soft_flagged", "hard_flagged")
+
+
+def test_local_confidence_reaches_accept_only_for_passing_grades():
+    quantifier = ConfidenceQuantifier()
+
+    def confidence(*fractions):
+        return quantifier.quantify_local({"criteria_scores": [{"score": f * 4, "max_score": 4} for f in fractions]})
+
+    assert settings.confidence_local_accept <= confidence(1, 1, 1) < settings.confidence_auto_approve
+    assert confidence(0.5, 0.75, 0.5) < settings.confidence_local_accept
+    assert confidence(0, 0, 0) < settings.confidence_local_accept
+
+
+def test_llm_grade_is_validated_against_the_rubric():
+    backend = FakeBackend()
+    scorer = _scorer(backend)
+
+    result = asyncio.run(scorer.grade(WEAK, RUBRIC.id))
+
+    assert backend.calls[0]["schema"] == RUBRIC_GRADE_SCHEMA
+    assert [c["id"] for c in result["criteria_scores"]] == ["c1", "c2", "c3"]
+    assert result["max_score"] == 10
+    assert result["total_score"] == round(sum(c["score"] for c in result["criteria_scores"]), 1)
+
+
+def test_unusable_llm_grade_falls_back_to_local_and_is_not_cached():
+    backend = FakeBackend(responder=lambda prompt, json_mode: '{"overall_feedback": "Looks fine."}')
+    scorer = _scorer(backend)
+
+    async def scenario():
+        return [await scorer.grade(WEAK, RUBRIC.id) for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert first["scorer"] == second["scorer"] == "local"
+    assert "total_score" in first and first["criteria_scores"]
+    # Nothing was cached, so the second grade asked the model again
+    assert len(backend.calls) == 2
@@ -0,0 +1,221 @@
+"""
+Opti-Scholar Tests: Job Queue Retries and Dead-Lettering
+"""
+
+import time
+import asyncio
+
+from app.services.jobs import JobQueue, FINISHED_STATUSES
+
+
+def _queue(**kwargs) -> JobQueue:
+    options = {"workers": 2, "max_attempts": 3, "backoff_base": 0.01, "poll_interval": 0.01}
+    options.update(kwargs)
+    return JobQueue(":memory:", **options)
+
+
+async def _wait_finished(queue: JobQueue, job_id: str, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await queue.get(job_id)
+        if job["status"] in FINISHED_STATUSES:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish: {job}")
+
+
+def test_job_completes_with_result():
+    async def scenario():
+        queue = _queue()
+        seen = []
+
+        async def handler(payload, context):
+            seen.append((payload, context.attempt, context.max_attempts))
+            await context.report({"step": 1})
+            return {"doubled": payload["n"] * 2}
+
+        queue.register("double", handler)
+        queue.start()
+        try:
+            job = await queue.enqueue("double", {"n": 21})
+            return await _wait_finished(queue, job["job_id"]), seen, queue.stats()
+        finally:
+            await queue.stop()
+
+    job, seen, stats = asyncio.run(scenario())
+    assert job["status"] == "completed"
+    assert job["result"] == {"doubled": 42}
+    assert job["progress"] == {"step": 1}
+    assert seen == [({"n": 21}, 1, 3)]
+    assert stats["completed"] == 1
+
+
+def test_failing_job_is_retried_then_succeeds():
+    async def scenario():
+        queue = _queue()
+        attempts = []
+
+        async def flaky(payload, context):
+            attempts.append(context.attempt)
+            if context.attempt < 3:
+                raise RuntimeError("transient")
+            return {"ok": True}
+
+        queue.register("flaky", flaky)
+        queue.start()
+        try:
+            job = await queue.enqueue("flaky", {})
+            return await _wait_finished(queue, job["job_id"]), attempts, queue.stats()
+        finally:
+            await queue.stop()
+
+    job, attempts, stats = asyncio.run(scenario())
+    assert job["status"] == "completed"
+    assert job["attempts"] == 3
+    assert attempts == [1, 2, 3]
+    assert stats["retried"] == 2
+
+
+def test_exhausted_job_is_dead_lettered_and_can_be_requeued():
+    async def scenario():
+        queue = _queue(max_attempts=2)
+        calls = []
+        state = {"fixed": False}
+
+        async def broken(payload, context):
+            calls.append(context.attempt)
+            if state["fixed"]:
+                return {"ok": True}
+            raise ValueError("bad input")
+
+        queue.register("broken", broken)
+        queue.start()
+        try:
+            job = await queue.enqueue("broken", {})
+            dead = await _wait_finished(queue, job["job_id"])
+            listed = await queue.list_jobs(status="dead")
+            # Requeue once the cause is fixed
+            state["fixed"] = True
+            requeued = await queue.requeue(job["job_id"])
+            revived = await _wait_finished(queue, job["job_id"])
+            return dead, listed, requeued, revived, calls
+        finally:
+            await queue.stop()
+
+    dead, listed, requeued, revived, calls = asyncio.run(scenario())
+    assert dead["status"] == "dead"
+    assert dead["attempts"] == 2
+    assert dead["error"] == "ValueError: bad input"
+    assert [j["job_id"] for j in listed] == [dead["job_id"]]
+    assert requeued is True
+    assert revived["status"] == "completed"
+    assert calls == [1, 2, 1]
+
+
+def test_job_without_handler_goes_straight_to_dead():
+    async def scenario():
+        queue = _queue()
+        queue.start()
+        try:
+            job = await queue.enqueue("unknown", {})
+            return await _wait_finished(queue, job["job_id"])
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "dead"
+    assert job["attempts"] == 1
+    assert "No handler registered" in job["error"]
+
+
+def test_expired_lease_is_reclaimed_until_attempts_run_out():
+    async def scenario():
+        queue = _queue(max_attempts=2, lease_seconds=10)
+        job = await queue.enqueue("stuck", {})
+        now = time.time()
+        first = queue._claim(now)
+        not_expired = queue._claim(now + 5)
+        second = queue._claim(now + 11)
+        exhausted = queue._claim(now + 22)
+        return first, not_expired, second, exhausted, await queue.get(job["job_id"]), queue.stats()
+
+    first, not_expired, second, exhausted, job, stats = asyncio.run(scenario())
+    assert first["attempts"] == 1
+    assert not_expired is None
+    assert second["attempts"] == 2
+    assert exhausted is None
+    assert job["status"] == "dead"
+    assert job["finished_at"] is not None
+    assert stats["dead"] == 1
+
+
+
+def test_stale_worker_cannot_overwrite_reclaimed_job():
+    async def scenario():
+        queue = _queue(lease_seconds=10)
+        job = await queue.enqueue("slow", {})
+        now = time.time()
+        stale = queue._claim(now)
+        current = queue._claim(now + 11)
+        late = queue._finish(job["job_id"], "completed", {"by": "stale"}, None, stale["lease"])
+        progress = queue._save_progress(job["job_id"], stale["lease"], {"by": "stale"})
+        done = queue._finish(job["job_id"], "completed", {"by": "current"}, None, current["lease"])
+        return late, progress, done, await queue.get(job["job_id"])
+
+    late, progress, done, job = asyncio.run(scenario())
+    assert (late, progress, done) == (False, False, True)
+    assert job["result"] == {"by": "current"}
+    assert job["progress"] is None
+
+
+def test_lease_is_renewed_while_a_long_job_runs():
+    async def scenario():
+        queue = _queue(lease_seconds=0.06)
+        calls = []
+
+        async def slow(payload, context):
+            # Runs for several lease periods without reporting progress
+            calls.append(context.attempt)
+            await asyncio.sleep(0.3)
+            return {"ok": True}
+
+        queue.register("slow", slow)
+        queue.start()
+        try:
+            job = await queue.enqueue("slow", {})
+            return await _wait_finished(queue, job["job_id"]), calls
+        finally:
+            await queue.stop()
+
+    job, calls = asyncio.run(scenario())
+    assert job["status"] == "completed"
+    assert calls == [1]
+
+
+def test_worker_survives_job_table_errors():
+    async def scenario():
+        queue = _queue(workers=1)
+        claim = queue._claim
+        failures = {"left": 2}
+
+        def flaky_claim(now):
+            if failures["left"]:
+                failures["left"] -= 1
+                raise RuntimeError("database is locked")
+            return claim(now)
+
+        async def handler(payload, context):
+            return {"ok": True}
+
+        queue._claim = flaky_claim
+        queue.register("ok", handler)
+        queue.start()
+        try:
+            job = await queue.enqueue("ok", {})
+            return await _wait_finished(queue, job["job_id"]), failures
+        finally:
+            await queue.stop()
+
+    job, failures = asyncio.run(scenario())
+    assert failures["left"] == 0
+    assert job["status"] == "completed"
@@ -0,0 +1,152 @@
+"""
+Opti-Scholar Tests: LLM Gateway
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from app.services.llm import LLMGateway, LLMError, TokenBucket, FakeBackend, GRADE_SCHEMA, parse_grade
+
+
+class CountingBackend(FakeBackend):
+    """FakeBackend that records the most calls it had in flight at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def generate(self, *args, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().generate(*args, **kwargs)
+        finally:
+            self.active -= 1
+
+
+def _failing(times: int, error: Exception):
+    """Responder that raises ``error`` on its first ``times`` calls, then answers."""
+    calls = {"n": 0}
+
+    def responder(prompt, json_mode):
+        calls["n"] += 1
+        if calls["n"] <= times:
+            raise error
+        return "ok"
+
+    return responder
+
+
+def _gateway(backend, **kwargs) -> LLMGateway:
+    options = {"max_concurrency": 4, "timeout": 1.0, "max_retries": 2, "backoff_base": 0.001,
+               "requests_per_minute": 60000}
+    options.update(kwargs)
+    return LLMGateway(backend, **options)
+
+
+def test_generate_returns_structured_grade():
+    backend = FakeBackend()
+    gateway = _gateway(backend)
+
+    text = asyncio.run(gateway.generate("Grade this answer", schema=GRADE_SCHEMA))
+
+    grade = parse_grade(text, 10)
+    assert 5.0 <= grade["score"] < 10.0
+    assert grade["repaired"] is False
+    assert backend.calls[0]["json_mode"] is True
+    assert backend.calls[0]["schema"] == GRADE_SCHEMA
+    assert gateway.stats()["calls"] == 1
+
+
+def test_fake_backend_is_deterministic():
+    first = asyncio.run(_gateway(FakeBackend()).generate("same prompt", json_mode=True))
+    second = asyncio.run(_gateway(FakeBackend()).generate("same prompt", json_mode=True))
+    assert first == second
+
+
+def test_concurrency_is_capped():
+    backend = CountingBackend(latency=0.02)
+    gateway = _gateway(backend, max_concurrency=2)
+
+    async def scenario():
+        return await asyncio.gather(*(gateway.generate(f"prompt {i}") for i in range(8)))
+
+    assert len(asyncio.run(scenario())) == 8
+    assert backend.peak == 2
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    assert bucket.delay() == 0.0
+    assert bucket.delay() == 0.0
+    assert bucket.delay() == pytest.approx(0.1, abs=0.01)
+
+
+def test_rate_limit_applies_to_calls():
+    gateway = _gateway(FakeBackend(), max_concurrency=1, requests_per_minute=600)  # 10 per second, burst 1
+
+    async def scenario():
+        started = time.monotonic()
+        await asyncio.gather(*(gateway.generate(f"prompt {i}") for i in range(4)))
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.28
+
+
+def test_transient_errors_are_retried():
+    backend = FakeBackend(responder=_failing(2, ConnectionError("reset")))
+    gateway = _gateway(backend, max_retries=2)
+
+    assert asyncio.run(gateway.generate("prompt")) == "ok"
+    assert len(backend.calls) == 3
+    assert gateway.stats()["retries"] == 2
+
+
+def test_retries_are_bounded():
+    backend = FakeBackend(responder=_failing(5, ConnectionError("reset")))
+    gateway = _gateway(backend, max_retries=2)
+
+    with pytest.raises(LLMError):
+        asyncio.run(gateway.generate("prompt"))
+    assert len(backend.calls) == 3
+    assert gateway.stats()["failures"] == 1
+
+
+def test_permanent_errors_are_not_retried():
+    backend = FakeBackend(responder=_failing(1, ValueError("bad request")))
+    gateway = _gateway(backend)
+
+    with pytest.raises(LLMError, match="ValueError"):
+        asyncio.run(gateway.generate("prompt"))
+    assert len(backend.calls) == 1
+
+
+def test_slow_calls_time_out_and_are_retried():
+    backend = FakeBackend(latency=0.2)
+    gateway = _gateway(backend, timeout=0.02, max_retries=1)
+
+    with pytest.raises(LLMError, match="TimeoutError"):
+        asyncio.run(gateway.generate("prompt"))
+    assert len(backend.calls) == 2
+
+
+def test_without_backend_calls_fail():
+    gateway = _gateway(None)
+    assert gateway.available is False
+    with pytest.raises(LLMError):
+        asyncio.run(gateway.generate("prompt"))
+
+
+def test_stream_yields_the_whole_response_in_pieces():
+    backend = FakeBackend(responder=lambda prompt, json_mode: "x" * 40, chunk_size=16)
+    gateway = _gateway(backend)
+
+    async def scenario():
+        return [piece async for piece in gateway.stream("prompt")]
+
+    pieces = asyncio.run(scenario())
+    assert pieces == ["x" * 16, "x" * 16, "x" * 8]
+    assert gateway.stats()["streams"] == 1
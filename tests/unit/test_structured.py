@@ -0,0 +1,136 @@
+"""
+Opti-Scholar Tests: Structured Output Parser
+"""
+
+import json
+
+import pytest
+
+from app.services.llm.structured import (
+    GradingOutputError, coerce_score, load_json_lenient, parse_grade, parse_grades, parse_rubric_grade
+)
+
+
+RUBRIC = {
+    "total_points": 10,
+    "criteria": [{"id": "c1", "points": 6}, {"id": "c2", "points": 4}],
+    "deductions": [{"id": "d1", "description": "No units", "points": -1}],
+}
+
+
+def test_parse_grade_clean_json():
+    grade = parse_grade(json.dumps({"score": 7, "feedback": "Good.", "reasoning": "Covers most points."}), 10)
+    assert grade == {"score": 7.0, "feedback": "Good.", "reasoning": "Covers most points.", "repaired": False}
+
+
+def test_parse_grade_repairs_fenced_json_with_trailing_comma():
+    text = '```json\n{"score": 6, "feedback": "Fair.", "reasoning": "Some gaps.",}\n```'
+    grade = parse_grade(text, 10)
+    assert grade["score"] == 6.0
+    assert grade["feedback"] == "Fair."
+    assert grade["repaired"] is True
+
+
+def test_parse_grade_closes_truncated_output():
+    grade = parse_grade('{"score": 8, "feedback": "Clear answer", "reasoning": "Explains the ma', 10)
+    assert grade["score"] == 8.0
+    assert grade["reasoning"].startswith("Explains the ma")
+    assert grade["repaired"] is True
+
+
+def test_parse_grade_accepts_field_aliases():
+    grade = parse_grade(json.dumps({"total_score": 5, "comment": "Ok.", "explanation": "Half right."}), 10)
+    assert (grade["score"], grade["feedback"], grade["reasoning"]) == (5.0, "Ok.", "Half right.")
+    assert grade["repaired"] is True
+
+
+def test_parse_grade_falls_back_to_labelled_lines():
+    grade = parse_grade("SCORE: 9\nFEEDBACK: Excellent\nREASONING: Complete and correct", 10)
+    assert grade["score"] == 9.0
+    assert grade["feedback"] == "Excellent"
+    assert grade["repaired"] is True
+
+
+def test_parse_grade_without_score_raises():
+    with pytest.raises(GradingOutputError):
+        parse_grade("I cannot grade this answer.", 10)
+
+
+def test_parse_grade_flags_out_of_range_score():
+    grade = parse_grade(json.dumps({"score": 12, "feedback": "", "reasoning": ""}), 10)
+    assert grade["score"] == 10.0
+    assert grade["repaired"] is True
+
+
+@pytest.mark.parametrize("value, expected", [
+    (7, 7.0),
+    ("7", 7.0),
+    ("8.5/10", 8.5),
+    ("17 out of 20", 8.5),
+    ("Score: 85%", 8.5),
+    ("85 percent", 8.5),
+    (-1, 0.0),
+    (12, 10.0),
+    (True, None),
+    ("none", None),
+    (None, None),
+])
+def test_coerce_score(value, expected):
+    assert coerce_score(value, 10) == expected
+
+
+def test_parse_grades_keeps_only_entries_with_id_and_score():
+    text = json.dumps([
+        {"id": "s1", "score": 4, "feedback": "a", "reasoning": "b"},
+        {"score": 5, "feedback": "no id", "reasoning": ""},
+        {"id": "s3", "feedback": "no score", "reasoning": ""},
+        {"id": "s4", "grade": "3/5", "feedback": "c", "reasoning": "d"},
+    ])
+    grades = parse_grades(text, 10)
+    assert set(grades) == {"s1", "s4"}
+    assert grades["s4"]["score"] == 6.0
+
+
+def test_parse_grades_unwraps_results_object():
+    text = json.dumps({"results": [{"id": 1, "score": 2, "feedback": "", "reasoning": ""}]})
+    assert parse_grades(text, 10)["1"]["score"] == 2.0
+
+
+def test_load_json_lenient_without_json_raises():
+    with pytest.raises(GradingOutputError):
+        load_json_lenient("no json here")
+
+
+def test_parse_rubric_grade_clean_json():
+    text = json.dumps({
+        "total_score": 7, "max_score": 10, "overall_feedback": "Solid.",
+        "criteria_scores": [{"id": "c1", "score": 5, "max_score": 6, "reasoning": "Mostly there."},
+                            {"id": "c2", "score": 2, "max_score": 4, "reasoning": "Partly."}],
+        "deductions": [{"id": "d1", "applied": True, "reason": "Units missing."}],
+    })
+    grade = parse_rubric_grade(text, RUBRIC)
+    assert (grade["total_score"], grade["max_score"], grade["repaired"]) == (7.0, 10.0, False)
+    assert [c["id"] for c in grade["criteria_scores"]] == ["c1", "c2"]
+    assert grade["deductions"] == [{"id": "d1", "description": "No units", "points": -1.0}]
+
+
+def test_parse_rubric_grade_repairs_criteria_and_sums_missing_total():
+    text = json.dumps({"criteria_scores": [
+        {"id": "c1", "points": "9/6", "explanation": "Over the top."},
+        {"id": "c9", "score": 3, "max_score": 3, "reasoning": "Not in the rubric."},
+        {"id": "c2", "reasoning": "No score."},
+    ]})
+    grade = parse_rubric_grade(text, RUBRIC)
+    assert grade["criteria_scores"] == [{"id": "c1", "score": 6.0, "max_score": 6.0, "reasoning": "Over the top."}]
+    assert grade["total_score"] == 6.0
+    assert grade["repaired"] is True
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps({"overall_feedback": "Looks fine.", "criteria_scores": []}),
+    json.dumps(["not", "an", "object"]),
+    "I cannot grade this answer.",
+])
+def test_parse_rubric_grade_without_scores_raises(text):
+    with pytest.raises(GradingOutputError):
+        parse_rubric_grade(text, RUBRIC)
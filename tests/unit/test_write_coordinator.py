@@ -0,0 +1,34 @@
+"""
+Opti-Scholar Tests: Atomic Writes
+"""
+
+import os
+
+import pytest
+
+from app.core.write_coordinator import atomic_write, atomic_write_csv, atomic_write_text
+
+
+def test_text_and_csv_writes_replace_the_file(tmp_path):
+    path = str(tmp_path / "table.csv")
+    atomic_write_text(path, "old\n")
+    atomic_write_csv(path, ["id", "name"], [{"id": "1", "name": "A, B"}])
+
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == 'id,name\r\n1,"A, B"\r\n'
+    assert os.listdir(tmp_path) == ["table.csv"]
+
+
+def test_failed_write_keeps_old_content_and_no_temp_file(tmp_path):
+    path = str(tmp_path / "table.csv")
+    atomic_write_text(path, "old\n")
+
+    def fail(f):
+        f.write("partial")
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, fail)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "old\n"
+    assert os.listdir(tmp_path) == ["table.csv"]